@@ -1,11 +1,179 @@
 # -*- encoding: UTF-8 -*-
 
+"""
+Point d'entrée de production : tous les sous-systèmes tournent ensemble dans un seul processus.
+
+Caméra, sonars, parole et mouvements sont des tâches asyncio qui coopèrent sur une même boucle
+(voir scripts/utils/asynchrone) : les appels NAOqi sont faits en _async=True et attendus sans
+bloquer, les événements ALMemory arrivent par des flux asynchrones et le traitement d'image
+passe dans le pool de threads. Les tâches partagent un EtatRobot ; Ctrl+C ou SIGTERM arrête
+chaque tâche proprement (désabonnements, tête recentrée, robot au repos).
+
+    python main.py --ip 172.16.1.164
+    python main.py --ip 172.16.1.164 --taches camera,mouvement --duree 60 --yuv422
+"""
+
 import qi
 import argparse
+import asyncio
+import math
 import sys
+import time
+
+from scripts.meca_module.sonar_detection import SONAR
+from scripts.utils import metriques, telemetrie
+from scripts.utils.asynchrone import Superviseur, appeler, attendre, evenement, executer, periodique
+from scripts.utils.espace_couleur import RGB, YUV422
+from scripts.utils.horodatage_images import SourceImages
+
+CLES_SONARS = ["Device/SubDeviceList/US/Left/Sensor/Value", "Device/SubDeviceList/US/Right/Sensor/Value"]
+ARTICULATIONS_TETE = ["HeadYaw", "HeadPitch"]
+TACHES = ("camera", "sonar", "parole", "mouvement")
+
+
+class EtatRobot:
+    """État partagé entre les tâches (une seule boucle asyncio : aucun verrou nécessaire)"""
+
+    def __init__(self):
+        self.cible = None  # (x, y, pixels) normalisés de la dernière détection
+        self.instant_cible = 0.0
+        self.distance_sonar = math.inf
+        self.parole_en_cours = False
+
+
+async def tache_camera(session, etat, arret, yuv422=False, age_max=0.25):
+    """Détection du rouge sur chaque image ; la détection tourne dans le pool de threads"""
+    from scripts.ia_module.traitement_image import centroide, masqueRouge
+
+    video = session.service("ALVideoDevice")
+    espace = YUV422 if yuv422 else RGB
+    name_id = await appeler(video, "subscribeCamera", "Runtime", 0, 1, espace, 15)
+    source = SourceImages(video, name_id, "runtime", age_max, etapes=("detection",), espace=espace)
+    try:
+        while not arret.is_set():
+            brute = await appeler(video, "getImageRemote", name_id)
+            image = source.recevoir(brute, time.time())
+            if image is None:
+                await asyncio.sleep(0.01)
+                continue
+            cible = await executer(lambda couleur: centroide(masqueRouge(couleur.bgr)), image.couleur())
+            image.marquer("detection")
+            image.terminer()
+            etat.cible, etat.instant_cible = cible, image.capture
+    finally:
+        video.unsubscribe(name_id)
+
+
+async def tache_sonar(session, etat, arret, periode=0.1):
+    """Lecture des deux sonars à cadence fixe"""
+    sonar = session.service("ALSonar")
+    memoire = session.service("ALMemory")
+    canal = telemetrie.canal("sonar", ("gauche", "droite"))
+    await appeler(sonar, "subscribe", "Runtime")
+    try:
+        async for _ in periodique(periode, arret):
+            gauche, droite = await appeler(memoire, "getListData", CLES_SONARS)
+            canal.ajouter(gauche, droite)
+            SONAR.avec(cote="gauche").fixer(gauche)
+            SONAR.avec(cote="droite").fixer(droite)
+            etat.distance_sonar = min(gauche, droite)
+    finally:
+        sonar.unsubscribe("Runtime")
+
+
+async def tache_parole(session, etat, arret, confiance_min=0.4):
+    """Reconnaissance vocale : chaque mot reconnu est résolu en intention et la réponse est dite"""
+    from scripts.meca_module.cache_parole import CacheParole
+    from scripts.meca_module.intentions import MoteurIntentions
+
+    asr = session.service("ALSpeechRecognition")
+    intentions = MoteurIntentions.depuis_csv()
+    parole = CacheParole.pour(session)
+    await executer(parole.precharger, set(intentions.reponses.values()))
+    await appeler(asr, "pause", True)
+    await appeler(asr, "setLanguage", "French")
+    await executer(intentions.pousser_vocabulaire, asr)
+    await appeler(asr, "pause", False)
+    await appeler(asr, "subscribe", "Runtime")
+    try:
+        async with evenement(session, "WordRecognized", file_max=4) as mots:
+            async for valeur in mots:
+                if not valeur or len(valeur) < 2 or valeur[1] < confiance_min:
+                    continue
+                resultat = intentions.resoudre(valeur[0])
+                reponse = intentions.reponse(resultat[0]) if resultat else None
+                if not reponse:
+                    continue
+                print(f" Mot reconnu: '{valeur[0]}' → \"{reponse}\"")
+                etat.parole_en_cours = True
+                try:
+                    await attendre(parole.dire(reponse))
+                finally:
+                    etat.parole_en_cours = False
+                if resultat[0] == "au_revoir":
+                    print(" Conversation terminée")
+                    break
+    finally:
+        asr.unsubscribe("Runtime")
+
+
+async def tache_mouvement(session, etat, arret, periode=0.1, gain=0.5, distance_arret=0.35):
+    """La tête suit la cible vue par la caméra ; tout déplacement est arrêté devant un obstacle"""
+    from scripts.meca_module.asservissement_visuel import decalage_angulaire
+    from scripts.meca_module.gestes import LIMITES_ARTICULATIONS
 
-def main(session, args) :
-    pass
+    motion = session.service("ALMotion")
+    yaw_min, yaw_max, _ = LIMITES_ARTICULATIONS["HeadYaw"]
+    pitch_min, pitch_max, _ = LIMITES_ARTICULATIONS["HeadPitch"]
+    await appeler(motion, "setStiffnesses", "Head", 1.0)
+    try:
+        async for instant in periodique(periode, arret):
+            if etat.distance_sonar < distance_arret and await appeler(motion, "moveIsActive"):
+                await appeler(motion, "stopMove")
+                print(f"Obstacle à {etat.distance_sonar:.2f} m : arrêt.")
+            if etat.cible is None or time.time() - etat.instant_cible > 0.5:
+                continue
+            d_yaw, d_pitch = decalage_angulaire(etat.cible[0], etat.cible[1])
+            yaw, pitch = await appeler(motion, "getAngles", ARTICULATIONS_TETE, True)
+            consigne = [min(max(yaw + gain * d_yaw, yaw_min), yaw_max),
+                        min(max(pitch + gain * d_pitch, pitch_min), pitch_max)]
+            await appeler(motion, "setAngles", ARTICULATIONS_TETE, consigne, 0.2)
+    finally:
+        motion.stopMove()
+        motion.setAngles(ARTICULATIONS_TETE, [0.0, 0.0], 0.15)
+
+
+async def main(session, args) :
+    if args.test:
+        from scripts.meca_module.voice_recognition import test_text_to_speech
+        await executer(test_text_to_speech, session)
+        return
+
+    telemetrie.demarrer()
+    metriques.demarrer_serveur()
+    etat = EtatRobot()
+    superviseur = Superviseur()
+    superviseur.installer_signaux()
+    taches = {
+        "camera": lambda: tache_camera(session, etat, superviseur.arret, args.yuv422),
+        "sonar": lambda: tache_sonar(session, etat, superviseur.arret),
+        "parole": lambda: tache_parole(session, etat, superviseur.arret),
+        "mouvement": lambda: tache_mouvement(session, etat, superviseur.arret),
+    }
+    for nom in args.taches.split(","):
+        superviseur.lancer(nom, taches[nom]())
+    print(f"✓ Tâches lancées : {', '.join(superviseur.taches)} (Ctrl+C pour arrêter)")
+
+    try:
+        await superviseur.attendre(args.duree)
+    finally:
+        await superviseur.arreter()
+        telemetrie.arreter()
+        try:
+            session.service("ALMotion").rest()
+        except Exception:
+            pass
+        print("\nProgramme terminé.")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Contrôle du robot NAO.")
@@ -15,13 +183,26 @@ if __name__ == "__main__":
                         help="Port NAOqi (par défaut: 9559)")
     parser.add_argument("--test", action="store_true",
                         help="Lancer uniquement le test TTS")
+    parser.add_argument("--taches", type=str, default=",".join(TACHES),
+                        help=f"Tâches à lancer, séparées par des virgules (parmi {', '.join(TACHES)})")
+    parser.add_argument("--duree", type=float, default=None,
+                        help="Arrêt automatique après cette durée (s)")
+    parser.add_argument("--yuv422", action="store_true",
+                        help="Caméra en YUV422 (format natif : un tiers d'octets réseau en moins, décodage un peu plus coûteux côté PC)")
 
     args = parser.parse_args()
+    inconnues = set(args.taches.split(",")) - set(TACHES)
+    if inconnues:
+        parser.error(f"tâches inconnues : {', '.join(sorted(inconnues))}")
     session = qi.Session()
 
     try:
         session.connect(f"tcp://{args.ip}:{args.port}")
-        main(session, args)
     except RuntimeError:
         print(f"Impossible de se connecter à NAOqi à l'adresse {args.ip}:{args.port}.")
         sys.exit(1)
+    try:
+        asyncio.run(main(session, args))
+    except KeyboardInterrupt:
+        # Plateformes sans gestionnaire de signaux dans la boucle : asyncio.run annule les tâches
+        pass
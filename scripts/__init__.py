@@ -1,5 +1,18 @@
 """
 Module contenant tous les scripts créés pour le projet
+
+Les sous-modules sont chargés à la première utilisation (ex: `scripts.ia_module`)
+afin que les points d'entrée légers ne paient pas l'import de cv2, pandas ou tensorflow.
 """
+import importlib
+
 __version__ = '1.0'
-__all__ = ["ia_module","meca_module","utils"]
\ No newline at end of file
+__all__ = ["ia_module","meca_module","utils"]
+
+
+def __getattr__(name):
+    if name in __all__:
+        module = importlib.import_module(f".{name}", __name__)
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
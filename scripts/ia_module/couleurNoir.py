@@ -1,5 +1,8 @@
 import numpy as np 
-import cv2 
+from ..utils import apercu
+from ..utils.lazy_import import lazy_import
+
+cv2 = lazy_import("cv2")
 
 # Ouvrir la webcam (0 = webcam par défaut, 1 = autre caméra si branchée)
 
@@ -32,11 +35,11 @@ def detectionCouleurNoir() :
         result_webcam = cv2.bitwise_and(frame,frame,mask=mask)
 
         # Affiche l'image
-        cv2.imshow("Webcam de l'ordinateur", result_webcam)
+        touche = apercu.afficher("Webcam de l'ordinateur", result_webcam)
 
            # Quitter avec 'q'
-        if cv2.waitKey(1) & 0xFF == ord('q'):
+        if touche & 0xFF == ord('q'):
             break
     cap.release()
-    cv2.destroyAllWindows()
+    apercu.fermer()
 	
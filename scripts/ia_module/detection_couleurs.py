@@ -1,11 +1,14 @@
-import cv2
 import numpy as np
-import pandas as pd
+from ..utils import apercu
+from ..utils.lazy_import import lazy_import
+from .carte_couleurs import IntegralesCouleurs, charger_couleurs
+
+cv2 = lazy_import("cv2")
 
 
 def detection_couleurs () :
-    # Charger le fichier CSV avec les plages de couleurs
-    colors_df = pd.read_csv("scripts/ia_module/couleurs.csv")
+    # Charger le fichier CSV avec les plages de couleurs (regroupées par nom)
+    couleurs = charger_couleurs()
     
     cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
     
@@ -14,26 +17,27 @@ def detection_couleurs () :
         if not ret:
             break
     
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-        detected_colors = []
-    
-        for _, row in colors_df.iterrows():
-            lower = np.array([row['h_min'], row['s_min'], row['v_min']])
-            upper = np.array([row['h_max'], row['s_max'], row['v_max']])
-            mask = cv2.inRange(hsv, lower, upper)
+        # Une seule passe par image : masques + images intégrales de toutes les couleurs,
+        # puis chaque requête de zone ne coûte que quelques lectures
+        integrales = IntegralesCouleurs(frame, couleurs)
+        detected_colors = integrales.presentes(500)  # seuil pour éviter le bruit
     
-            if cv2.countNonZero(mask) > 500:  # seuil pour éviter le bruit
-                detected_colors.append(row['nom'])
+        # Encadre la zone la plus dense de chaque couleur détectée
+        for nom in detected_colors:
+            x, y, densite = integrales.meilleure_fenetre(nom, 64, 64)
+            if densite > 0.3:
+                cv2.rectangle(frame, (x, y), (x + 64, y + 64), (255, 255, 255), 1)
+                cv2.putText(frame, nom, (x, y - 4), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
     
         # Affichage du texte sur l’image
-        text = " | ".join(set(detected_colors)) if detected_colors else "Aucune couleur détectée"
+        text = " | ".join(detected_colors) if detected_colors else "Aucune couleur détectée"
         cv2.putText(frame, text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (255,255,255), 2)
     
-        cv2.imshow("Detection de couleurs", frame)
+        touche = apercu.afficher("Detection de couleurs", frame, attente=10)
     
-        if cv2.waitKey(10) & 0xFF == ord('q'):
+        if touche & 0xFF == ord('q'):
             break
     
     cap.release()
-    cv2.destroyAllWindows()
+    apercu.fermer()
     
@@ -0,0 +1,274 @@
+"""
+Module de détection de personnes sur CPU.
+
+Le détecteur coûteux (HOG d'OpenCV) n'est lancé que toutes les N images, ou dès que
+le suivi perd confiance ; entre deux détections, chaque personne est suivie par une
+simple corrélation de gabarit dans une fenêtre de recherche autour de sa dernière position.
+À chaque détection, l'apparence de chaque personne (histogramme teinte/saturation, voir
+profil_apparence) est comparée aux profils connus : une personne qui sort du champ puis y
+revient garde son identité.
+"""
+
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from ..utils import apercu, telemetrie
+from ..utils.lazy_import import lazy_import
+from .profil_apparence import ProfilsApparence, histogrammeHS
+
+cv2 = lazy_import("cv2")
+
+Boite = Tuple[int, int, int, int]  # (x, y, largeur, hauteur)
+
+
+class DetecteurHOG:
+    """
+Détecteur de piétons HOG + SVM fourni par OpenCV
+
+Args:
+    largeur_max: l'image est réduite à cette largeur avant détection (plus rapide)
+    seuil: score SVM minimal pour garder une détection
+    """
+
+    def __init__(self, largeur_max : int = 320, seuil : float = 0.3):
+        self.largeur_max = largeur_max
+        self.seuil = seuil
+        self.hog = cv2.HOGDescriptor()
+        self.hog.setSVMDetector(cv2.HOGDescriptor_getDefaultPeopleDetector())
+
+    def detecter(self, frame : np.ndarray) -> List[Tuple[Boite, float]]:
+        """
+Détecte les personnes dans une image BGR
+
+Returns:
+    liste de (boîte en coordonnées de l'image d'origine, score)
+    """
+        echelle = 1.0
+        if frame.shape[1] > self.largeur_max:
+            echelle = frame.shape[1] / float(self.largeur_max)
+            frame = cv2.resize(frame, (self.largeur_max, int(frame.shape[0] / echelle)),
+                               interpolation=cv2.INTER_AREA)
+        boites, scores = self.hog.detectMultiScale(frame, winStride=(8, 8), padding=(8, 8), scale=1.05)
+        resultats = []
+        for (x, y, w, h), score in zip(boites, np.ravel(scores)):
+            if score >= self.seuil:
+                resultats.append(((int(x * echelle), int(y * echelle), int(w * echelle), int(h * echelle)),
+                                  float(score)))
+        return resultats
+
+
+class SuiviGabarit:
+    """
+Suivi léger d'une boîte par corrélation de gabarit (cv2.matchTemplate)
+
+Args:
+    frame: image BGR dans laquelle la boîte a été détectée
+    boite: boîte initiale (x, y, largeur, hauteur)
+    marge: taille de la fenêtre de recherche, en fraction de la taille de la boîte
+    identite: identité de la personne suivie (voir PipelinePersonne)
+    """
+
+    def __init__(self, frame : np.ndarray, boite : Boite, marge : float = 0.5, identite : Optional[str] = None):
+        self.marge = marge
+        self.boite = boite
+        self.identite = identite
+        self.confiance = 1.0
+        self._gabarit = self._extraire(self._gris(frame), boite)
+
+    @staticmethod
+    def _gris(frame : np.ndarray) -> np.ndarray:
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+
+    @staticmethod
+    def _extraire(gris : np.ndarray, boite : Boite) -> np.ndarray:
+        x, y, w, h = boite
+        return gris[max(y, 0):y + h, max(x, 0):x + w]
+
+    def mettre_a_jour(self, frame : np.ndarray) -> Tuple[Boite, float]:
+        """
+Cherche le gabarit autour de la dernière position
+
+Returns:
+    (nouvelle boîte, confiance entre 0 et 1)
+    """
+        gris = self._gris(frame)
+        x, y, w, h = self.boite
+        gh, gw = self._gabarit.shape[:2]
+        dx, dy = int(w * self.marge), int(h * self.marge)
+        x0, y0 = max(x - dx, 0), max(y - dy, 0)
+        x1, y1 = min(x + w + dx, gris.shape[1]), min(y + h + dy, gris.shape[0])
+        zone = gris[y0:y1, x0:x1]
+
+        if gh == 0 or gw == 0 or zone.shape[0] < gh or zone.shape[1] < gw:
+            self.confiance = 0.0
+            return self.boite, self.confiance
+
+        scores = cv2.matchTemplate(zone, self._gabarit, cv2.TM_CCOEFF_NORMED)
+        _, meilleur, _, (mx, my) = cv2.minMaxLoc(scores)
+        self.boite = (x0 + mx, y0 + my, w, h)
+        self.confiance = max(float(meilleur), 0.0)
+        return self.boite, self.confiance
+
+
+class PipelinePersonne:
+    """
+Détection de personnes toutes les N images avec suivi léger entre deux détections
+
+Args:
+    detecteur: objet possédant une méthode detecter(frame) -> [(boite, score)]
+    intervalle: nombre d'images entre deux détections forcées
+    seuil_confiance: une confiance de suivi inférieure déclenche une détection immédiate
+    profils: profils d'apparence des personnes connues (complétés au fil des détections)
+    seuil_identite: similarité d'apparence minimale pour reconnaître une personne connue
+    """
+
+    def __init__(self, detecteur : Optional[DetecteurHOG] = None, intervalle : int = 10,
+                 seuil_confiance : float = 0.5, profils : Optional[ProfilsApparence] = None,
+                 seuil_identite : float = 0.6):
+        self.detecteur = detecteur if detecteur is not None else DetecteurHOG()
+        self.intervalle = intervalle
+        self.seuil_confiance = seuil_confiance
+        self.profils = profils if profils is not None else ProfilsApparence(alpha=0.2)
+        self.seuil_identite = seuil_identite
+        self.suivis : List[SuiviGabarit] = []
+        self._depuis_detection = intervalle  # détection dès la première image
+        self._images = 0
+        self._detections = 0
+        self._temps_detection = 0.0
+        self._temps_suivi = 0.0
+        self._cpu = 0.0
+        self._debut = None
+        self._enregistrement = telemetrie.canal("detection_personne", ("personnes", "detection", "ms"))
+
+    def _doit_detecter(self) -> bool:
+        if self._depuis_detection >= self.intervalle:
+            return True
+        return any(s.confiance < self.seuil_confiance for s in self.suivis)
+
+    def _identifier(self, frame : np.ndarray, boites : List[Boite]) -> List[Optional[str]]:
+        """Identité de chaque boîte détectée (nouvelle personne si aucun profil ne ressemble)"""
+        identites : List[Optional[str]] = []
+        prises = set()
+        for x, y, w, h in boites:
+            # Les boîtes HOG peuvent déborder de l'image
+            x0, y0 = max(x, 0), max(y, 0)
+            x1, y1 = min(x + w, frame.shape[1]), min(y + h, frame.shape[0])
+            if x1 <= x0 or y1 <= y0:
+                identites.append(None)
+                continue
+            hist = histogrammeHS(frame, (x0, y0, x1 - x0, y1 - y0))
+            identite = None
+            if len(self.profils):
+                scores = self.profils.similarites(hist)
+                for i in np.argsort(scores)[::-1]:
+                    if scores[i] < self.seuil_identite:
+                        break
+                    if self.profils.noms[i] not in prises:  # deux boîtes d'une image : deux personnes
+                        identite = self.profils.noms[i]
+                        break
+            if identite is None:
+                n = len(self.profils) + 1
+                while f"personne_{n}" in self.profils:
+                    n += 1
+                identite = f"personne_{n}"
+            self.profils.ajouter(identite, hist)
+            prises.add(identite)
+            identites.append(identite)
+        return identites
+
+    def traiter(self, frame : np.ndarray) -> List[Tuple[Boite, float, str, Optional[str]]]:
+        """
+Traite une image BGR
+
+Returns:
+    liste de (boîte, confiance, source, identité) avec source "detection" ou "suivi"
+    """
+        if self._debut is None:
+            self._debut = time.perf_counter()
+        cpu0 = time.process_time()
+        t0 = time.perf_counter()
+        self._images += 1
+
+        if self._doit_detecter():
+            detections = self.detecteur.detecter(frame)
+            identites = self._identifier(frame, [boite for boite, _ in detections])
+            self.suivis = [SuiviGabarit(frame, boite, identite=identite)
+                           for (boite, _), identite in zip(detections, identites)]
+            self._depuis_detection = 0
+            self._detections += 1
+            self._temps_detection += time.perf_counter() - t0
+            resultats = [(boite, score, "detection", identite)
+                         for (boite, score), identite in zip(detections, identites)]
+        else:
+            self._depuis_detection += 1
+            resultats = [s.mettre_a_jour(frame) + ("suivi", s.identite) for s in self.suivis]
+            self._temps_suivi += time.perf_counter() - t0
+
+        self._cpu += time.process_time() - cpu0
+        self._enregistrement.ajouter(len(resultats), self._depuis_detection == 0,
+                                     1000.0 * (time.perf_counter() - t0))
+        return resultats
+
+    def statistiques(self) -> Dict[str, float]:
+        """
+Statistiques de fonctionnement depuis le début
+
+Returns:
+    images traitées, fréquence d'image effective, taux de détection,
+    temps moyen (ms) d'une détection et d'un suivi, temps CPU moyen par image (ms)
+    """
+        duree = time.perf_counter() - self._debut if self._debut else 0.0
+        suivis = self._images - self._detections
+        return {
+            "images": self._images,
+            "fps": self._images / duree if duree > 0 else 0.0,
+            "taux_detection": self._detections / self._images if self._images else 0.0,
+            "detections_par_seconde": self._detections / duree if duree > 0 else 0.0,
+            "ms_detection": 1000.0 * self._temps_detection / self._detections if self._detections else 0.0,
+            "ms_suivi": 1000.0 * self._temps_suivi / suivis if suivis else 0.0,
+            "ms_cpu_par_image": 1000.0 * self._cpu / self._images if self._images else 0.0,
+        }
+
+
+def suiviPersonne(session, intervalle : int = 10) -> None:
+    """
+Affiche en direct les personnes détectées par la caméra du robot
+
+Args:
+    session: la session en cours avec le robot
+    intervalle: nombre d'images entre deux passages du détecteur HOG
+    """
+    video_service = session.service("ALVideoDevice")
+    name_id = video_service.subscribeCamera("SuiviPersonne", 0, 1, 11, 30)
+    pipeline = PipelinePersonne(intervalle=intervalle)
+
+    try:
+        while True:
+            image = video_service.getImageRemote(name_id)
+            if image is None:
+                print("No image.")
+                continue
+
+            width, height = image[0], image[1]
+            img = np.frombuffer(image[6], dtype=np.uint8).reshape((height, width, 3))
+            frame = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
+
+            for (x, y, w, h), confiance, source, identite in pipeline.traiter(frame):
+                couleur = (0, 255, 0) if source == "detection" else (255, 200, 0)
+                cv2.rectangle(frame, (x, y), (x + w, y + h), couleur, 2)
+                cv2.putText(frame, f"{identite or '?'} {confiance:.2f}", (x, y - 5),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, couleur, 1)
+
+            if apercu.afficher("Detection de personnes", frame) & 0xFF == ord('q'):
+                break
+    finally:
+        video_service.unsubscribe(name_id)
+        apercu.fermer()
+        stats = pipeline.statistiques()
+        print(f"{stats['images']} images, {stats['fps']:.1f} fps, "
+              f"taux de détection {stats['taux_detection'] * 100:.0f}%, "
+              f"détection {stats['ms_detection']:.1f} ms, suivi {stats['ms_suivi']:.1f} ms, "
+              f"CPU {stats['ms_cpu_par_image']:.1f} ms/image")
+
+if __name__ == '__main__' : pass
@@ -0,0 +1,416 @@
+"""
+Module de constitution d'un jeu de données d'entraînement à partir de la caméra du robot.
+
+Les images (ramenées en 224x224 RGB comme dans connexionCamera) et leurs étiquettes sont
+écrites au fil de l'eau par un thread d'arrière-plan dans des shards de taille fixe :
+
+    <dossier>/index.json                 format, forme des images, classes, liste des shards
+    <dossier>/shard_00000.images.bin     (format numpy) images uint8 brutes bout à bout
+    <dossier>/shard_00000.labels.bin     (format numpy) indices de classe int32
+    <dossier>/shard_00000.tfrecord       (format tfrecord) un tf.train.Example par image
+
+La boucle de capture ne fait que déposer l'image réduite dans une file bornée : si l'écriture
+prend du retard, les images en trop sont abandonnées et comptées (ou le producteur attend,
+avec bloquer=True). La mémoire utilisée ne dépend donc pas de la durée de collecte.
+L'index est réécrit à chaque shard terminé : une collecte interrompue garde ses shards
+complets, et une nouvelle collecte dans le même dossier les complète. Une erreur d'écriture
+(disque plein, erreur TFRecord) arrête l'écriture mais pas le thread, qui continue de vider
+la file : l'erreur est relancée au prochain ajouter() ou à fermer(), sans jamais bloquer.
+
+Relecture sans TensorFlow (images projetées en mémoire, rien n'est chargé d'avance) :
+    donnees = JeuDonnees("donnees")
+    for images, labels in donnees.lots(32, melanger=True):
+        ...
+
+Collecte:
+    python -m scripts.ia_module.jeu_donnees donnees --label personne --ip 172.16.1.164 --duree 60
+    python -m scripts.ia_module.jeu_donnees donnees --label vide --video enregistrement.mp4
+"""
+
+import argparse
+import bisect
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from ..utils import metriques
+from ..utils.horodatage_images import SourceImages
+from ..utils.lazy_import import lazy_import
+
+cv2 = lazy_import("cv2")
+tf = lazy_import("tensorflow")
+
+FORME_DEFAUT = (224, 224, 3)
+
+ECRITES = metriques.compteur("jeu_donnees_images_ecrites_total", "Images écrites dans les shards", ("label",))
+PERDUES = metriques.compteur("jeu_donnees_images_perdues_total", "Images abandonnées car l'écriture est en retard")
+
+
+def pretraiter(image : np.ndarray, forme : Sequence[int] = FORME_DEFAUT) -> np.ndarray:
+    """Réduit une image RGB à la forme du jeu de données (INTER_AREA, comme connexionCamera)"""
+    if image.shape[:2] != tuple(forme[:2]):
+        image = cv2.resize(image, (forme[1], forme[0]), interpolation=cv2.INTER_AREA)
+    return np.ascontiguousarray(image, dtype=np.uint8)
+
+
+def lire_index(dossier : str) -> Optional[Dict[str, Any]]:
+    chemin = os.path.join(dossier, "index.json")
+    if not os.path.exists(chemin):
+        return None
+    with open(chemin, "r") as f:
+        return json.load(f)
+
+
+class _ShardNumpy:
+    """Shard en cours d'écriture au format numpy brut"""
+
+    def __init__(self, base : str):
+        self._images = open(base + ".images.bin", "wb")
+        self._labels = open(base + ".labels.bin", "wb")
+
+    def ecrire(self, image : np.ndarray, label : int, instant : float) -> None:
+        self._images.write(image.tobytes())
+        self._labels.write(np.int32(label).tobytes())
+
+    def fermer(self) -> None:
+        self._images.close()
+        self._labels.close()
+
+
+class _ShardTFRecord:
+    """Shard en cours d'écriture au format TFRecord"""
+
+    def __init__(self, base : str):
+        self._ecrivain = tf.io.TFRecordWriter(base + ".tfrecord")
+
+    def ecrire(self, image : np.ndarray, label : int, instant : float) -> None:
+        caracteristiques = tf.train.Features(feature={
+            "image": tf.train.Feature(bytes_list=tf.train.BytesList(value=[image.tobytes()])),
+            "label": tf.train.Feature(int64_list=tf.train.Int64List(value=[label])),
+            "t": tf.train.Feature(float_list=tf.train.FloatList(value=[instant])),
+        })
+        self._ecrivain.write(tf.train.Example(features=caracteristiques).SerializeToString())
+
+    def fermer(self) -> None:
+        self._ecrivain.close()
+
+
+SHARDS = {"numpy": _ShardNumpy, "tfrecord": _ShardTFRecord}
+
+
+class ExportateurShards:
+    """
+Écriture en arrière-plan d'images étiquetées dans des shards de taille fixe
+
+Args:
+    dossier: dossier du jeu de données (complété s'il existe déjà)
+    format: "numpy" (relu sans TensorFlow) ou "tfrecord"
+    taille_shard: nombre d'images par shard
+    forme: forme des images enregistrées (hauteur, largeur, canaux)
+    file_max: nombre d'images en attente d'écriture au maximum
+    bloquer: si vrai, ajouter attend quand la file est pleine au lieu d'abandonner l'image
+    """
+
+    def __init__(self, dossier : str, format : str = "numpy", taille_shard : int = 1000,
+                 forme : Sequence[int] = FORME_DEFAUT, file_max : int = 64, bloquer : bool = False):
+        if format not in SHARDS:
+            raise ValueError(f"Format inconnu : {format} (numpy ou tfrecord)")
+        self.dossier = dossier
+        self.taille_shard = taille_shard
+        self.bloquer = bloquer
+        self.perdues = 0
+        os.makedirs(dossier, exist_ok=True)
+        index = lire_index(dossier)
+        if index is None:
+            index = {"format": format, "forme": list(forme), "dtype": "uint8", "classes": [], "shards": []}
+        elif index["format"] != format or tuple(index["forme"]) != tuple(forme):
+            raise ValueError(f"{dossier} contient déjà un jeu {index['format']} {index['forme']}")
+        self.index = index
+        self.forme = tuple(forme)
+        self._classes = {nom: i for i, nom in enumerate(index["classes"])}
+        self._erreur : Optional[BaseException] = None
+        self._file : "queue.Queue[Optional[Tuple[np.ndarray, str, float]]]" = queue.Queue(maxsize=file_max)
+        self._thread = threading.Thread(target=self._ecrire, name="JeuDonnees", daemon=True)
+        self._thread.start()
+
+    def ajouter(self, image : np.ndarray, label : str, instant : Optional[float] = None) -> bool:
+        """
+Dépose une image RGB (réduite ici à la forme du jeu) dans la file d'écriture
+
+Returns:
+    faux si l'image a été abandonnée (file pleine)
+
+Raises:
+    RuntimeError: l'écriture a échoué (l'erreur d'origine est la cause)
+    """
+        self._verifier()
+        element = (pretraiter(image, self.forme), label, time.time() if instant is None else instant)
+        try:
+            self._file.put(element, block=self.bloquer)
+        except queue.Full:
+            self.perdues += 1
+            PERDUES.inc()
+            return False
+        return True
+
+    def _ouvrir_shard(self) -> Tuple[Any, Dict[str, Any]]:
+        nom = f"shard_{len(self.index['shards']):05d}"
+        return SHARDS[self.index["format"]](os.path.join(self.dossier, nom)), {"nom": nom, "n": 0, "comptes": {}}
+
+    def _fermer_shard(self, shard : Any, description : Dict[str, Any]) -> None:
+        shard.fermer()
+        self.index["shards"].append(description)
+        self.index["classes"] = sorted(self._classes, key=self._classes.get)
+        self.index["total"] = sum(s["n"] for s in self.index["shards"])
+        chemin = os.path.join(self.dossier, "index.json")
+        with open(chemin + ".tmp", "w") as f:
+            json.dump(self.index, f, indent=1)
+        os.replace(chemin + ".tmp", chemin)
+
+    def _verifier(self) -> None:
+        if self._erreur is not None:
+            raise RuntimeError(f"Écriture du jeu de données interrompue : {self._erreur!r}") from self._erreur
+
+    def _ecrire(self) -> None:
+        shard, description = None, None
+        while True:
+            element = self._file.get()
+            if element is None:
+                break
+            if self._erreur is not None:
+                continue  # la file est vidée pour ne jamais bloquer les producteurs
+            image, label, instant = element
+            try:
+                if shard is None:
+                    shard, description = self._ouvrir_shard()
+                classe = self._classes.setdefault(label, len(self._classes))
+                shard.ecrire(image, classe, instant)
+                description["n"] += 1
+                description["comptes"][label] = description["comptes"].get(label, 0) + 1
+                ECRITES.avec(label=label).inc()
+                if description["n"] == self.taille_shard:
+                    self._fermer_shard(shard, description)
+                    shard, description = None, None
+            except BaseException as e:
+                self._erreur = e
+                # Le shard en cours est incomplet : il n'est pas ajouté à l'index
+                if shard is not None:
+                    try:
+                        shard.fermer()
+                    except Exception:
+                        pass
+                shard, description = None, None
+        if shard is not None:
+            try:
+                self._fermer_shard(shard, description)
+            except BaseException as e:
+                self._erreur = e
+
+    def statistiques(self) -> Dict[str, int]:
+        return {"shards": len(self.index["shards"]), "ecrites": self.index.get("total", 0),
+                "en_attente": self._file.qsize(), "perdues": self.perdues}
+
+    def fermer(self, delai : float = 30.0) -> Dict[str, int]:
+        """
+Écrit les images en attente, termine le dernier shard et retourne les statistiques
+
+Args:
+    delai: durée maximale (s) d'attente du thread d'écriture
+
+Raises:
+    RuntimeError: l'écriture a échoué ou n'a pas fini dans le délai
+    """
+        fin = time.time() + delai
+        while self._thread.is_alive():
+            try:
+                self._file.put(None, timeout=0.1)
+                break
+            except queue.Full:
+                if time.time() > fin:
+                    break
+        self._thread.join(max(0.0, fin - time.time()))
+        self._verifier()
+        if self._thread.is_alive():
+            raise RuntimeError(f"Écriture du jeu de données non terminée après {delai:.0f} s")
+        return self.statistiques()
+
+
+class JeuDonnees:
+    """
+Relecture d'un jeu au format numpy : les shards sont projetés en mémoire (np.memmap)
+
+Args:
+    dossier: dossier écrit par ExportateurShards
+    """
+
+    def __init__(self, dossier : str):
+        index = lire_index(dossier)
+        if index is None:
+            raise FileNotFoundError(f"Pas d'index.json dans {dossier}")
+        if index["format"] != "numpy":
+            raise ValueError(f"{dossier} est au format {index['format']} : utiliser dataset_tf")
+        self.dossier = dossier
+        self.forme = tuple(index["forme"])
+        self.classes : List[str] = index["classes"]
+        self.shards = index["shards"]
+        self.debuts = np.cumsum([0] + [s["n"] for s in self.shards])
+        self._images : Dict[int, np.memmap] = {}
+        self.labels = np.concatenate(
+            [np.fromfile(os.path.join(dossier, s["nom"] + ".labels.bin"), dtype=np.int32) for s in self.shards]
+        ) if self.shards else np.empty(0, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return int(self.debuts[-1])
+
+    def images_shard(self, i : int) -> np.memmap:
+        """Images du shard i, projetées en mémoire à la première demande"""
+        images = self._images.get(i)
+        if images is None:
+            images = np.memmap(os.path.join(self.dossier, self.shards[i]["nom"] + ".images.bin"),
+                               dtype=np.uint8, mode="r", shape=(self.shards[i]["n"],) + self.forme)
+            self._images[i] = images
+        return images
+
+    def __getitem__(self, i : int) -> Tuple[np.ndarray, int]:
+        shard = bisect.bisect_right(self.debuts, i) - 1
+        return self.images_shard(shard)[i - self.debuts[shard]], int(self.labels[i])
+
+    def prendre(self, indices : np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Images et labels des indices donnés (lus shard par shard, dans l'ordre du fichier)"""
+        indices = np.asarray(indices)
+        images = np.empty((len(indices),) + self.forme, dtype=np.uint8)
+        shards = np.searchsorted(self.debuts, indices, side="right") - 1
+        for shard in np.unique(shards):
+            positions = np.flatnonzero(shards == shard)
+            locaux = indices[positions] - self.debuts[shard]
+            ordre = np.argsort(locaux)
+            images[positions[ordre]] = self.images_shard(shard)[locaux[ordre]]
+        return images, self.labels[indices]
+
+    def lots(self, taille_lot : int = 32, melanger : bool = True, graine : Optional[int] = None,
+             repeter : bool = False) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+Lots (images uint8, labels) ; utilisable directement avec model.fit de Keras
+
+Args:
+    taille_lot: nombre d'images par lot
+    melanger: ordre aléatoire (nouveau tirage à chaque passe)
+    graine: graine du tirage
+    repeter: enchaîne les passes indéfiniment
+    """
+        rng = np.random.default_rng(graine)
+        while True:
+            ordre = rng.permutation(len(self)) if melanger else np.arange(len(self))
+            for debut in range(0, len(ordre), taille_lot):
+                yield self.prendre(ordre[debut:debut + taille_lot])
+            if not repeter:
+                break
+
+
+def dataset_tf(dossier : str, taille_lot : int = 32, melanger : bool = True, tampon : int = 2048) -> Any:
+    """
+tf.data.Dataset (image uint8, label) d'un jeu au format tfrecord : ordre des shards tiré au
+hasard puis mélange dans un tampon de taille bornée
+    """
+    index = lire_index(dossier)
+    forme = index["forme"]
+    fichiers = [os.path.join(dossier, s["nom"] + ".tfrecord") for s in index["shards"]]
+    description = {"image": tf.io.FixedLenFeature([], tf.string), "label": tf.io.FixedLenFeature([], tf.int64)}
+
+    def decoder(exemple):
+        exemple = tf.io.parse_single_example(exemple, description)
+        return tf.reshape(tf.io.decode_raw(exemple["image"], tf.uint8), forme), exemple["label"]
+
+    dataset = tf.data.Dataset.from_tensor_slices(fichiers)
+    if melanger:
+        dataset = dataset.shuffle(len(fichiers))
+    dataset = dataset.interleave(tf.data.TFRecordDataset, cycle_length=min(4, max(len(fichiers), 1)),
+                                 num_parallel_calls=tf.data.AUTOTUNE)
+    if melanger:
+        dataset = dataset.shuffle(tampon)
+    return dataset.map(decoder, num_parallel_calls=tf.data.AUTOTUNE).batch(taille_lot).prefetch(tf.data.AUTOTUNE)
+
+
+def collecter_camera(session : Any, exportateur : ExportateurShards, label : str, duree : float = 30.0,
+                     frequence : float = 5.0, camera_index : int = 0, resolution : int = 1,
+                     age_max : float = 0.25) -> int:
+    """
+Enregistre les images de la caméra du robot pendant duree secondes
+
+Args:
+    session: la session en cours avec le robot
+    exportateur: destination des images
+    label: étiquette des images collectées
+    frequence: images enregistrées par seconde au plus (des images voisines sont très redondantes)
+
+Returns:
+    le nombre d'images déposées
+    """
+    video_service = session.service("ALVideoDevice")
+    name_id = video_service.subscribeCamera("JeuDonnees", camera_index, resolution, 11, 30)
+    source = SourceImages(video_service, name_id, "jeu_donnees", age_max)
+    deposees = 0
+    try:
+        fin = time.time() + duree
+        while time.time() < fin:
+            debut = time.time()
+            image = source.lire()
+            if image is not None and exportateur.ajouter(image.donnees, label, image.capture):
+                deposees += 1
+            time.sleep(max(0.0, 1.0 / frequence - (time.time() - debut)))
+    finally:
+        video_service.unsubscribe(name_id)
+    return deposees
+
+
+def collecter_video(chemin : str, exportateur : ExportateurShards, label : str, pas : int = 1) -> int:
+    """Enregistre une image sur pas d'un fichier vidéo (images BGR converties en RGB)"""
+    capture = cv2.VideoCapture(chemin)
+    numero = deposees = 0
+    try:
+        while True:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            if numero % pas == 0 and exportateur.ajouter(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB), label):
+                deposees += 1
+            numero += 1
+    finally:
+        capture.release()
+    return deposees
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Collecte d'images étiquetées pour l'entraînement.")
+    parser.add_argument("dossier", help="Dossier du jeu de données (complété s'il existe)")
+    parser.add_argument("--label", required=True, help="Étiquette des images collectées")
+    parser.add_argument("--video", help="Fichier vidéo enregistré au lieu de la caméra du robot")
+    parser.add_argument("--pas", type=int, default=1, help="Avec --video : une image sur pas")
+    parser.add_argument("--ip", type=str, default="127.0.0.1", help="Adresse IP du robot NAO")
+    parser.add_argument("--port", type=int, default=9559, help="Port NAOqi (par défaut: 9559)")
+    parser.add_argument("--duree", type=float, default=30.0, help="Durée de la collecte caméra (s)")
+    parser.add_argument("--frequence", type=float, default=5.0, help="Images enregistrées par seconde")
+    parser.add_argument("--format", choices=sorted(SHARDS), default="numpy", help="Format des shards")
+    parser.add_argument("--taille-shard", type=int, default=1000, help="Images par shard")
+    args = parser.parse_args()
+
+    exportateur = ExportateurShards(args.dossier, args.format, args.taille_shard)
+    if args.video:
+        n = collecter_video(args.video, exportateur, args.label, args.pas)
+    else:
+        import qi
+        session = qi.Session()
+        try:
+            session.connect(f"tcp://{args.ip}:{args.port}")
+        except RuntimeError:
+            print(f"Impossible de se connecter à NAOqi à l'adresse {args.ip}:{args.port}.")
+            sys.exit(1)
+        n = collecter_camera(session, exportateur, args.label, args.duree, args.frequence)
+    statistiques = exportateur.fermer()
+    print(f"✓ {n} images « {args.label} » collectées ; {args.dossier} : {statistiques['ecrites']} images "
+          f"en {statistiques['shards']} shards, {statistiques['perdues']} perdues")
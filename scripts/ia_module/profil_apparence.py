@@ -0,0 +1,167 @@
+"""
+Module d'identification d'une personne par son apparence.
+
+Chaque région détectée est résumée par un histogramme 2D teinte/saturation (HS).
+Les profils de chaque personne sont mis à jour incrémentalement d'image en image et
+une observation est comparée à tous les profils en une seule opération vectorisée
+(coefficient de Bhattacharyya), quel que soit le nombre de personnes connues.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from ..utils.lazy_import import lazy_import
+
+cv2 = lazy_import("cv2")
+
+# Nombre de classes de l'histogramme : teinte (0-180) et saturation (0-256)
+BINS_TEINTE = 30
+BINS_SATURATION = 32
+
+
+def histogrammeHS(frame : np.ndarray, region : Optional[Tuple[int, int, int, int]] = None,
+                  mask : Optional[np.ndarray] = None,
+                  bins : Tuple[int, int] = (BINS_TEINTE, BINS_SATURATION)) -> np.ndarray:
+    """
+Calcule l'histogramme teinte/saturation normalisé d'une image BGR
+
+Args:
+    frame: image BGR (format OpenCV)
+    region: rectangle (x, y, largeur, hauteur) à analyser, toute l'image si None
+    mask: masque optionnel (uint8) de la même taille que la région
+    bins: nombre de classes (teinte, saturation)
+
+Returns:
+    vecteur float32 de taille bins[0] * bins[1], de somme 1 (ou nul si la région est vide)
+    """
+    if region is not None:
+        x, y, w, h = region
+        frame = frame[y:y + h, x:x + w]
+    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+    hist = cv2.calcHist([hsv], [0, 1], mask, list(bins), [0, 180, 0, 256])
+    hist = hist.ravel().astype(np.float32)
+    total = hist.sum()
+    if total > 0:
+        hist /= total
+    return hist
+
+
+class ProfilsApparence:
+    """
+Ensemble des profils d'apparence des personnes connues.
+
+Les profils sont stockés dans une seule matrice (une ligne par personne) afin que
+l'identification se fasse en un seul produit matriciel.
+
+Args:
+    taille: taille des histogrammes (BINS_TEINTE * BINS_SATURATION par défaut)
+    alpha: si donné, moyenne glissante exponentielle de facteur alpha,
+           sinon moyenne cumulée de toutes les observations
+    """
+
+    def __init__(self, taille : int = BINS_TEINTE * BINS_SATURATION, alpha : Optional[float] = None):
+        self.taille = taille
+        self.alpha = alpha
+        self.noms : List[str] = []
+        self._index : Dict[str, int] = {}
+        self._profils = np.zeros((0, taille), dtype=np.float32)
+        self._racines = np.zeros((0, taille), dtype=np.float32)  # sqrt des profils, pour Bhattacharyya
+        self._observations = np.zeros(0, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.noms)
+
+    def __contains__(self, nom : str) -> bool:
+        return nom in self._index
+
+    def profil(self, nom : str) -> np.ndarray:
+        """Retourne (une copie de) l'histogramme moyen de la personne nom"""
+        return self._profils[self._index[nom]].copy()
+
+    def ajouter(self, nom : str, hist : np.ndarray) -> None:
+        """
+Ajoute une observation au profil de la personne nom (créé s'il n'existe pas)
+
+Args:
+    nom: identifiant de la personne
+    hist: histogramme retourné par histogrammeHS
+    """
+        hist = np.asarray(hist, dtype=np.float32).ravel()
+        if hist.size != self.taille:
+            raise ValueError(f"Histogramme de taille {hist.size}, attendu {self.taille}")
+
+        i = self._index.get(nom)
+        if i is None:
+            self._index[nom] = len(self.noms)
+            self.noms.append(nom)
+            self._profils = np.vstack([self._profils, hist[None, :]])
+            self._racines = np.vstack([self._racines, np.sqrt(hist)[None, :]])
+            self._observations = np.append(self._observations, 1)
+            return
+
+        # Mise à jour incrémentale sur place de la seule ligne concernée
+        self._observations[i] += 1
+        poids = self.alpha if self.alpha is not None else 1.0 / self._observations[i]
+        ligne = self._profils[i]
+        ligne += poids * (hist - ligne)
+        np.sqrt(ligne, out=self._racines[i])
+
+    def retirer(self, nom : str) -> None:
+        """Supprime le profil de la personne nom"""
+        i = self._index.pop(nom)
+        del self.noms[i]
+        self._profils = np.delete(self._profils, i, axis=0)
+        self._racines = np.delete(self._racines, i, axis=0)
+        self._observations = np.delete(self._observations, i)
+        self._index = {n: j for j, n in enumerate(self.noms)}
+
+    def similarites(self, hist : np.ndarray) -> np.ndarray:
+        """
+Compare une observation à tous les profils en une seule opération
+
+Args:
+    hist: histogramme retourné par histogrammeHS
+
+Returns:
+    coefficients de Bhattacharyya (1 = identique, 0 = disjoint), un par personne
+    """
+        racine = np.sqrt(np.asarray(hist, dtype=np.float32).ravel())
+        return self._racines @ racine
+
+    def identifier(self, hist : np.ndarray, seuil : float = 0.6) -> Optional[Tuple[str, float]]:
+        """
+Retourne la personne la plus ressemblante à l'observation
+
+Args:
+    hist: histogramme retourné par histogrammeHS
+    seuil: similarité minimale pour accepter une correspondance
+
+Returns:
+    (nom, similarité) ou None si aucun profil ne dépasse le seuil
+    """
+        if not self.noms:
+            return None
+        scores = self.similarites(hist)
+        i = int(np.argmax(scores))
+        if scores[i] < seuil:
+            return None
+        return self.noms[i], float(scores[i])
+
+    def sauvegarder(self, chemin : str) -> None:
+        """Enregistre les profils dans un fichier .npz"""
+        np.savez(chemin, noms=np.array(self.noms), profils=self._profils,
+                 observations=self._observations)
+
+    @classmethod
+    def charger(cls, chemin : str, alpha : Optional[float] = None) -> "ProfilsApparence":
+        """Recharge des profils enregistrés avec sauvegarder"""
+        donnees = np.load(chemin)
+        profils = cls(donnees["profils"].shape[1], alpha)
+        profils.noms = [str(n) for n in donnees["noms"]]
+        profils._index = {n: i for i, n in enumerate(profils.noms)}
+        profils._profils = donnees["profils"].astype(np.float32)
+        profils._racines = np.sqrt(profils._profils)
+        profils._observations = donnees["observations"].astype(np.int64)
+        return profils
+
+if __name__ == '__main__' : pass
@@ -1,5 +1,7 @@
-import cv2
 import numpy as np
+from ..utils.lazy_import import lazy_import
+
+cv2 = lazy_import("cv2")
 
 # tab = [teinte, saturation, luminosité]
 
@@ -7,7 +9,8 @@ import numpy as np
 # Test de la caméra avec opencv pour la detection de couleur 
 
 # Ouvrir la webcam (0 = webcam par défaut, 1 = autre caméra si branchée)
-def detectionRouge(frame) : 
+def masqueRouge(frame) :
+    """Masque (0/255) des pixels rouges d'une image BGR"""
     hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
 
     # 1er intervalle : rouge de 0 à 10
@@ -22,11 +25,30 @@ def detectionRouge(frame) :
     mask2 = cv2.inRange(hsv, lower_red2, upper_red2)
 
     # Fusion des deux masques
-    mask = mask1 | mask2
+    return mask1 | mask2
+
+
+def detectionRouge(frame) : 
+    mask = masqueRouge(frame)
     
     result_webcam = cv2.bitwise_and(frame,frame,mask=mask)
 
     return result_webcam
 
 
+def centroide(mask, seuil_pixels=200) :
+    """
+    Centre de la zone détectée dans un masque, en coordonnées normalisées
+    (-1 à gauche / en haut, +1 à droite / en bas).
+    Retourne (x, y, nombre de pixels), ou None sous seuil_pixels.
+    """
+    moments = cv2.moments(mask, binaryImage=True)
+    if moments["m00"] < seuil_pixels:
+        return None
+    hauteur, largeur = mask.shape[:2]
+    x = moments["m10"] / moments["m00"] / largeur * 2.0 - 1.0
+    y = moments["m01"] / moments["m00"] / hauteur * 2.0 - 1.0
+    return x, y, int(moments["m00"])
+
+
 
@@ -1,5 +1,16 @@
 import numpy as np
 import time
+from ..utils import metriques, telemetrie
+from .calibration_marche import CalibrationMarche
+from .grille_occupation import GrilleOccupation
+
+# Marche prudente : vitesse réduite sous DISTANCE_RALENTIR, arrêt sous DISTANCE_ARRET (m)
+DISTANCE_RALENTIR = 0.8
+DISTANCE_ARRET = 0.35
+PERIODE_CONTROLE = 0.1  # s, cadence des sonars
+
+MISE_A_JOUR_GRILLE = metriques.histogramme("grille_mise_a_jour_secondes",
+                                           "Durée d'une mise à jour de la grille d'occupation")
 
 class RobotMovement:
     def __init__(self):
@@ -90,6 +101,8 @@ class RobotMovement:
         """
         # Récupération de la position initiale réelle du robot
         robot_pos = self.motion.getRobotPosition(True)  # [x, y, theta]
+        odometrie = telemetrie.canal("odometrie", ("x", "y", "theta"))
+        odometrie.ajouter(*robot_pos)
         init_position = self.Pose2D(robot_pos[0], robot_pos[1], robot_pos[2])
 
         # Récupération des paramètres de déplacement
@@ -111,6 +124,7 @@ class RobotMovement:
 
         # Lecture de la position finale réelle
         robot_pos_end = self.motion.getRobotPosition(False)
+        odometrie.ajouter(*robot_pos_end)
         real_end_position = self.Pose2D(robot_pos_end[0], robot_pos_end[1], robot_pos_end[2])
 
         # Calcul de l'erreur entre attendu et réel
@@ -140,36 +154,78 @@ class RobotMovement:
         print(f"Arrêt avant arrivée, erreur: {error_vector}")
 
 
-def marcheRobot(session):
+def vitesse_prudente(vitesse, distance_libre):
+    """
+    Vitesse d'avance autorisée selon la distance libre devant le robot :
+    pleine vitesse au-delà de DISTANCE_RALENTIR, nulle sous DISTANCE_ARRET.
+    """
+    facteur = (distance_libre - DISTANCE_ARRET) / (DISTANCE_RALENTIR - DISTANCE_ARRET)
+    return vitesse * min(max(facteur, 0.0), 1.0)
+
+
+def marcheRobot(session, vitesse=0.5, duree=5.0):
     """
     Fonction principale qui initialise les services,
     active la posture initiale, puis effectue un déplacement.
+    La marche consulte la grille d'occupation (sonars + odométrie)
+    à chaque pas de contrôle pour ralentir ou s'arrêter devant un obstacle.
+    La commande est corrigée de la dérive estimée (calibration_marche),
+    estimation affinée au passage avec l'odométrie de cette marche.
     """
 
     # Initialisation des services
     motion_service = session.service("ALMotion")
     posture_service = session.service("ALRobotPosture")
+    memory_service = session.service("ALMemory")
+    sonar_service = session.service("ALSonar")
     # video_service = session.service("ALVideoDevice")  # Décommenter si besoin vidéo
 
     # Réveil et position initiale debout
     motion_service.wakeUp()
     posture_service.goToPosture("StandInit", 1.0)
+    sonar_service.subscribe("marcheRobot")
+
+    grille = GrilleOccupation()
+    calibration = CalibrationMarche.pour(session)
+    odometrie = telemetrie.canal("odometrie", ("x", "y", "theta"))
+    canal_marche = telemetrie.canal("marche", ("distance_libre", "vitesse"))
 
     print("Robot prêt. Appuyez sur Ctrl+C pour arrêter.")
     try:
-        while True:
-            # Exemple simple : déplacement vers l'avant avec moveToward
-            motion_service.moveToward(0.5, 0.0, 0.0, [["Frequency", 1.0]])
-            time.sleep(5)  # Déplacement pendant 5 secondes
-            motion_service.stopMove()
-
-            time.sleep(2)  # Pause entre les commandes
-            
-            # Pour test, on boucle une seule fois
-            break
+        fin = time.time() + duree
+        commande = None
+        while time.time() < fin:
+            debut = time.perf_counter()
+            with MISE_A_JOUR_GRILLE.mesurer():
+                grille.mettre_a_jour_robot(motion_service, memory_service)
+            odometrie.ajouter(*grille.pose)
+            if commande is not None:
+                calibration.observer(commande, grille.pose)
+            libre = grille.distance_libre()
+            v = vitesse_prudente(vitesse, libre)
+            canal_marche.ajouter(libre, v)
+
+            if v < 0.01:
+                motion_service.stopMove()
+                calibration.arret()
+                print(f"Obstacle à {libre:.2f} m : arrêt.")
+                break
+            if commande is None or abs(v - commande[0]) > 0.05:
+                # moveToward n'est renvoyé que si la vitesse change vraiment
+                commande = calibration.commande(v)
+                motion_service.moveToward(*commande, [["Frequency", 1.0]])
+            time.sleep(max(0.0, PERIODE_CONTROLE - (time.perf_counter() - debut)))
+
+        motion_service.stopMove()
+        time.sleep(2)  # Pause entre les commandes
 
     except KeyboardInterrupt:
+        motion_service.stopMove()
         print("Arrêt par l'utilisateur.")
+    finally:
+        sonar_service.unsubscribe("marcheRobot")
+        calibration.arret()
+        calibration.sauvegarder()
 
     # Nettoyage et mise en repos
     # video_service.unsubscribe(name_id)  # Décommenter si utilisation caméra
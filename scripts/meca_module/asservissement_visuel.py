@@ -0,0 +1,279 @@
+"""
+Asservissement visuel : la tête (et éventuellement le corps) suit une cible de couleur.
+
+À cadence fixe, la boucle prend une image, calcule le centre de la cible (rouge ou une couleur
+de couleurs.csv), en déduit la direction absolue de la cible (angles de la tête au moment de
+la capture + décalage dans l'image) et envoie une consigne HeadYaw/HeadPitch non bloquante.
+
+Compensation de latence : l'image est datée par ALVideoDevice ; les angles de la tête sont
+interpolés à cet instant dans l'historique des mesures (et non lus après le traitement, quand
+la tête a déjà bougé), puis la vitesse de la cible estimée par un filtre alpha-bêta sert à
+viser où elle sera quand la consigne prendra effet. Quand la tête approche de sa butée, le
+corps tourne (moveToward) pour la ramener au centre ; la cible est alors suivie dans le repère
+du monde (orientation odométrique du corps + lacet de la tête), et la rotation du corps est
+retirée de la consigne de la tête pour que les deux corrections ne s'additionnent pas.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+import numpy as np
+from ..ia_module.carte_couleurs import FICHIER_COULEURS, charger_couleurs, masque
+from ..ia_module.traitement_image import centroide, masqueRouge
+from ..utils import apercu, metriques, telemetrie
+from ..utils.horodatage_images import HorlogeRobot
+from ..utils.lazy_import import lazy_import
+from .gestes import LIMITES_ARTICULATIONS
+
+cv2 = lazy_import("cv2")
+
+ARTICULATIONS_TETE = ["HeadYaw", "HeadPitch"]
+# Champ de vision de la caméra du NAO V6 (rad)
+DEMI_CHAMP_H = math.radians(60.97) / 2
+DEMI_CHAMP_V = math.radians(47.64) / 2
+
+ERREUR = metriques.histogramme("asservissement_erreur_radians", "Écart angulaire entre la cible et l'axe de la caméra",
+                               bornes=(0.01, 0.02, 0.05, 0.1, 0.2, 0.3, 0.5))
+LATENCE = metriques.histogramme("asservissement_latence_secondes",
+                                "Délai capture -> consigne, au-delà du plus petit délai observé")
+PERDUE = metriques.compteur("asservissement_cible_perdue_total", "Images sans cible pendant le suivi")
+
+# Une fonction de ciblage reçoit une image BGR et retourne (x, y, pixels) normalisés, ou None
+Ciblage = Callable[[np.ndarray], Optional[Tuple[float, float, int]]]
+
+
+def cibleRouge(seuil_pixels : int = 200) -> Ciblage:
+    """Ciblage du rouge (traitement_image.masqueRouge)"""
+    return lambda frame: centroide(masqueRouge(frame), seuil_pixels)
+
+
+def cibleCouleur(nom : str, seuil_pixels : int = 200, chemin : str = FICHIER_COULEURS) -> Ciblage:
+    """Ciblage d'une couleur décrite dans couleurs.csv (toutes les plages portant ce nom)"""
+    couleurs = charger_couleurs(chemin)
+    if nom not in couleurs:
+        raise KeyError(f"Couleur inconnue dans {chemin} : {nom}")
+    plages = couleurs[nom]
+
+    def cibler(frame : np.ndarray) -> Optional[Tuple[float, float, int]]:
+        return centroide(masque(cv2.cvtColor(frame, cv2.COLOR_BGR2HSV), plages), seuil_pixels)
+
+    return cibler
+
+
+def decalage_angulaire(x : float, y : float) -> Tuple[float, float]:
+    """Position normalisée dans l'image -> (Δyaw, Δpitch) en rad (yaw positif à gauche, pitch positif en bas)"""
+    return -math.atan(x * math.tan(DEMI_CHAMP_H)), math.atan(y * math.tan(DEMI_CHAMP_V))
+
+
+class FiltreAlphaBeta:
+    """
+Estimation de la position et de la vitesse angulaires de la cible
+
+Args:
+    alpha: gain sur la position
+    beta: gain sur la vitesse
+    """
+
+    def __init__(self, alpha : float = 0.6, beta : float = 0.2):
+        self.alpha = alpha
+        self.beta = beta
+        self.position : Optional[np.ndarray] = None
+        self.vitesse = np.zeros(2)
+        self.instant = 0.0
+
+    def mettre_a_jour(self, mesure : np.ndarray, instant : float) -> None:
+        if self.position is None:
+            self.position, self.instant = mesure, instant
+            return
+        dt = instant - self.instant
+        if dt <= 0:
+            return
+        prediction = self.position + self.vitesse * dt
+        residu = mesure - prediction
+        self.position = prediction + self.alpha * residu
+        self.vitesse = self.vitesse + self.beta * residu / dt
+        self.instant = instant
+
+    def predire(self, instant : float) -> np.ndarray:
+        return self.position + self.vitesse * (instant - self.instant)
+
+    def reinitialiser(self) -> None:
+        self.position = None
+        self.vitesse = np.zeros(2)
+
+
+class HistoriqueTete:
+    """Angles de la tête mesurés récemment, pour retrouver leur valeur à l'instant d'une capture"""
+
+    def __init__(self, taille : int = 64):
+        self.mesures : Deque[Tuple[float, float, float]] = deque(maxlen=taille)
+
+    def ajouter(self, instant : float, yaw : float, pitch : float) -> None:
+        self.mesures.append((instant, yaw, pitch))
+
+    def a_l_instant(self, instant : float) -> Tuple[float, float]:
+        t, yaw, pitch = np.array(self.mesures).T
+        return float(np.interp(instant, t, yaw)), float(np.interp(instant, t, pitch))
+
+
+class HistoriqueCorps:
+    """Orientations odométriques récentes du corps (getRobotPosition), extrapolées au-delà de la dernière"""
+
+    def __init__(self, taille : int = 64):
+        self.mesures : Deque[Tuple[float, float]] = deque(maxlen=taille)
+
+    def ajouter(self, instant : float, theta : float) -> None:
+        self.mesures.append((instant, theta))
+
+    def a_l_instant(self, instant : float) -> float:
+        t, theta = np.array(self.mesures).T
+        theta = np.unwrap(theta)  # continu malgré le passage de ±pi
+        if instant > t[-1] and len(t) > 1 and t[-1] > t[-2]:
+            return float(theta[-1] + (theta[-1] - theta[-2]) / (t[-1] - t[-2]) * (instant - t[-1]))
+        return float(np.interp(instant, t, theta))
+
+
+def suiviVisuel(session : Any, ciblage : Optional[Ciblage] = None, duree : float = 20.0,
+                frequence : float = 20.0, vitesse : float = 0.3, anticipation : float = 0.08,
+                corps : bool = False, seuil_corps : float = 0.6, gain_corps : float = 0.8,
+                camera_index : int = 0, resolution : int = 1, afficher : bool = False,
+                annulee : Optional[threading.Event] = None) -> Dict[str, float]:
+    """
+Garde la cible au centre de l'image en pilotant HeadYaw/HeadPitch
+
+Args:
+    session: la session en cours avec le robot
+    ciblage: fonction image BGR -> centre normalisé de la cible (rouge par défaut)
+    duree: durée du suivi (s)
+    frequence: cadence de la boucle (Hz)
+    vitesse: fraction de la vitesse maximale des moteurs de la tête
+    anticipation: temps (s) entre l'envoi de la consigne et son effet, ajouté à l'âge de l'image
+    corps: si vrai, le robot tourne sur place quand la tête dépasse seuil_corps en lacet
+    seuil_corps: lacet de la tête (rad) au-delà duquel le corps tourne
+    gain_corps: vitesse de rotation du corps (rad/s) par radian de lacet de la tête
+    camera_index: 0 = caméra du haut, 1 = caméra du bas
+    resolution: résolution ALVideoDevice (1 = 320x240 suffit et coûte peu)
+    afficher: affiche l'image avec la cible (plus lent)
+    annulee: événement d'annulation (ordonnanceur) : le suivi s'arrête au tour suivant
+
+Returns:
+    statistiques du suivi : erreur moyenne, p95 et max (rad), latence moyenne (s), part des images avec cible
+    """
+    motion = session.service("ALMotion")
+    video_service = session.service("ALVideoDevice")
+    ciblage = ciblage or cibleRouge()
+    periode = 1.0 / frequence
+    yaw_min, yaw_max, _ = LIMITES_ARTICULATIONS["HeadYaw"]
+    pitch_min, pitch_max, _ = LIMITES_ARTICULATIONS["HeadPitch"]
+
+    motion.setStiffnesses("Head", 1.0)
+    if corps:
+        motion.moveInit()
+    name_id = video_service.subscribeCamera("SuiviVisuel", camera_index, resolution, 11, 30)
+    canal = telemetrie.canal("asservissement", ("erreur_yaw", "erreur_pitch", "latence", "cible_yaw", "cible_pitch"))
+
+    historique = HistoriqueTete()
+    orientation = HistoriqueCorps()
+    filtre = FiltreAlphaBeta()
+    horloge = HorlogeRobot()  # les horloges du robot et du PC ne sont pas synchronisées
+    rotation = 0.0
+    erreurs, latences = [], []
+    images = avec_cible = 0
+
+    try:
+        fin = time.time() + duree
+        while time.time() < fin and not (annulee is not None and annulee.is_set()):
+            debut = time.time()
+            image = video_service.getImageRemote(name_id)
+            yaw, pitch = motion.getAngles(ARTICULATIONS_TETE, True)
+            historique.ajouter(time.time(), yaw, pitch)
+            if corps:
+                orientation.ajouter(time.time(), motion.getRobotPosition(True)[2])
+            if image is None:
+                time.sleep(max(0.0, periode - (time.time() - debut)))
+                continue
+            images += 1
+
+            # Instant de capture ramené à l'horloge locale
+            horodatage = image[4] + image[5] * 1e-6
+            horloge.observer(horodatage, time.time())
+            capture = horloge.locale(horodatage)
+
+            width, height = image[0], image[1]
+            frame = cv2.cvtColor(np.frombuffer(image[6], dtype=np.uint8).reshape((height, width, 3)),
+                                 cv2.COLOR_RGB2BGR)
+            cible = ciblage(frame)
+
+            if cible is None:
+                PERDUE.inc()
+                filtre.reinitialiser()
+                if corps and rotation != 0.0:
+                    motion.moveToward(0.0, 0.0, 0.0)
+                    rotation = 0.0
+            else:
+                avec_cible += 1
+                d_yaw, d_pitch = decalage_angulaire(cible[0], cible[1])
+                yaw_capture, pitch_capture = historique.a_l_instant(capture)
+                # Avec le corps : direction dans le repère du monde (le corps tourne aussi)
+                theta_capture = orientation.a_l_instant(capture) if corps else 0.0
+                filtre.mettre_a_jour(np.array([theta_capture + yaw_capture + d_yaw, pitch_capture + d_pitch]),
+                                     capture)
+
+                # Vise où sera la cible quand la consigne aura pris effet, moins la rotation du corps d'ici là
+                effet = time.time() + anticipation
+                consigne_yaw, consigne_pitch = filtre.predire(effet)
+                if corps:
+                    consigne_yaw -= orientation.a_l_instant(effet)
+                consigne_yaw = min(max(consigne_yaw, yaw_min), yaw_max)
+                consigne_pitch = min(max(consigne_pitch, pitch_min), pitch_max)
+                motion.setAngles(ARTICULATIONS_TETE, [consigne_yaw, consigne_pitch], vitesse)  # non bloquant
+
+                latence = time.time() - capture
+                erreur = math.hypot(d_yaw, d_pitch)
+                erreurs.append(erreur)
+                latences.append(latence)
+                ERREUR.observer(erreur)
+                LATENCE.observer(latence)
+                canal.ajouter(d_yaw, d_pitch, latence, consigne_yaw, consigne_pitch)
+
+                if corps:
+                    # Le corps tourne dans le sens de la tête pour la ramener vers le centre
+                    voulue = gain_corps * consigne_yaw if abs(consigne_yaw) > seuil_corps else 0.0
+                    voulue = min(max(voulue, -1.0), 1.0)
+                    if abs(voulue - rotation) > 0.1:
+                        motion.moveToward(0.0, 0.0, voulue)
+                        rotation = voulue
+
+            if afficher:
+                if cible is not None:
+                    centre = (int((cible[0] + 1) * width / 2), int((cible[1] + 1) * height / 2))
+                    cv2.circle(frame, centre, 8, (0, 255, 0), 2)
+                if apercu.afficher("Suivi visuel", frame) & 0xFF == ord('q'):
+                    break
+
+            time.sleep(max(0.0, periode - (time.time() - debut)))
+    finally:
+        video_service.unsubscribe(name_id)
+        if corps:
+            motion.stopMove()
+        if afficher:
+            apercu.fermer()
+
+    statistiques = {
+        "images": images,
+        "part_avec_cible": avec_cible / images if images else 0.0,
+        "erreur_moyenne": float(np.mean(erreurs)) if erreurs else float("nan"),
+        "erreur_p95": float(np.percentile(erreurs, 95)) if erreurs else float("nan"),
+        "erreur_max": float(np.max(erreurs)) if erreurs else float("nan"),
+        "latence_moyenne": float(np.mean(latences)) if latences else float("nan"),
+    }
+    print(f"✓ Suivi terminé : cible vue sur {statistiques['part_avec_cible'] * 100:.0f}% des {images} images, "
+          f"erreur moyenne {math.degrees(statistiques['erreur_moyenne']):.1f}°, "
+          f"p95 {math.degrees(statistiques['erreur_p95']):.1f}°, "
+          f"latence {statistiques['latence_moyenne'] * 1000:.0f} ms")
+    return statistiques
+
+if __name__ == '__main__' : pass
@@ -0,0 +1,174 @@
+"""
+Cache de synthèse vocale pour les phrases fixes.
+
+Les phrases connues (réponses de voice_recognition, "Intrus trouvé!", ...) sont rendues une
+seule fois en fichiers audio sur le robot avec ALTextToSpeech.sayToFile, indexées par le texte,
+la langue et les paramètres de voix. Elles sont ensuite jouées de façon asynchrone par
+ALAudioPlayer ; seul un texte jamais vu passe par la synthèse en direct.
+
+Les fichiers sont écrits dans un dossier qui existe toujours sur le robot (/home/nao, préfixe
+parole_) : sayToFile ne crée pas de dossier. Une phrase dont le rendu échoue est signalée et
+reste en synthèse en direct, sans empêcher le rendu des autres.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, Iterable, Optional
+
+DOSSIER_ROBOT = "/home/nao"
+DOSSIER_LOCAL = os.path.join(os.path.expanduser("~"), ".cache", "nao-s501")
+
+
+class CacheParole:
+    """
+Cache de phrases pré-rendues pour un robot
+
+Args:
+    session: la session en cours avec le robot
+    dossier: dossier du robot où sont écrits les fichiers audio
+    index: fichier JSON local mémorisant les phrases déjà rendues (None = pas de persistance)
+    """
+
+    _instances : Dict[int, "CacheParole"] = {}
+
+    def __init__(self, session : Any, dossier : str = DOSSIER_ROBOT, index : Optional[str] = None):
+        self.tts = session.service("ALTextToSpeech")
+        self.audio = session.service("ALAudioPlayer")
+        self.dossier = dossier
+        self.index = index
+        self._verrou = threading.Lock()
+        self._fichiers : Dict[str, str] = {}
+        self.succes = 0
+        self.echecs = 0
+        self.actualiser_parametres()
+        self._charger_index()
+
+    @classmethod
+    def pour(cls, session : Any) -> "CacheParole":
+        """Retourne le cache associé à la session (créé au premier appel)"""
+        cache = cls._instances.get(id(session))
+        if cache is None:
+            try:
+                robot = session.service("ALSystem").robotName()
+            except Exception:
+                robot = "nao"
+            cache = cls(session, index=os.path.join(DOSSIER_LOCAL, f"parole_{robot}.json"))
+            cls._instances[id(session)] = cache
+        return cache
+
+    def actualiser_parametres(self) -> None:
+        """Relit la langue et les paramètres de voix (à appeler après les avoir modifiés)"""
+        self._parametres = "|".join(str(p) for p in (
+            self.tts.getLanguage(),
+            self.tts.getVoice(),
+            self.tts.getParameter("speed"),
+            self.tts.getParameter("pitchShift"),
+        ))
+
+    def cle(self, texte : str) -> str:
+        """Identifiant d'une phrase pour la voix courante"""
+        return hashlib.sha1(f"{texte}|{self._parametres}".encode("utf-8")).hexdigest()
+
+    def _charger_index(self) -> None:
+        if self.index is None or not os.path.exists(self.index):
+            return
+        try:
+            with open(self.index, "r") as f:
+                self._fichiers = json.load(f)
+        except Exception as e:
+            print(f"Index du cache de parole illisible ({e}), il sera reconstruit")
+
+    def _sauver_index(self) -> None:
+        if self.index is None:
+            return
+        os.makedirs(os.path.dirname(self.index), exist_ok=True)
+        with open(self.index, "w") as f:
+            json.dump(self._fichiers, f)
+
+    def contient(self, texte : str) -> bool:
+        """Vrai si texte est déjà rendu en fichier audio pour la voix courante"""
+        return self.cle(texte) in self._fichiers
+
+    def precharger(self, textes : Iterable[str]) -> int:
+        """
+Rend en fichiers audio toutes les phrases pas encore en cache (bloquant) ; une phrase
+dont le rendu échoue reste en synthèse en direct
+
+Returns:
+    le nombre de phrases rendues
+    """
+        rendues = 0
+        for texte in textes:
+            cle = self.cle(texte)
+            if cle in self._fichiers:
+                continue
+            chemin = f"{self.dossier}/parole_{cle}.wav"
+            try:
+                self.tts.sayToFile(texte, chemin)
+            except Exception as e:
+                print(f"✗ Phrase non mise en cache (synthèse en direct) \"{texte}\": {e}")
+                continue
+            with self._verrou:
+                self._fichiers[cle] = chemin
+            rendues += 1
+        if rendues:
+            with self._verrou:
+                self._sauver_index()
+        return rendues
+
+    def precharger_en_fond(self, textes : Iterable[str]) -> threading.Thread:
+        """Comme precharger, dans un thread pour ne pas retarder le démarrage"""
+        thread = threading.Thread(target=self.precharger, args=(list(textes),), daemon=True)
+        thread.start()
+        return thread
+
+    def dire(self, texte : str) -> Any:
+        """
+Prononce texte sans bloquer
+
+Returns:
+    un qi.Future terminé quand le robot a fini de parler, y compris quand la lecture du
+    fichier échoue et que la synthèse en direct prend le relais
+    """
+        chemin = self._fichiers.get(self.cle(texte))
+        if chemin is None:
+            self.echecs += 1
+            return self.tts.say(texte, _async=True)
+
+        import qi
+        self.succes += 1
+        en_cours = [self.audio.playFile(chemin, _async=True)]
+        promesse = qi.Promise(lambda p: en_cours[-1].cancel())
+
+        def transmettre(f):
+            if f.isCanceled():
+                promesse.setCanceled()
+            elif f.hasError():
+                promesse.setError(f.error())
+            else:
+                promesse.setValue(None)
+
+        def verifier(f):
+            # Fichier supprimé du robot : on l'oublie et on parle en direct
+            if f.hasError():
+                with self._verrou:
+                    self._fichiers.pop(self.cle(texte), None)
+                if promesse.future().isCancelRequested():
+                    promesse.setCanceled()
+                    return
+                en_cours.append(self.tts.say(texte, _async=True))
+                en_cours[-1].addCallback(transmettre)
+            else:
+                transmettre(f)
+
+        en_cours[0].addCallback(verifier)
+        return promesse.future()
+
+    def arreter(self) -> None:
+        """Interrompt toute parole en cours (fichier ou synthèse)"""
+        self.audio.stopAll()
+        self.tts.stopAll()
+
+if __name__ == '__main__' : pass
@@ -0,0 +1,238 @@
+"""
+Calibration de la marche estimée en continu et conservée d'une exécution à l'autre.
+
+Pendant la marche normale, chaque intervalle où la commande moveToward est restée constante
+donne un échantillon (commande normalisée, vitesse mesurée par l'odométrie getRobotPosition).
+Des estimateurs des moindres carrés récursifs (avec facteur d'oubli) en déduisent :
+
+    vitesse d'avance mesurée  = forward_speed * commande_x
+    vitesse de rotation (°/s) = turn_speed * commande_theta + dérive * commande_x
+
+turn_speed et la dérive sont estimés séparément : turn_speed uniquement sur les échantillons
+où la commande de rotation est franche (la marche droite ne la renseigne pas), la dérive sur
+ceux où le robot avance. Sans excitation, l'oubli ferait croître P sans limite (et diverger
+l'estimation au premier échantillon bruité) : la trace de P est donc plafonnée.
+
+rotation_compensation = -dérive / turn_speed est la commande de rotation à ajouter par unité
+de commande d'avance pour marcher droit. Les paramètres (et la confiance associée) sont
+enregistrés par robot dans ~/.cache/nao-s501/calibration_<robot>.json et rechargés
+instantanément au démarrage : plus besoin de phase de calibration.
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DOSSIER_LOCAL = os.path.join(os.path.expanduser("~"), ".cache", "nao-s501")
+
+
+class MoindresCarresRecursifs:
+    """
+Estimation en ligne de y = theta . phi
+
+Args:
+    n: nombre de paramètres
+    oubli: facteur d'oubli (1 = aucun ; 0.99 suit les changements lents : usure, sol, batterie)
+    p0: variance initiale des paramètres (grande = peu de confiance dans theta0)
+    theta0: paramètres initiaux
+    trace_max: plafond de la trace de P, au-delà duquel l'oubli est suspendu (défaut : n * p0)
+    """
+
+    def __init__(self, n : int, oubli : float = 0.995, p0 : float = 100.0,
+                 theta0 : Optional[Sequence[float]] = None, trace_max : Optional[float] = None):
+        self.oubli = oubli
+        self.p0 = p0
+        self.trace_max = n * p0 if trace_max is None else trace_max
+        self.theta = np.zeros(n) if theta0 is None else np.array(theta0, dtype=float)
+        self.P = np.eye(n) * p0
+        self.echantillons = 0
+
+    def mettre_a_jour(self, phi : Sequence[float], y : float) -> float:
+        """Intègre un échantillon et retourne l'erreur de prédiction a priori"""
+        phi = np.asarray(phi, dtype=float)
+        erreur = y - self.theta @ phi
+        Pphi = self.P @ phi
+        gain = Pphi / (self.oubli + phi @ Pphi)
+        self.theta = self.theta + gain * erreur
+        self.P = self.P - np.outer(gain, Pphi)
+        # Anti-emballement : l'oubli n'augmente pas P au-delà du plafond
+        if np.trace(self.P) / self.oubli <= self.trace_max:
+            self.P /= self.oubli
+        self.echantillons += 1
+        return float(erreur)
+
+    def etat(self) -> Dict[str, Any]:
+        return {"theta": self.theta.tolist(), "P": self.P.tolist(), "echantillons": self.echantillons}
+
+    def restaurer(self, etat : Dict[str, Any]) -> None:
+        self.theta = np.array(etat["theta"], dtype=float)
+        self.P = np.array(etat["P"], dtype=float)
+        self.echantillons = int(etat.get("echantillons", 0))
+
+
+def identifiant_robot(session : Any) -> str:
+    """Nom du robot, ou numéro de série du corps, ou "nao" """
+    try:
+        return str(session.service("ALSystem").robotName())
+    except Exception:
+        pass
+    try:
+        return str(session.service("ALMemory").getData("Device/DeviceList/ChestBoard/BodyId"))
+    except Exception:
+        return "nao"
+
+
+class CalibrationMarche:
+    """
+Paramètres de marche d'un robot, affinés à chaque déplacement
+
+Args:
+    fichier: fichier JSON de sauvegarde (None = pas de persistance)
+    duree_min: durée minimale (s) d'un échantillon
+    stabilisation: temps (s) ignoré après un changement de commande (accélération)
+    sauvegarde: nombre de nouveaux échantillons entre deux sauvegardes automatiques
+    rotation_min: commande de rotation (normalisée) à partir de laquelle turn_speed est mis à jour
+    """
+
+    _instances : Dict[int, "CalibrationMarche"] = {}
+
+    def __init__(self, fichier : Optional[str] = None, duree_min : float = 0.5, stabilisation : float = 0.8,
+                 sauvegarde : int = 20, rotation_min : float = 0.2):
+        self.fichier = fichier
+        self.duree_min = duree_min
+        self.stabilisation = stabilisation
+        self.sauvegarde = sauvegarde
+        self.rotation_min = rotation_min
+        # Valeurs de départ : vitesses maximales nominales du NAO
+        self.avance = MoindresCarresRecursifs(1, theta0=[0.1])  # m/s par unité de commande
+        self.rotation = MoindresCarresRecursifs(1, theta0=[30.0])  # °/s par unité de commande
+        self.derive = MoindresCarresRecursifs(1, theta0=[0.0])  # °/s par unité de commande d'avance
+        self._verrou = threading.Lock()
+        self._commande : Optional[Tuple[float, float, float]] = None
+        self._depuis = 0.0
+        self._debut : Optional[Tuple[float, List[float]]] = None
+        self._non_sauves = 0
+        self.charger()
+
+    @classmethod
+    def pour(cls, session : Any) -> "CalibrationMarche":
+        """Retourne la calibration du robot de la session (chargée depuis le disque au premier appel)"""
+        calibration = cls._instances.get(id(session))
+        if calibration is None:
+            robot = identifiant_robot(session)
+            calibration = cls(os.path.join(DOSSIER_LOCAL, f"calibration_{robot}.json"))
+            cls._instances[id(session)] = calibration
+        return calibration
+
+    @property
+    def forward_speed(self) -> float:
+        return float(self.avance.theta[0])
+
+    @property
+    def turn_speed(self) -> float:
+        return float(self.rotation.theta[0])
+
+    @property
+    def rotation_compensation(self) -> float:
+        if abs(self.turn_speed) < 1e-6:
+            return 0.0
+        return float(-self.derive.theta[0] / self.turn_speed)
+
+    def en_dict(self) -> Dict[str, float]:
+        """Même forme que l'ancien dictionnaire calibration de nao_menu_simple"""
+        return {"forward_speed": self.forward_speed, "turn_speed": self.turn_speed,
+                "rotation_compensation": self.rotation_compensation,
+                "echantillons": self.avance.echantillons}
+
+    def commande(self, x : float, y : float = 0.0, theta : float = 0.0) -> Tuple[float, float, float]:
+        """Commande moveToward corrigée de la dérive (à envoyer telle quelle au robot)"""
+        theta = theta + self.rotation_compensation * x
+        return x, y, min(max(theta, -1.0), 1.0)
+
+    def observer(self, commande : Tuple[float, float, float], pose : Sequence[float],
+                 instant : Optional[float] = None) -> None:
+        """
+Enregistre la commande envoyée et la pose odométrique courante (à appeler à chaque pas de contrôle)
+
+Args:
+    commande: (x, y, theta) normalisés effectivement envoyés à moveToward
+    pose: getRobotPosition(True) : [x, y, theta] dans le repère monde
+    instant: time.time() par défaut
+    """
+        instant = time.time() if instant is None else instant
+        commande = tuple(float(c) for c in commande)
+        with self._verrou:
+            if commande != self._commande:
+                self._commande, self._depuis, self._debut = commande, instant, None
+                return
+            if instant - self._depuis < self.stabilisation:
+                return
+            if self._debut is None:
+                self._debut = (instant, list(pose))
+                return
+            t0, pose0 = self._debut
+            dt = instant - t0
+            if dt < self.duree_min:
+                return
+            self._debut = (instant, list(pose))
+
+            # Déplacement exprimé dans le repère du robot au début de l'intervalle
+            dx, dy = pose[0] - pose0[0], pose[1] - pose0[1]
+            c, s = math.cos(pose0[2]), math.sin(pose0[2])
+            avance = (c * dx + s * dy) / dt
+            dtheta = math.atan2(math.sin(pose[2] - pose0[2]), math.cos(pose[2] - pose0[2]))
+            rotation = math.degrees(dtheta) / dt
+
+            x, _, theta = commande
+            if abs(x) > 0.05:
+                self.avance.mettre_a_jour([x], avance)
+                # Dérive : rotation restante une fois retirée celle commandée (dont la compensation)
+                self.derive.mettre_a_jour([x], rotation - self.turn_speed * theta)
+            if abs(theta) >= self.rotation_min:
+                self.rotation.mettre_a_jour([theta], rotation - self.derive.theta[0] * x)
+            self._non_sauves += 1
+            a_sauver = self._non_sauves >= self.sauvegarde
+        if a_sauver:
+            self.sauvegarder()
+
+    def arret(self) -> None:
+        """À appeler quand le robot s'arrête : l'intervalle en cours n'est pas utilisé"""
+        with self._verrou:
+            self._commande, self._debut = None, None
+
+    def charger(self) -> bool:
+        if self.fichier is None or not os.path.exists(self.fichier):
+            return False
+        try:
+            with open(self.fichier, "r") as f:
+                donnees = json.load(f)
+            self.avance.restaurer(donnees["avance"])
+            if "derive" in donnees:
+                self.rotation.restaurer(donnees["rotation"])
+                self.derive.restaurer(donnees["derive"])
+            else:
+                print("Calibration de la rotation à l'ancien format : réestimée")
+            return True
+        except Exception as e:
+            print(f"Calibration illisible ({e}), valeurs par défaut")
+            return False
+
+    def sauvegarder(self) -> None:
+        if self.fichier is None:
+            return
+        with self._verrou:
+            donnees = {"avance": self.avance.etat(), "rotation": self.rotation.etat(),
+                       "derive": self.derive.etat(), "date": time.time()}
+            self._non_sauves = 0
+        os.makedirs(os.path.dirname(self.fichier), exist_ok=True)
+        temporaire = self.fichier + ".tmp"
+        with open(temporaire, "w") as f:
+            json.dump(donnees, f)
+        os.replace(temporaire, self.fichier)
+
+if __name__ == '__main__' : pass
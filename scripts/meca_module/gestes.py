@@ -0,0 +1,155 @@
+"""
+Module de bibliothèque de gestes.
+
+Chaque geste est décrit dans gestes.json comme une chronologie par articulation :
+une liste de [instant (s), angle (rad)]. Un angle null sur la première clé signifie « garder
+la position actuelle jusqu'à cet instant » (sert à enchaîner des phases sans que
+l'articulation ne parte trop tôt). Les gestes sont vérifiés au chargement (butées et vitesses maximales des
+articulations du NAO), compilés une seule fois au format attendu par
+ALMotion.angleInterpolation, puis joués en un seul appel pour toutes les articulations.
+
+Utilisation:
+    from scripts.meca_module import gestes
+    gestes.jouer(session.service("ALMotion"), "position_neutre")
+"""
+
+import json
+import os
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+FICHIER_GESTES = os.path.join(os.path.dirname(__file__), "gestes.json")
+
+# (min, max, vitesse max) en rad et rad/s, d'après la documentation NAO V6
+LIMITES_ARTICULATIONS : Dict[str, Tuple[float, float, float]] = {
+    "HeadYaw": (-2.0857, 2.0857, 8.26797),
+    "HeadPitch": (-0.6720, 0.5149, 7.19407),
+    "LShoulderPitch": (-2.0857, 2.0857, 7.19407),
+    "RShoulderPitch": (-2.0857, 2.0857, 7.19407),
+    "LShoulderRoll": (-0.3142, 1.3265, 9.22756),
+    "RShoulderRoll": (-1.3265, 0.3142, 9.22756),
+    "LElbowYaw": (-2.0857, 2.0857, 8.26797),
+    "RElbowYaw": (-2.0857, 2.0857, 8.26797),
+    "LElbowRoll": (-1.5446, -0.0349, 7.19407),
+    "RElbowRoll": (0.0349, 1.5446, 7.19407),
+    "LWristYaw": (-1.8238, 1.8238, 24.6229),
+    "RWristYaw": (-1.8238, 1.8238, 24.6229),
+    "LHand": (0.0, 1.0, 8.33),
+    "RHand": (0.0, 1.0, 8.33),
+    "LHipYawPitch": (-1.1453, 0.7408, 4.16174),
+    "LHipRoll": (-0.3794, 0.7904, 4.16174),
+    "RHipRoll": (-0.7904, 0.3794, 4.16174),
+    "LHipPitch": (-1.5358, 0.4840, 6.40239),
+    "RHipPitch": (-1.5358, 0.4840, 6.40239),
+    "LKneePitch": (-0.0923, 2.1125, 6.40239),
+    "RKneePitch": (-0.0923, 2.1125, 6.40239),
+    "LAnklePitch": (-1.1895, 0.9227, 6.40239),
+    "RAnklePitch": (-1.1895, 0.9227, 6.40239),
+    "LAnkleRoll": (-0.3978, 0.7690, 4.16174),
+    "RAnkleRoll": (-0.7690, 0.3978, 4.16174),
+}
+
+
+class Geste(NamedTuple):
+    """Geste compilé : arguments de angleInterpolation + articulations à compléter à l'exécution"""
+    nom: str
+    noms: List[str]
+    angles: List[List[Optional[float]]]
+    temps: List[List[float]]
+    duree: float
+    a_completer: List[int]  # indices des articulations ayant des angles null
+
+
+def compiler(nom : str, description : Dict[str, Any]) -> Geste:
+    """
+Vérifie et compile la description d'un geste
+
+Args:
+    nom: nom du geste (pour les messages d'erreur)
+    description: {"articulations": {articulation: [[instant, angle], ...]}}
+
+Returns:
+    le geste compilé
+    """
+    noms, angles, temps, a_completer = [], [], [], []
+    for articulation, cles in description["articulations"].items():
+        if articulation not in LIMITES_ARTICULATIONS:
+            raise ValueError(f"Geste {nom} : articulation inconnue {articulation}")
+        if not cles:
+            raise ValueError(f"Geste {nom} : aucune clé pour {articulation}")
+        minimum, maximum, vitesse_max = LIMITES_ARTICULATIONS[articulation]
+        instants = [float(t) for t, _ in cles]
+        valeurs = [None if a is None else float(a) for _, a in cles]
+
+        if instants[0] <= 0 or any(b <= a for a, b in zip(instants, instants[1:])):
+            raise ValueError(f"Geste {nom} : instants de {articulation} non strictement croissants "
+                             f"ou non positifs {instants}")
+        for a in valeurs:
+            if a is not None and not minimum <= a <= maximum:
+                raise ValueError(f"Geste {nom} : {articulation}={a} hors des butées [{minimum}, {maximum}]")
+        if None in valeurs[1:] or len(valeurs) == 1 and valeurs[0] is None:
+            raise ValueError(f"Geste {nom} : seule la première clé de {articulation} peut être null")
+        for (t0, a0), (t1, a1) in zip(zip(instants, valeurs), zip(instants[1:], valeurs[1:])):
+            if a0 is not None and abs(a1 - a0) / (t1 - t0) > vitesse_max:
+                raise ValueError(f"Geste {nom} : {articulation} trop rapide entre {t0} s et {t1} s")
+
+        if None in valeurs:
+            a_completer.append(len(noms))
+        noms.append(articulation)
+        angles.append(valeurs)
+        temps.append(instants)
+    duree = max(t[-1] for t in temps) if temps else 0.0
+    return Geste(nom, noms, angles, temps, duree, a_completer)
+
+
+# Gestes compilés, par (fichier, date de modification)
+_cache : Dict[Tuple[str, float], Dict[str, Geste]] = {}
+
+
+def charger(chemin : str = FICHIER_GESTES) -> Dict[str, Geste]:
+    """Charge et compile tous les gestes du fichier (une seule fois tant qu'il n'est pas modifié)"""
+    cle = (os.path.abspath(chemin), os.path.getmtime(chemin))
+    gestes = _cache.get(cle)
+    if gestes is None:
+        with open(chemin, "r", encoding="utf-8") as f:
+            descriptions = json.load(f)
+        gestes = {nom: compiler(nom, description) for nom, description in descriptions.items()}
+        _cache[cle] = gestes
+    return gestes
+
+
+def geste(nom : str, chemin : str = FICHIER_GESTES) -> Geste:
+    gestes = charger(chemin)
+    if nom not in gestes:
+        raise KeyError(f"Geste inconnu : {nom} (disponibles : {', '.join(sorted(gestes))})")
+    return gestes[nom]
+
+
+def jouer(motion : Any, nom : str, _async : bool = False, chemin : str = FICHIER_GESTES) -> Any:
+    """
+Joue un geste en un seul appel angleInterpolation
+
+Args:
+    motion: service ALMotion
+    nom: nom du geste dans le fichier
+    _async: retourne le futur qi au lieu d'attendre la fin du geste
+
+Returns:
+    le futur si _async, sinon None
+    """
+    g = geste(nom, chemin)
+    angles = g.angles
+    if g.a_completer:
+        # Un seul getAngles pour toutes les articulations qui doivent garder leur position
+        actuels = motion.getAngles([g.noms[i] for i in g.a_completer], True)
+        angles = list(angles)
+        for i, actuel in zip(g.a_completer, actuels):
+            angles[i] = [actuel if a is None else a for a in angles[i]]
+    if _async:
+        return motion.angleInterpolation(g.noms, angles, g.temps, True, _async=True)
+    motion.angleInterpolation(g.noms, angles, g.temps, True)
+    return None
+
+
+if __name__ == "__main__":
+    for nom, g in sorted(charger().items()):
+        print(f"{nom:20} {len(g.noms):2} articulations  {g.duree:.1f} s")
@@ -0,0 +1,211 @@
+"""
+Module de grille d'occupation construite à partir des sonars et de l'odométrie.
+
+La grille est un tableau numpy de taille fixe en log-odds, centré sur le robot : quand le
+robot s'éloigne du centre, la fenêtre défile d'un nombre entier de cellules et les bandes
+découvertes repartent à « inconnu ». Chaque lecture de sonar (filtrée par une médiane
+glissante) met à jour son cône : les cellules avant l'écho deviennent plus libres, celles à
+la distance de l'écho plus occupées. Les points du cône et du couloir de marche sont
+précalculés dans le repère du robot, une mise à jour ne fait donc qu'une rotation et une
+addition vectorisées (quelques dizaines de microsecondes).
+
+Benchmark:
+    python -m scripts.meca_module.grille_occupation
+"""
+
+import math
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Tuple
+
+import numpy as np
+
+CLES_SONAR = ["Device/SubDeviceList/US/Left/Sensor/Value",
+              "Device/SubDeviceList/US/Right/Sensor/Value"]
+
+# Position (x, y en m) et orientation (rad) des sonars dans le repère du robot
+SONARS = {
+    "gauche": (0.05, 0.04, math.radians(25)),
+    "droite": (0.05, -0.04, math.radians(-25)),
+}
+DEMI_CONE = math.radians(30)  # demi-ouverture du faisceau
+PORTEE_MIN = 0.25  # en dessous, le sonar du NAO ne mesure plus
+PORTEE_MAX = 2.5  # au-delà (ou pas d'écho), seule la partie libre est mise à jour
+
+
+class FiltreMedian:
+    """Médiane glissante : supprime les échos isolés des sonars"""
+
+    def __init__(self, taille : int = 3):
+        self.valeurs : Deque[float] = deque(maxlen=taille)
+
+    def filtrer(self, valeur : float) -> float:
+        self.valeurs.append(valeur)
+        tries = sorted(self.valeurs)
+        return float(tries[len(tries) // 2])
+
+
+class GrilleOccupation:
+    """
+Grille d'occupation défilante centrée sur le robot
+
+Args:
+    taille: nombre de cellules de côté
+    resolution: côté d'une cellule (m)
+    l_libre: incrément log-odds d'une cellule traversée par le faisceau
+    l_occupe: incrément log-odds d'une cellule à la distance de l'écho
+    l_borne: borne des log-odds (permet de changer d'avis quand un obstacle bouge)
+    """
+
+    def __init__(self, taille : int = 128, resolution : float = 0.05, l_libre : float = -0.4,
+                 l_occupe : float = 0.85, l_borne : float = 4.0):
+        self.taille = taille
+        self.resolution = resolution
+        self.l_libre = l_libre
+        self.l_occupe = l_occupe
+        self.l_borne = l_borne
+        self.log = np.zeros((taille, taille), dtype=np.float32)
+        self.origine = np.array([-taille // 2, -taille // 2])  # indice monde de la cellule [0, 0]
+        self.pose = (0.0, 0.0, 0.0)
+        self.filtres = {cote: FiltreMedian() for cote in SONARS}
+        self._cones = {cote: self._points_cone(*montage) for cote, montage in SONARS.items()}
+        self._couloirs : Dict[Tuple[float, float], Tuple[np.ndarray, np.ndarray]] = {}
+
+    def _points_cone(self, x : float, y : float, direction : float) -> Tuple[np.ndarray, np.ndarray]:
+        """Points d'échantillonnage du cône (repère robot) triés par distance au sonar, et ces distances"""
+        pas = self.resolution / 2
+        r = np.arange(pas, PORTEE_MAX + self.resolution, pas)
+        a = np.linspace(-DEMI_CONE, DEMI_CONE, int(2 * DEMI_CONE * PORTEE_MAX / pas) // 4 + 1)
+        r, a = (g.ravel() for g in np.meshgrid(r, a, indexing="ij"))
+        points = np.stack([x + r * np.cos(direction + a), y + r * np.sin(direction + a)])
+        return points, r
+
+    def _cellules(self, points : np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Points du repère robot -> indices (ligne, colonne) dans la grille + masque des points visibles"""
+        x, y, theta = self.pose
+        c, s = math.cos(theta), math.sin(theta)
+        mx = x + c * points[0] - s * points[1]
+        my = y + s * points[0] + c * points[1]
+        i = np.floor(mx / self.resolution).astype(np.int64) - self.origine[0]
+        j = np.floor(my / self.resolution).astype(np.int64) - self.origine[1]
+        dedans = (i >= 0) & (i < self.taille) & (j >= 0) & (j < self.taille)
+        return i, j, dedans
+
+    def deplacer(self, x : float, y : float, theta : float) -> None:
+        """
+Nouvelle pose odométrique (getRobotPosition) ; fait défiler la fenêtre si besoin
+
+Args:
+    x, y: position dans le repère monde (m)
+    theta: orientation (rad)
+    """
+        self.pose = (x, y, theta)
+        centre = np.floor(np.array([x, y]) / self.resolution).astype(np.int64) - self.taille // 2
+        decalage = centre - self.origine
+        if np.all(np.abs(decalage) < self.taille // 4):
+            return
+        self.origine = centre
+        for axe, d in enumerate(decalage):
+            if d == 0:
+                continue
+            self.log = np.roll(self.log, -d, axis=axe)
+            bande = slice(-d, None) if d > 0 else slice(0, -d)
+            if axe == 0:
+                self.log[bande, :] = 0.0
+            else:
+                self.log[:, bande] = 0.0
+
+    def mettre_a_jour(self, cote : str, distance : float) -> None:
+        """
+Intègre une lecture de sonar (filtrée) dans la grille
+
+Args:
+    cote: "gauche" ou "droite"
+    distance: distance lue (m)
+    """
+        distance = self.filtres[cote].filtrer(distance)
+        points, r = self._cones[cote]
+        echo = PORTEE_MIN <= distance < PORTEE_MAX
+        if distance < PORTEE_MIN:
+            # Obstacle trop proche pour être localisé : tout le début du cône est occupé
+            n_libres, fin_occupes = 0, np.searchsorted(r, PORTEE_MIN, side="right")
+        else:
+            # Points triés par distance : libres puis occupés sont deux tranches contiguës
+            n_libres = np.searchsorted(r, (distance if echo else PORTEE_MAX) - self.resolution)
+            fin_occupes = np.searchsorted(r, distance + self.resolution, side="right") if echo else n_libres
+        i, j, dedans = self._cellules(points[:, :fin_occupes])
+        libres = dedans[:n_libres]
+        self.log[i[:n_libres][libres], j[:n_libres][libres]] += self.l_libre
+        occupes = dedans[n_libres:]
+        self.log[i[n_libres:][occupes], j[n_libres:][occupes]] += self.l_occupe
+        np.clip(self.log, -self.l_borne, self.l_borne, out=self.log)
+
+    def mettre_a_jour_robot(self, motion : Any, memory : Any) -> None:
+        """Lit l'odométrie et les deux sonars (deux appels) puis met la grille à jour"""
+        self.deplacer(*motion.getRobotPosition(True))
+        gauche, droite = memory.getListData(CLES_SONAR)
+        self.mettre_a_jour("gauche", gauche)
+        self.mettre_a_jour("droite", droite)
+
+    def probabilites(self) -> np.ndarray:
+        """Probabilité d'occupation de chaque cellule (0.5 = inconnu)"""
+        return 1.0 / (1.0 + np.exp(-self.log))
+
+    def occupe(self, x : float, y : float, seuil : float = 0.0) -> bool:
+        """Vrai si la cellule du point monde (x, y) est plus probablement occupée que libre"""
+        i = int(math.floor(x / self.resolution)) - self.origine[0]
+        j = int(math.floor(y / self.resolution)) - self.origine[1]
+        if not (0 <= i < self.taille and 0 <= j < self.taille):
+            return False
+        return bool(self.log[i, j] > seuil)
+
+    def distance_libre(self, largeur : float = 0.35, portee : float = 1.5, seuil : float = 1.0) -> float:
+        """
+Distance libre devant le robot dans un couloir de la largeur donnée
+
+Args:
+    largeur: largeur du couloir (m), un peu plus que les épaules du robot
+    portee: distance maximale examinée (m)
+    seuil: log-odds au-delà duquel une cellule bloque le passage
+
+Returns:
+    la distance jusqu'à la première rangée occupée, ou portee si tout est libre
+    """
+        couloir = self._couloirs.get((largeur, portee))
+        if couloir is None:
+            pas = self.resolution / 2
+            xs = np.arange(0.0, portee, pas)
+            ys = np.arange(-largeur / 2, largeur / 2 + 1e-9, pas)
+            gx, gy = np.meshgrid(xs, ys, indexing="ij")
+            couloir = (np.stack([gx.ravel(), gy.ravel()]), xs)
+            self._couloirs[(largeur, portee)] = couloir
+        points, xs = couloir
+        i, j, dedans = self._cellules(points)
+        bloque = np.zeros(points.shape[1], dtype=bool)
+        bloque[dedans] = self.log[i[dedans], j[dedans]] > seuil
+        rangees = bloque.reshape(len(xs), -1).any(axis=1)
+        if not rangees.any():
+            return portee
+        return float(xs[np.argmax(rangees)])
+
+
+def benchmark(iterations : int = 2000) -> None:
+    """Temps moyen d'une mise à jour (deux sonars + déplacement) et d'une requête de couloir"""
+    grille = GrilleOccupation()
+    rng = np.random.default_rng(0)
+    t0 = time.perf_counter()
+    for k in range(iterations):
+        grille.deplacer(k * 0.002, 0.0, 0.01 * math.sin(k / 50))
+        grille.mettre_a_jour("gauche", 1.0 + 0.05 * rng.standard_normal())
+        grille.mettre_a_jour("droite", 1.2 + 0.05 * rng.standard_normal())
+    maj = (time.perf_counter() - t0) / iterations
+    t0 = time.perf_counter()
+    for _ in range(iterations):
+        distance = grille.distance_libre()
+    requete = (time.perf_counter() - t0) / iterations
+    print(f"Mise à jour: {maj * 1e6:.0f} µs, requête couloir: {requete * 1e6:.0f} µs, "
+          f"distance libre: {distance:.2f} m")
+
+
+if __name__ == "__main__":
+    benchmark()
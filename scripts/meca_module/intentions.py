@@ -0,0 +1,196 @@
+"""
+Moteur d'intentions pour la reconnaissance vocale.
+
+Les phrases et leurs intentions sont chargées depuis un fichier CSV (colonnes intention,
+phrase, reponse). Un index inversé de trigrammes de caractères est construit une seule fois.
+Pour résoudre un texte reconnu, les listes de ses trigrammes sont réunies et comptées
+(np.unique) : chaque phrase candidate reçoit son nombre exact de trigrammes partagés avec le
+texte, d'où son coefficient de Dice. Aucune phrase proche n'est donc écartée, et seules les
+phrases partageant au moins un trigramme sont parcourues : le coût d'une recherche dépend de
+la longueur de ces listes, pas du nombre total de phrases indexées.
+
+Benchmark:
+    python -m scripts.meca_module.intentions
+"""
+
+import csv
+import os
+import re
+import time
+import unicodedata
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+FICHIER_INTENTIONS = os.path.join(os.path.dirname(__file__), "intentions.csv")
+
+
+def normaliser(texte : str) -> str:
+    """Minuscules, sans accents ni ponctuation, espaces simples"""
+    texte = unicodedata.normalize("NFD", texte.lower())
+    texte = "".join(c for c in texte if unicodedata.category(c) != "Mn")
+    return " ".join(re.findall(r"[a-z0-9]+", texte))
+
+
+def trigrammes(texte : str) -> Set[str]:
+    """Trigrammes de caractères d'un texte normalisé (bornés par des espaces)"""
+    texte = f" {texte} "
+    return {texte[i:i + 3] for i in range(len(texte) - 2)}
+
+
+class MoteurIntentions:
+    """
+Index des phrases connues et résolution d'un texte reconnu en intention
+
+Args:
+    seuil: score minimal (0-1) pour accepter une correspondance approximative
+    """
+
+    def __init__(self, seuil : float = 0.5):
+        self.seuil = seuil
+        self.phrases : List[str] = []
+        self.intentions : List[str] = []
+        self.reponses : Dict[str, str] = {}
+        self._exactes : Dict[str, int] = {}
+        self._grammes : List[frozenset] = []
+        self._index : Dict[str, List[int]] = defaultdict(list)
+        # Versions numpy des listes et des tailles, construites à la première recherche
+        self._tableaux : Dict[str, np.ndarray] = {}
+        self._tailles : Optional[np.ndarray] = None
+
+    @classmethod
+    def depuis_csv(cls, chemin : str = FICHIER_INTENTIONS, **kwargs : Any) -> "MoteurIntentions":
+        """Charge un fichier CSV intention,phrase,reponse (reponse peut être vide)"""
+        moteur = cls(**kwargs)
+        with open(chemin, "r", encoding="utf-8", newline="") as f:
+            for ligne in csv.DictReader(f):
+                moteur.ajouter(ligne["intention"], ligne["phrase"], ligne.get("reponse") or None)
+        return moteur
+
+    def ajouter(self, intention : str, phrase : str, reponse : Optional[str] = None) -> None:
+        """
+Ajoute une phrase à l'index
+
+Args:
+    intention: nom de l'intention
+    phrase: phrase telle qu'elle sera donnée au moteur ASR
+    reponse: réponse associée à l'intention (la première donnée est conservée)
+    """
+        if reponse and intention not in self.reponses:
+            self.reponses[intention] = reponse
+        normale = normaliser(phrase)
+        if normale in self._exactes:
+            return
+        numero = len(self.phrases)
+        self.phrases.append(phrase)
+        self.intentions.append(intention)
+        self._exactes[normale] = numero
+        grammes = frozenset(trigrammes(normale))
+        self._grammes.append(grammes)
+        self._tailles = None
+        for g in grammes:
+            self._index[g].append(numero)
+            self._tableaux.pop(g, None)
+
+    def __len__(self) -> int:
+        return len(self.phrases)
+
+    def resoudre(self, texte : str) -> Optional[Tuple[str, float, str]]:
+        """
+Trouve l'intention correspondant au texte reconnu
+
+Returns:
+    (intention, score, phrase la plus proche) ou None sous le seuil
+    """
+        normale = normaliser(texte)
+        numero = self._exactes.get(normale)
+        if numero is not None:
+            return self.intentions[numero], 1.0, self.phrases[numero]
+
+        grammes = trigrammes(normale)
+        if not grammes:
+            return None
+        listes = [self._tableau(g) for g in grammes if g in self._index]
+        if not listes:
+            return None
+        if self._tailles is None:
+            self._tailles = np.array([len(g) for g in self._grammes], dtype=np.float64)
+
+        # Nombre de trigrammes partagés par chaque candidat, puis Dice des seuls candidats
+        candidats, partages = np.unique(np.concatenate(listes), return_counts=True)
+        scores = 2.0 * partages / (len(grammes) + self._tailles[candidats])
+        i = int(np.argmax(scores))
+        meilleur, score = int(candidats[i]), float(scores[i])
+        if score < self.seuil:
+            return None
+        return self.intentions[meilleur], score, self.phrases[meilleur]
+
+    def _tableau(self, gramme : str) -> np.ndarray:
+        tableau = self._tableaux.get(gramme)
+        if tableau is None:
+            tableau = np.array(self._index[gramme], dtype=np.int64)
+            self._tableaux[gramme] = tableau
+        return tableau
+
+    def reponse(self, intention : str) -> Optional[str]:
+        return self.reponses.get(intention)
+
+    def vocabulaire(self) -> List[str]:
+        """Phrases à donner à ALSpeechRecognition.setVocabulary"""
+        return list(self.phrases)
+
+    def pousser_vocabulaire(self, asr : Any, mots_isoles : bool = False) -> None:
+        """
+Envoie le vocabulaire au moteur ASR (mis en pause le temps du changement)
+
+Args:
+    asr: service ALSpeechRecognition
+    mots_isoles: second argument de setVocabulary (word spotting)
+    """
+        asr.pause(True)
+        try:
+            asr.setVocabulary(self.vocabulaire(), mots_isoles)
+        finally:
+            asr.pause(False)
+
+
+def benchmark(tailles : Tuple[int, ...] = (100, 1000, 10000, 50000), requetes : int = 2000) -> None:
+    """
+Mesure la latence moyenne d'une résolution approximative selon la taille de l'index
+    """
+    import random
+    rng = random.Random(0)
+    syllabes = [c + v for c in "bcdfgjlmnprstvz" for v in "aeiou"]
+
+    def mot():
+        return "".join(rng.choice(syllabes) for _ in range(rng.randint(2, 4)))
+
+    print(f"{'phrases':>8} {'construction':>14} {'latence':>12} {'justes':>8}")
+    for taille in tailles:
+        phrases = [" ".join(mot() for _ in range(rng.randint(1, 4))) for _ in range(taille)]
+        t0 = time.perf_counter()
+        moteur = MoteurIntentions()
+        for i, phrase in enumerate(phrases):
+            moteur.ajouter(f"intention_{i % (taille // 5 + 1)}", phrase)
+        construction = time.perf_counter() - t0
+
+        # Requêtes bruitées : une lettre remplacée dans une phrase connue
+        bruitees = []
+        for _ in range(requetes):
+            numero = rng.randrange(len(moteur))
+            phrase = list(moteur.phrases[numero])
+            i = rng.randrange(len(phrase))
+            phrase[i] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+            bruitees.append(("".join(phrase), moteur.intentions[numero]))
+        justes = 0
+        t0 = time.perf_counter()
+        for requete, attendue in bruitees:
+            resultat = moteur.resoudre(requete)
+            justes += resultat is not None and resultat[0] == attendue
+        latence = (time.perf_counter() - t0) / requetes
+        print(f"{taille:>8} {construction * 1000:>11.1f} ms {latence * 1e6:>9.1f} µs {justes / requetes:>7.0%}")
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -12,6 +12,9 @@ import json
 import os
 import time
 
+# Permet d'importer le paquet scripts quand ce fichier est lancé directement
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
 # Import de qi (requis)
 try:
     import qi
@@ -20,13 +23,17 @@ except ImportError:
     print("  Installez-le avec: pip install qi")
     sys.exit(1)
 
+from scripts.meca_module import gestes
+from scripts.meca_module.calibration_marche import CalibrationMarche
+from scripts.meca_module.cache_parole import CacheParole
+from scripts.meca_module.ordonnanceur import (
+    BRAS_DROIT, BRAS_GAUCHE, HAUT_PARLEUR, JAMBES, TETE, TOUT, Ordonnanceur, pause)
+from scripts.meca_module.surveillance_equilibre import SurveillanceEquilibre
+from scripts.utils import metriques, telemetrie
 
 
-calibration = {
-"forward_speed": None, # m/s
-"turn_speed": None, # deg/s
-"rotation_compensation": 0.0 # drift correction
-}
+# Phrases fixes pré-rendues au démarrage (voir cache_parole)
+PHRASES_MENU = ["Intrus trouvé!"]
 
 def load_config():
     """Charge la configuration depuis config.json"""
@@ -96,7 +103,7 @@ def sit_down(session):
         print(f"✗ Erreur: {e}")
 
 
-def scan_vertical_4_crans(session):
+def scan_vertical_4_crans(session, annulee=None):
     """4. Scan vertical 4 crans - Scan du BAS vers le HAUT avec 4 secondes entre chaque"""
     print("\n=== Scan Vertical 4 Crans (Bas → Haut) ===")
     
@@ -119,7 +126,8 @@ def scan_vertical_4_crans(session):
         for i, (nom, pitch) in enumerate(positions, 1):
             print(f"  Cran {i}/4 - {nom} (pitch: {pitch:.2f})")
             motion.setAngles("HeadPitch", pitch, 0.15)
-            time.sleep(4)  # 4 secondes entre chaque cran
+            if pause(annulee, 4):  # 4 secondes entre chaque cran
+                return
         
         # Retour au centre
         motion.setAngles("HeadPitch", 0.0, 0.15)
@@ -129,7 +137,7 @@ def scan_vertical_4_crans(session):
         print(f"✗ Erreur: {e}")
 
 
-def scan_vertical_avec_bras(session):
+def scan_vertical_avec_bras(session, annulee=None):
     """4. Scan vertical avec bras - Les bras vers l'avant + corps penché permettent de regarder très haut"""
     print("\n=== Scan Vertical avec Corps Penché (Bas → Haut) ===")
     
@@ -160,26 +168,9 @@ def scan_vertical_avec_bras(session):
         try:
             print("\n  🔄 Retour à la position normale...")
             
-            # 1. Tête au centre
-            print("    → Tête au centre...")
-            motion.angleInterpolationWithSpeed("HeadPitch", 0.0, 0.08)
-            time.sleep(1)
-            if memory:
-                check_balance(motion, memory)
-            
-            # 2. Corps droit (CRITIQUE avant de bouger les bras)
-            print("    → Corps en position droite...")
-            motion.angleInterpolationWithSpeed(["LHipPitch", "RHipPitch"], [0.0, 0.0], 0.03)
-            time.sleep(2)
-            if memory:
-                check_balance(motion, memory)
-            
-            # 3. Bras en position normale
-            print("    → Bras en position normale...")
-            motion.angleInterpolationWithSpeed(["LShoulderPitch", "RShoulderPitch"], [1.5, 1.5], 0.08)
-            motion.angleInterpolationWithSpeed(["LShoulderRoll", "RShoulderRoll"], [0.1, -0.1], 0.08)
-            motion.angleInterpolationWithSpeed(["LElbowRoll", "RElbowRoll"], [-0.5, 0.5], 0.08)
-            time.sleep(2)
+            # Tête au centre, puis corps droit (CRITIQUE avant de bouger les bras), puis bras
+            print("    → Tête, corps puis bras (geste retour_securise)...")
+            gestes.jouer(motion, "retour_securise")
             if memory:
                 check_balance(motion, memory)
             
@@ -188,42 +179,43 @@ def scan_vertical_avec_bras(session):
             print(f"    ✗ Erreur lors du retour: {e}")
             return False
     
+    moniteur = None
     try:
         motion = session.service("ALMotion")
         memory = session.service("ALMemory")
         
         print("\n  📡 Initialisation des capteurs...")
-        time.sleep(0.5)
+        if pause(annulee, 0.5):
+            return
         
         # Activation des moteurs
         print("\n  ⚙️  PHASE 1: Préparation du robot")
         motion.setStiffnesses(["Head", "LArm", "RArm", "LLeg", "RLeg"], 1.0)
-        time.sleep(1)
+        if pause(annulee, 1):
+            return
         
         # Vérification équilibre initial
         if not check_balance(motion, memory):
             print("  ✗ Robot instable au départ. Arrêt.")
             return
         
+        # Surveillance continue (50 Hz) : arrêt immédiat + retour sécurisé en cas de bascule
+        moniteur = SurveillanceEquilibre(memory, motion, sur_alerte=lambda: safe_return_to_normal(motion))
+        moniteur.start()
+        
         # Positionnement des bras en avant (contrepoids)
         print("  → Positionnement des bras vers l'avant (contrepoids)...")
         motion.angleInterpolationWithSpeed(["LShoulderPitch", "RShoulderPitch"], [0.3, 0.3], 0.08)
-        time.sleep(1.5)
+        if moniteur.attendre(1.5, annulee): return
         motion.angleInterpolationWithSpeed(["LShoulderRoll", "RShoulderRoll"], [0.20, -0.20], 0.08)
-        time.sleep(1.5)
+        if moniteur.attendre(1.5, annulee): return
         motion.angleInterpolationWithSpeed(["LElbowRoll", "RElbowRoll"], [-0.3, 0.3], 0.08)
-        time.sleep(2)
-        check_balance(motion, memory)
+        if moniteur.attendre(2, annulee): return
         
         # Inclinaison du corps vers l'arrière
         print("  → Inclinaison du corps vers l'arrière...")
         motion.angleInterpolationWithSpeed(["LHipPitch", "RHipPitch"], [0.10, 0.10], 0.03)
-        time.sleep(3)
-        
-        if not check_balance(motion, memory):
-            print("  ⚠️  Équilibre compromis. Retour sécurisé.")
-            safe_return_to_normal(motion, memory)
-            return
+        if moniteur.attendre(3, annulee): return
         
         # Scan vertical
         print("\n  📹 PHASE 2: Scan vertical (Bas → Haut)")
@@ -236,24 +228,26 @@ def scan_vertical_avec_bras(session):
         
         for i, (nom, pitch) in enumerate(positions, 1):
             print(f"  → Position {i}/4: {nom}")
-            
-            if not check_balance(motion, memory):
-                print(f"    ⚠️  Équilibre instable. Arrêt à la position {i-1}.")
-                break
-            
             motion.angleInterpolationWithSpeed("HeadPitch", pitch, 0.10)
-            time.sleep(2)
-            check_balance(motion, memory)
-            time.sleep(3)  # Temps d'observation
+            if moniteur.attendre(5, annulee):  # Temps d'observation
+                if moniteur.alerte.is_set():
+                    print(f"    ⚠️  Équilibre instable. Arrêt à la position {i}.")
+                return
         
         # Retour à la normale
         print("\n  🔄 PHASE 3: Retour à la position normale")
+        moniteur.arreter()
         safe_return_to_normal(motion, memory)
         
         print("\n✓ Scan terminé avec succès !")
         print("  Le robot a pu observer très haut grâce à l'inclinaison du corps.")
         
     except Exception as e:
+        if moniteur is not None and moniteur.alerte.is_set():
+            return  # mouvement interrompu par l'arrêt d'urgence, retour déjà en cours
+        if annulee is not None and annulee.is_set():
+            return  # mouvement interrompu par l'annulation, posture_initiale suit
+        
         print(f"\n✗ ERREUR: {e}")
         print("\n⚠️  Remise en position sécurisée...")
         
@@ -271,9 +265,12 @@ def scan_vertical_avec_bras(session):
         except Exception as e2:
             print(f"  ✗ Erreur critique: {e2}")
             print("  🚫 ACTION REQUISE: Stabilisez le robot immédiatement !")
+    finally:
+        if moniteur is not None:
+            moniteur.arreter()
 
 
-def scan_tete_complet(session):
+def scan_tete_complet(session, annulee=None):
     """6. Scan tête complet - Gauche/Droite puis Bas/Haut et retour au centre"""
     print("\n=== Scan Tête Complet ===")
     
@@ -287,29 +284,35 @@ def scan_tete_complet(session):
         # Yaw: rotation gauche/droite (+ = gauche, - = droite)
         print("  → Gauche maximum")
         motion.setAngles("HeadYaw", 2.0, 0.15)  # Gauche max (~119°)
-        time.sleep(2)
+        if pause(annulee, 2):
+            return
         
         print("  → Droite maximum")
         motion.setAngles("HeadYaw", -2.0, 0.15)  # Droite max (~119°)
-        time.sleep(2)
+        if pause(annulee, 2):
+            return
         
         print("  → Centre")
         motion.setAngles("HeadYaw", 0.0, 0.15)  # Centre
-        time.sleep(2)
+        if pause(annulee, 2):
+            return
         
         print("Scan vertical de la tête...")
         # Pitch: inclinaison haut/bas (+ = bas, - = haut)
         print("  → Bas maximum")
         motion.setAngles("HeadPitch", 0.51, 0.15)  # Bas max (~29°)
-        time.sleep(2)
+        if pause(annulee, 2):
+            return
         
         print("  → Haut maximum")
         motion.setAngles("HeadPitch", -0.67, 0.15)  # Haut max (~38°)
-        time.sleep(2)
+        if pause(annulee, 2):
+            return
         
         print("  → Centre")
         motion.setAngles("HeadPitch", 0.0, 0.15)  # Centre
-        time.sleep(1)
+        if pause(annulee, 1):
+            return
         
         print("✓ Scan tête complet terminé")
         
@@ -323,7 +326,7 @@ def point_and_alert(session):
     
     try:
         motion = session.service("ALMotion")
-        tts = session.service("ALTextToSpeech")
+        parole = CacheParole.pour(session)
         
         # Activer le contrôle du bras droit
         print("  → Activation du bras droit...")
@@ -333,33 +336,17 @@ def point_and_alert(session):
         print("  → Pointe vers une personne debout (75°)...")
         
         # Position pour pointer à 75° vers le haut (vers tête d'une personne debout)
-        # 75° = ~1.31 radians
-        # Pour NAO: ShoulderPitch négatif = bras lève vers le haut
-        # -1.31 rad = 75° vers le haut
-        
-        # Lever le bras progressivement
-        motion.angleInterpolationWithSpeed("RShoulderPitch", -1.31, 0.15)  # 75° vers le haut
-        motion.angleInterpolationWithSpeed("RShoulderRoll", -0.15, 0.15)   # Légèrement écarté
-        motion.angleInterpolationWithSpeed("RElbowRoll", 0.3, 0.15)        # Coude légèrement plié
-        motion.angleInterpolationWithSpeed("RElbowYaw", 1.0, 0.15)         # Rotation coude
-        motion.angleInterpolationWithSpeed("RWristYaw", 0.0, 0.15)        # Poignet droit
-        motion.angleInterpolationWithSpeed("RHand", 0.0, 0.15)            # Main fermée (index pointé)
-        
-        time.sleep(2)
+        # Pour NAO: ShoulderPitch négatif = bras lève vers le haut, -1.31 rad = 75°
+        gestes.jouer(motion, "pointer_intrus")
         
         # Dire le message
         print("  → 'Intrus trouvé!'")
-        tts.say("Intrus trouvé!")
+        parole.dire("Intrus trouvé!")
         time.sleep(1.5)
         
         # Remettre le bras en position normale
         print("  → Bras en position normale...")
-        motion.angleInterpolationWithSpeed("RShoulderPitch", 1.5, 0.15)
-        motion.angleInterpolationWithSpeed("RShoulderRoll", -0.1, 0.15)
-        motion.angleInterpolationWithSpeed("RElbowRoll", 0.5, 0.15)
-        motion.angleInterpolationWithSpeed("RElbowYaw", 1.2, 0.15)
-        motion.angleInterpolationWithSpeed("RHand", 0.6, 0.15)
-        time.sleep(2)
+        gestes.jouer(motion, "baisser_bras_droit")
         
         print("✓ Alerte terminée")
         
@@ -380,18 +367,9 @@ def surpris(session):
         motion.setStiffnesses("RArm", 1.0)
         time.sleep(0.3)
 
-        # 50° vers le haut = -50° en radians
-        shoulder_pitch = -0.8727  # -50° en radians
-
-        print("  → Ouverture de la main...")
-        motion.angleInterpolationWithSpeed("RHand", 1.0, 0.2)   # Main ouverte
-
-        print("  → Levée du bras à 50°...")
-        motion.angleInterpolationWithSpeed("RShoulderPitch", shoulder_pitch, 0.02) # La deuximee valeur est la vitesse
-        motion.angleInterpolationWithSpeed("RShoulderRoll", -0.15, 0.2)
-        motion.angleInterpolationWithSpeed("RElbowRoll", 0.3, 0.2)
-        motion.angleInterpolationWithSpeed("RElbowYaw", 1.0, 0.2)
-        motion.angleInterpolationWithSpeed("RWristYaw", 0.0, 0.2)
+        # Ouverture de la main puis levée lente du bras à 50° (-0.8727 rad)
+        print("  → Ouverture de la main et levée du bras à 50°...")
+        gestes.jouer(motion, "surpris")
 
         print("✓ Mouvement terminé")
 
@@ -402,63 +380,41 @@ def surpris(session):
 
 def calibrate(session):
     """
-Calibrate:
-1. Forward speed
-2. Rotation speed
-3. Straight line compensation using sonars
+9. Calibrage - Affine la calibration de la marche par un parcours dédié
+La calibration s'affine aussi pendant chaque marche et est conservée entre les exécutions
+(calibration_marche) : ce parcours ne sert qu'à accélérer la convergence.
+1. Marche droite (vitesse d'avance et dérive en rotation)
+2. Rotation sur place (vitesse de rotation)
 """
-
-
     motion = session.service("ALMotion")
-    memory = session.service("ALMemory")
-
+    calibration = CalibrationMarche.pour(session)
 
     print("=== CALIBRATION START ===")
     motion.wakeUp()
 
-
-    ##############################################################
-    # 1. STRAIGHT LINE COMPENSATION USING SONARS
-    ##############################################################
-    print("\n[1/3] Calibrating straight-walk compensation using sonars...")
-
-
-    K = 1.0
-    duration = 4
-    t0 = time.time()
-    rotation_sum = 0
-    count = 0
-
-
-    while time.time() - t0 < duration:
-        left = memory.getData("Device/SubDeviceList/US/Left/Sensor/Value")
-        right = memory.getData("Device/SubDeviceList/US/Right/Sensor/Value")
-
-
-    if left is None: left = 0.0
-    if right is None: right = 0.0
-
-
-    erreur = left - right
-    rotation = erreur * K
-    rotation = max(min(rotation, 0.2), -0.2)
-
-
-    motion.moveToward(0.3, 0.0, rotation)
-
-
-    rotation_sum += rotation
-    count += 1
-    time.sleep(0.1)
-
-
-    motion.stopMove()
-    rotation_comp = rotation_sum / max(count, 1)
-    calibration["rotation_compensation"] = rotation_comp
-
-
-    print(f"→ Straight-walk compensation found: {rotation_comp:.4f}")
-    print(calibration)
+    etapes = [("[1/2] Marche droite...", (0.5, 0.0, 0.0), 6.0),
+              ("[2/2] Rotation sur place...", (0.0, 0.0, 0.5), 5.0)]
+    try:
+        for message, (x, y, theta), duree in etapes:
+            print(f"\n{message}")
+            # Pas de compensation ici : on mesure la dérive brute
+            commande = (x, y, theta)
+            motion.moveToward(*commande)
+            fin = time.time() + duree
+            while time.time() < fin:
+                calibration.observer(commande, motion.getRobotPosition(True))
+                time.sleep(0.1)
+            motion.stopMove()
+            calibration.arret()
+            time.sleep(1.0)
+    finally:
+        motion.stopMove()
+        calibration.arret()
+        calibration.sauvegarder()
+
+    print(f"→ Calibration ({calibration.en_dict()['echantillons']} échantillons) : "
+          f"avance {calibration.forward_speed:.3f} m/s, rotation {calibration.turn_speed:.1f} °/s, "
+          f"compensation {calibration.rotation_compensation:+.4f}")
 
 def reset_position(session):
     """8. Reset position - Remet le robot en position neutre (tête et mains)"""
@@ -470,28 +426,79 @@ def reset_position(session):
         # Activer le contrôle
         motion.setStiffnesses(["Head", "LArm", "RArm"], 1.0)
         
-        print("  → Reset de la tête...")
-        # Tête au centre
-        motion.setAngles(["HeadYaw", "HeadPitch"], [0.0, 0.0], 0.2)
-        
-        print("  → Reset des bras...")
-        # Bras en position neutre
-        motion.setAngles(["LShoulderPitch", "RShoulderPitch"], [1.5, 1.5], 0.2)
-        motion.setAngles(["LShoulderRoll", "RShoulderRoll"], [0.1, -0.1], 0.2)
-        motion.setAngles(["LElbowYaw", "RElbowYaw"], [-1.2, 1.2], 0.2)
-        motion.setAngles(["LElbowRoll", "RElbowRoll"], [-0.5, 0.5], 0.2)
-        
-        print("  → Reset des mains...")
-        # Mains ouvertes
-        motion.setAngles(["LHand", "RHand"], [0.6, 0.6], 0.2)
-        
-        time.sleep(2)
+        # Tête au centre, bras en position neutre, mains ouvertes
+        print("  → Reset de la tête, des bras et des mains...")
+        gestes.jouer(motion, "position_neutre")
         print("✓ Position reset terminée")
         
     except Exception as e:
         print(f"✗ Erreur: {e}")
 
 
+def scan_detection(session, annulee=None):
+    """10. Scan avec détection - Scan tête complet qui s'arrête dès qu'une personne est vue"""
+    from scripts.meca_module.scan_detection import scan_tete_complet_detection
+    scan_tete_complet_detection(session, annulee=annulee)
+
+
+def suivi_visuel(session, annulee=None):
+    """11. Suivi visuel - La tête suit une cible rouge pendant 20 secondes"""
+    print("\n=== Suivi visuel (cible rouge) ===")
+    from scripts.meca_module.asservissement_visuel import suiviVisuel
+    suiviVisuel(session, duree=20.0, annulee=annulee)
+
+
+def panorama_piece(session, annulee=None):
+    """12. Panorama - Un balayage de la tête, détection sur toute la pièce puis la tête pointe la cible"""
+    print("\n=== Panorama de la pièce ===")
+    from scripts.meca_module.panorama import balayagePanorama
+    panorama = balayagePanorama(session, annulee=annulee)
+    if annulee is not None and annulee.is_set():
+        return
+    personnes = panorama.personnes()
+    zones = panorama.zones_rouges()
+    print(f"  → {len(personnes)} personne(s), {len(zones)} zone(s) rouge(s)")
+    cible = personnes[0] if personnes else (zones[0] if zones else None)
+    if cible is None:
+        print("✗ Aucune cible dans la pièce")
+        return
+    yaw, pitch = cible[0], cible[1]
+    session.service("ALMotion").setAngles(["HeadYaw", "HeadPitch"], [yaw, pitch], 0.15)
+    print(f"✓ Cible pointée (yaw: {yaw:.2f}, pitch: {pitch:.2f})")
+
+
+def centrer_tete(session):
+    """Remet la tête au centre (nettoyage après annulation d'un scan)"""
+    motion = session.service("ALMotion")
+    motion.setAngles(["HeadYaw", "HeadPitch"], [0.0, 0.0], 0.15)
+
+
+def posture_initiale(session):
+    """Remet le robot en posture StandInit (nettoyage après annulation)"""
+    session.service("ALRobotPosture").goToPosture("StandInit", 0.5)
+
+
+# choix -> (nom, action, ressources utilisées, nettoyage après annulation)
+ACTIONS = {
+    '1': ("Debout", stand_up, TOUT, None),
+    '2': ("S'asseoir", sit_down, TOUT, None),
+    '3': ("Scan vertical 4 crans", scan_vertical_4_crans, [TETE], centrer_tete),
+    '4': ("Scan avec bras", scan_vertical_avec_bras, [TETE, BRAS_GAUCHE, BRAS_DROIT, JAMBES], posture_initiale),
+    '5': ("Scan tête complet", scan_tete_complet, [TETE], centrer_tete),
+    '6': ("Pointer vers personne", point_and_alert, [BRAS_DROIT, HAUT_PARLEUR], reset_position),
+    '7': ("Reset position", reset_position, [TETE, BRAS_GAUCHE, BRAS_DROIT], None),
+    '8': ("Surprise", surpris, [BRAS_DROIT], reset_position),
+    '9': ("Calibrage", calibrate, [JAMBES], None),
+    '10': ("Scan avec détection", scan_detection, [TETE], centrer_tete),
+    '11': ("Suivi visuel", suivi_visuel, [TETE], centrer_tete),
+    '12': ("Panorama", panorama_piece, [TETE], centrer_tete),
+}
+
+# Actions qui reçoivent l'événement d'annulation et s'arrêtent entre deux mouvements
+INTERRUPTIBLES = {scan_vertical_4_crans, scan_vertical_avec_bras, scan_tete_complet, scan_detection,
+                  suivi_visuel, panorama_piece}
+
+
 def display_menu():
     """Affiche le menu principal"""
     print("\n" + "="*50)
@@ -506,10 +513,24 @@ def display_menu():
     print("7. Reset position (tête et mains)")
     print("8. Surprise pas sympas")
     print("9. Calibrage")
+    print("10. Scan avec détection (arrêt dès qu'une personne est vue)")
+    print("11. Suivi visuel (la tête suit une cible rouge, 20s)")
+    print("12. Panorama (un balayage, détection sur toute la pièce)")
+    print("l. Lister les actions en cours")
+    print("c. Annuler toutes les actions")
     print("0. Quitter")
     print("="*50)
 
 
+def display_taches(ordonnanceur):
+    """Affiche les actions en cours et en attente"""
+    taches = ordonnanceur.taches()
+    if not taches:
+        print("\nAucune action en cours.")
+    for tache in taches:
+        print(f"  #{tache.numero} {tache.nom} : {tache.etat}")
+
+
 def main():
     """Fonction principale avec menu"""
     print("\n" + "="*50)
@@ -519,36 +540,47 @@ def main():
     # Connexion au robot
     session = connect_to_nao()
     
+    # Les actions sont exécutées en arrière-plan : le menu reste disponible
+    # et les actions utilisant des parties différentes du robot tournent en parallèle
+    telemetrie.demarrer()
+    ordonnanceur = Ordonnanceur(session)
+    CacheParole.pour(session).precharger_en_fond(PHRASES_MENU)
+    print(f"✓ Calibration de la marche chargée : {CalibrationMarche.pour(session).en_dict()}")
+    
+    # Vue en direct de l'état du système : http://127.0.0.1:9100/metrics
+    actions = metriques.jauge("menu_actions", "Actions du menu par état", ("etat",))
+    actions.avec(etat="en_cours").fonction = lambda: ordonnanceur.profondeurs()[0]
+    actions.avec(etat="en_attente").fonction = lambda: ordonnanceur.profondeurs()[1]
+    metriques.jauge("telemetrie_blocs_en_attente", "Blocs de télémétrie en attente d'écriture",
+                    fonction=lambda: telemetrie.statistiques().get("en_attente", 0))
+    metriques.demarrer_serveur()
+    
     # Boucle principale
     while True:
         display_menu()
         
         try:
-            choice = input("\nVotre choix (1-8): ").strip()
+            choice = input("\nVotre choix (1-12, l, c, 0): ").strip()
             
-            if choice == '1':
-                stand_up(session)
-            elif choice == '2':
-                sit_down(session)
-            elif choice == '3':
-                scan_vertical_4_crans(session)
-            elif choice == '4':
-                scan_vertical_avec_bras(session)
-            elif choice == '5':
-                scan_tete_complet(session)
-            elif choice == '6':
-                point_and_alert(session)
-            elif choice == '7':
-                reset_position(session)
-            elif choice == '8':
-                surpris(session)
-            elif choice == '8':
-                calibrate(session)
+            if choice in ACTIONS:
+                nom, action, ressources, nettoyage = ACTIONS[choice]
+                tache = ordonnanceur.soumettre(
+                    nom, lambda annulee, action=action: (action(session, annulee) if action in INTERRUPTIBLES
+                                                         else action(session)), ressources,
+                    (lambda nettoyage=nettoyage: nettoyage(session)) if nettoyage else None)
+                tache.future.add_done_callback(
+                    lambda f, tache=tache: print(f"\n→ Action #{tache.numero} ({tache.nom}) {tache.etat}"))
+                print(f"\n→ Action #{tache.numero} ({nom}) {tache.etat}")
+            elif choice == 'l':
+                display_taches(ordonnanceur)
+            elif choice == 'c':
+                ordonnanceur.annuler_tout()
+                print("\n✓ Actions annulées")
             elif choice == '0':
                 print("\nAu revoir!")
                 break
             else:
-                print("\n✗ Choix invalide. Veuillez choisir entre 1 et 8.")
+                print("\n✗ Choix invalide. Veuillez choisir entre 1 et 12.")
                 
         except KeyboardInterrupt:
             print("\n\nInterruption par l'utilisateur.")
@@ -556,7 +588,9 @@ def main():
         except Exception as e:
             print(f"\n✗ Erreur: {e}")
     
-    # Nettoyage
+    # Nettoyage : interruption des gestes en cours (avec leur remise en position)
+    ordonnanceur.fermer(annuler=True)
+    telemetrie.arreter()
     if session:
         try:
             motion = session.service("ALMotion")
@@ -0,0 +1,232 @@
+"""
+Ordonnanceur d'actions non bloquant pour le menu de contrôle.
+
+Chaque action déclare les ressources du robot qu'elle utilise (tête, bras, jambes,
+haut-parleur). Les actions sans ressource commune s'exécutent en parallèle, les autres
+attendent dans la file dans l'ordre de soumission. Chaque action peut être annulée :
+les mouvements et la parole en cours sur ses ressources sont interrompus, puis son
+étape de nettoyage est exécutée. L'action reçoit l'événement d'annulation et attend avec
+pause() au lieu de time.sleep pour s'arrêter dès l'annulation. Le résultat est rendu via un
+concurrent.futures.Future, terminé une fois le nettoyage fait et les ressources libérées.
+"""
+
+import itertools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+# Ressources du robot
+TETE = "tete"
+BRAS_GAUCHE = "bras_gauche"
+BRAS_DROIT = "bras_droit"
+JAMBES = "jambes"
+HAUT_PARLEUR = "haut_parleur"
+TOUT = frozenset([TETE, BRAS_GAUCHE, BRAS_DROIT, JAMBES, HAUT_PARLEUR])
+
+# Chaînes ALMotion correspondant à chaque ressource
+CHAINES = {
+    TETE: ["Head"],
+    BRAS_GAUCHE: ["LArm"],
+    BRAS_DROIT: ["RArm"],
+    JAMBES: ["LLeg", "RLeg"],
+}
+
+
+def interrompre(session : Any, ressources : Iterable[str]) -> None:
+    """
+Interrompt immédiatement les mouvements et la parole utilisant les ressources données
+
+Args:
+    session: la session en cours avec le robot
+    ressources: ressources à libérer
+    """
+    ressources = set(ressources)
+    chaines = [c for r in ressources for c in CHAINES.get(r, [])]
+    if chaines:
+        motion = session.service("ALMotion")
+        if JAMBES in ressources:
+            motion.stopMove()
+        motion.killTasksUsingResources(chaines)
+    if HAUT_PARLEUR in ressources:
+        session.service("ALTextToSpeech").stopAll()
+        session.service("ALAudioPlayer").stopAll()
+
+
+def pause(annulee : Optional[threading.Event], duree : float) -> bool:
+    """
+Attend duree secondes, ou moins si l'action est annulée entretemps
+
+Args:
+    annulee: événement d'annulation reçu par l'action (None : simple time.sleep)
+    duree: durée de l'attente (s)
+
+Returns:
+    vrai si l'action a été annulée
+    """
+    if annulee is None:
+        time.sleep(duree)
+        return False
+    return annulee.wait(duree)
+
+
+class Tache:
+    """
+Action soumise à l'ordonnanceur
+
+Attributes:
+    nom: nom affiché de l'action
+    ressources: ressources réservées pendant l'exécution
+    future: Future contenant le résultat (ou l'exception) de l'action
+    annulee: événement positionné quand l'action est annulée
+    """
+
+    def __init__(self, numero : int, nom : str, fonction : Callable[[threading.Event], Any], ressources : FrozenSet[str],
+                 nettoyage : Optional[Callable[[], Any]]):
+        self.numero = numero
+        self.nom = nom
+        self.fonction = fonction
+        self.ressources = ressources
+        self.nettoyage = nettoyage
+        self.future : Future = Future()
+        self.annulee = threading.Event()
+        self.etat = "en attente"
+
+    def __repr__(self) -> str:
+        return f"<Tache #{self.numero} {self.nom} ({self.etat})>"
+
+
+class Ordonnanceur:
+    """
+File d'actions avec verrous de ressources
+
+Args:
+    session: la session en cours avec le robot
+    max_actions: nombre maximal d'actions exécutées simultanément
+    """
+
+    def __init__(self, session : Any, max_actions : int = len(TOUT)):
+        self.session = session
+        self._pool = ThreadPoolExecutor(max_workers=max_actions, thread_name_prefix="Action")
+        self._verrou = threading.Lock()
+        self._attente : List[Tache] = []
+        self._en_cours : Dict[int, Tache] = {}
+        self._occupees : set = set()
+        self._compteur = itertools.count(1)
+
+    def soumettre(self, nom : str, fonction : Callable[[threading.Event], Any], ressources : Iterable[str],
+                  nettoyage : Optional[Callable[[], Any]] = None) -> Tache:
+        """
+Ajoute une action à la file sans attendre son exécution
+
+Args:
+    nom: nom affiché de l'action
+    fonction: fonction exécutant l'action, appelée avec l'événement d'annulation de la tâche
+    ressources: ressources utilisées par l'action (TETE, BRAS_DROIT, ...)
+    nettoyage: fonction appelée après une annulation (ex: remise en position)
+
+Returns:
+    la tâche créée ; tache.future donne le résultat
+    """
+        tache = Tache(next(self._compteur), nom, fonction, frozenset(ressources), nettoyage)
+        with self._verrou:
+            self._attente.append(tache)
+            self._distribuer()
+        return tache
+
+    def _distribuer(self) -> None:
+        # Appelé avec self._verrou : lance toutes les tâches dont les ressources sont libres.
+        # Une tâche bloquée réserve ses ressources pour ne pas être doublée par une plus récente.
+        reservees = set(self._occupees)
+        for tache in list(self._attente):
+            if tache.ressources & reservees:
+                reservees |= tache.ressources
+                continue
+            self._attente.remove(tache)
+            self._occupees |= tache.ressources
+            reservees |= tache.ressources
+            self._en_cours[tache.numero] = tache
+            tache.etat = "en cours"
+            self._pool.submit(self._executer, tache)
+
+    def _executer(self, tache : Tache) -> None:
+        tache.future.set_running_or_notify_cancel()
+        resultat, erreur = None, None
+        try:
+            resultat = tache.fonction(tache.annulee)
+        except BaseException as e:
+            erreur = e
+        if tache.annulee.is_set() and tache.nettoyage is not None:
+            try:
+                tache.nettoyage()
+            except Exception as e:
+                print(f"✗ Erreur pendant le nettoyage de {tache.nom}: {e}")
+        with self._verrou:
+            if tache.annulee.is_set():
+                tache.etat = "annulée"
+            else:
+                tache.etat = "échouée" if erreur is not None else "terminée"
+            self._en_cours.pop(tache.numero, None)
+            self._occupees -= tache.ressources
+            self._distribuer()
+        # En dernier : qui voit l'action terminée trouve ses ressources libérées
+        if erreur is not None:
+            tache.future.set_exception(erreur)
+        else:
+            tache.future.set_result(resultat)
+
+    def annuler(self, tache : Tache) -> bool:
+        """
+Annule une action en attente ou en cours
+
+Returns:
+    vrai si l'action a été annulée avant d'avoir terminé
+    """
+        with self._verrou:
+            if tache in self._attente:
+                self._attente.remove(tache)
+                tache.etat = "annulée"
+                tache.annulee.set()
+                tache.future.cancel()
+                tache.future.set_running_or_notify_cancel()
+                return True
+            if tache.numero not in self._en_cours:
+                return False
+            tache.annulee.set()
+
+        # Hors verrou : interrompt les appels bloquants, l'action se termine d'elle-même
+        try:
+            interrompre(self.session, tache.ressources)
+        except Exception as e:
+            print(f"✗ Erreur lors de l'interruption de {tache.nom}: {e}")
+        return True
+
+    def annuler_tout(self) -> None:
+        """Vide la file et annule toutes les actions en cours"""
+        with self._verrou:
+            taches = list(self._attente) + list(self._en_cours.values())
+        for tache in taches:
+            self.annuler(tache)
+
+    def profondeurs(self) -> Tuple[int, int]:
+        """(actions en cours, actions en attente)"""
+        with self._verrou:
+            return len(self._en_cours), len(self._attente)
+
+    def taches(self) -> List[Tache]:
+        """Actions en cours puis en attente"""
+        with self._verrou:
+            return list(self._en_cours.values()) + list(self._attente)
+
+    def fermer(self, annuler : bool = True) -> None:
+        """
+Arrête l'ordonnanceur
+
+Args:
+    annuler: annule les actions restantes au lieu d'attendre leur fin
+    """
+        if annuler:
+            self.annuler_tout()
+        self._pool.shutdown(wait=True)
+
+if __name__ == '__main__' : pass
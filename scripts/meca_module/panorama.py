@@ -0,0 +1,235 @@
+"""
+Panorama de la pièce construit pendant un balayage de la tête, sans appariement de points.
+
+Chaque image est datée (horodatage_images) et placée dans une mosaïque cylindrique à partir
+des angles HeadYaw/HeadPitch interpolés à l'instant de sa capture : colonne = azimut,
+ligne = tangente de l'élévation, toutes deux à echelle pixels par radian près de l'horizon.
+Un pixel de la mosaïque garde l'image qui le voyait le plus près de son centre (moins de
+distorsion et de flou de bougé qu'en bord d'image), sans moyenne entre images voisines.
+
+La détection tourne ensuite une seule fois sur la mosaïque et chaque résultat est ramené aux
+angles de tête qui pointent la caméra vers lui (Panorama.angles) : un seul balayage, à peu
+près de la durée de scan_tete_complet, donne le résultat pour toute la pièce.
+
+Benchmark:
+    python -m scripts.meca_module.panorama
+"""
+
+import math
+import threading
+import time
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+from ..ia_module.traitement_image import masqueRouge
+from ..utils.horodatage_images import SourceImages
+from ..utils.lazy_import import lazy_import
+from .asservissement_visuel import ARTICULATIONS_TETE, DEMI_CHAMP_H, DEMI_CHAMP_V, HistoriqueTete
+from .gestes import LIMITES_ARTICULATIONS
+
+cv2 = lazy_import("cv2")
+
+# Inclinaison des caméras par rapport à l'axe de la tête (rad, vers le bas) : haut, bas
+INCLINAISON_CAMERA = {0: math.radians(1.2), 1: math.radians(39.7)}
+
+# Balayage en deux passes horizontales (haut puis bas) : chaque passe couvre ±DEMI_CHAMP_V
+# en élévation ; le tangage est limité aux grands lacets (contact avec les épaules)
+POSITIONS_PANORAMA = [(2.0, -0.35), (-2.0, -0.35), (-2.0, 0.25), (2.0, 0.25), (0.0, 0.0)]
+
+
+def _rotation(yaw : float, pitch : float) -> np.ndarray:
+    """Repère caméra (x devant, y à gauche, z en haut) -> repère du torse ; pitch positif vers le bas"""
+    cy, sy, cp, sp = math.cos(yaw), math.sin(yaw), math.cos(pitch), math.sin(pitch)
+    return np.array([[cy * cp, -sy, cy * sp],
+                     [sy * cp, cy, sy * sp],
+                     [-sp, 0.0, cp]])
+
+
+class Panorama:
+    """
+Mosaïque cylindrique indexée par les angles de la tête
+
+Args:
+    echelle: pixels par radian de la mosaïque
+    camera_index: caméra utilisée (pour son inclinaison)
+    """
+
+    def __init__(self, echelle : float = 200.0, camera_index : int = 0):
+        self.echelle = echelle
+        self.inclinaison = INCLINAISON_CAMERA[camera_index]
+        yaw_min, yaw_max, _ = LIMITES_ARTICULATIONS["HeadYaw"]
+        pitch_min, pitch_max, _ = LIMITES_ARTICULATIONS["HeadPitch"]
+        self.azimut_max = min(yaw_max + DEMI_CHAMP_H, math.pi)
+        self.azimut_min = max(yaw_min - DEMI_CHAMP_H, -math.pi)
+        # Élévation = -(tangage de la tête + inclinaison de la caméra)
+        self.hauteur_max = math.tan(-pitch_min - self.inclinaison + DEMI_CHAMP_V)
+        self.hauteur_min = math.tan(-pitch_max - self.inclinaison - DEMI_CHAMP_V)
+        self.largeur = int(math.ceil((self.azimut_max - self.azimut_min) * echelle))
+        self.hauteur = int(math.ceil((self.hauteur_max - self.hauteur_min) * echelle))
+        # Colonne 0 = azimut maximal (à gauche du robot), ligne 0 = plus haute élévation
+        self.azimuts = self.azimut_max - (np.arange(self.largeur) + 0.5) / echelle
+        self.hauteurs = self.hauteur_max - (np.arange(self.hauteur) + 0.5) / echelle
+        self.mosaique = np.zeros((self.hauteur, self.largeur, 3), dtype=np.uint8)
+        self.poids = np.zeros((self.hauteur, self.largeur), dtype=np.float32)
+        self.images = 0
+
+    def _vers_mosaique(self, directions : np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Directions (N, 3) du repère du torse -> (colonnes, lignes) de la mosaïque"""
+        azimut = np.arctan2(directions[:, 1], directions[:, 0])
+        hauteur = directions[:, 2] / np.hypot(directions[:, 0], directions[:, 1])
+        return (self.azimut_max - azimut) * self.echelle, (self.hauteur_max - hauteur) * self.echelle
+
+    def _emprise(self, rotation : np.ndarray) -> Optional[Tuple[int, int, int, int]]:
+        """Rectangle (c0, l0, c1, l1) de la mosaïque couvert par l'image, d'après son contour"""
+        t = np.linspace(-1.0, 1.0, 9)
+        u = np.concatenate([t, t, -np.ones(9), np.ones(9)])
+        v = np.concatenate([-np.ones(9), np.ones(9), t, t])
+        contour = np.stack([np.ones_like(u), -u * math.tan(DEMI_CHAMP_H), -v * math.tan(DEMI_CHAMP_V)], axis=1)
+        colonnes, lignes = self._vers_mosaique(contour @ rotation.T)
+        c0, c1 = max(int(colonnes.min()) - 1, 0), min(int(colonnes.max()) + 2, self.largeur)
+        l0, l1 = max(int(lignes.min()) - 1, 0), min(int(lignes.max()) + 2, self.hauteur)
+        if c0 >= c1 or l0 >= l1:
+            return None
+        return c0, l0, c1, l1
+
+    def ajouter(self, image : np.ndarray, yaw : float, pitch : float) -> bool:
+        """
+Place une image prise avec la tête à (yaw, pitch)
+
+Returns:
+    faux si l'image tombe hors de la mosaïque
+    """
+        rotation = _rotation(yaw, pitch + self.inclinaison)
+        emprise = self._emprise(rotation)
+        if emprise is None:
+            return False
+        c0, l0, c1, l1 = emprise
+
+        # Direction de chaque pixel de l'emprise, ramenée dans le repère de la caméra
+        azimuts = self.azimuts[c0:c1]
+        hauteurs = self.hauteurs[l0:l1, None]
+        cx = np.cos(azimuts) * rotation[0, 0] + np.sin(azimuts) * rotation[1, 0] + hauteurs * rotation[2, 0]
+        cy = np.cos(azimuts) * rotation[0, 1] + np.sin(azimuts) * rotation[1, 1] + hauteurs * rotation[2, 1]
+        cz = np.cos(azimuts) * rotation[0, 2] + np.sin(azimuts) * rotation[1, 2] + hauteurs * rotation[2, 2]
+        devant = cx > 1e-3
+        cx = np.where(devant, cx, 1.0)
+        u = -cy / (cx * math.tan(DEMI_CHAMP_H))
+        v = -cz / (cx * math.tan(DEMI_CHAMP_V))
+
+        # Garde l'image la plus centrée pour chaque pixel
+        poids = (1.0 - np.abs(u)) * (1.0 - np.abs(v))
+        meilleur = devant & (np.abs(u) < 1.0) & (np.abs(v) < 1.0) & (poids > self.poids[l0:l1, c0:c1])
+        if not meilleur.any():
+            return False
+        hauteur_image, largeur_image = image.shape[:2]
+        carte_x = ((u + 1.0) * 0.5 * largeur_image - 0.5).astype(np.float32)
+        carte_y = ((v + 1.0) * 0.5 * hauteur_image - 0.5).astype(np.float32)
+        projetee = cv2.remap(image, carte_x, carte_y, cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+        self.mosaique[l0:l1, c0:c1][meilleur] = projetee[meilleur]
+        self.poids[l0:l1, c0:c1][meilleur] = poids[meilleur]
+        self.images += 1
+        return True
+
+    def couverte(self) -> np.ndarray:
+        """Masque booléen des pixels de la mosaïque vus au moins une fois"""
+        return self.poids > 0
+
+    def angles(self, colonne : float, ligne : float) -> Tuple[float, float]:
+        """(HeadYaw, HeadPitch) qui mettent le pixel (colonne, ligne) de la mosaïque au centre de l'image"""
+        yaw_min, yaw_max, _ = LIMITES_ARTICULATIONS["HeadYaw"]
+        pitch_min, pitch_max, _ = LIMITES_ARTICULATIONS["HeadPitch"]
+        yaw = self.azimut_max - (colonne + 0.5) / self.echelle
+        pitch = -math.atan(self.hauteur_max - (ligne + 0.5) / self.echelle) - self.inclinaison
+        return min(max(yaw, yaw_min), yaw_max), min(max(pitch, pitch_min), pitch_max)
+
+    def zones_rouges(self, seuil_pixels : int = 200) -> List[Tuple[float, float, int]]:
+        """Zones rouges de la mosaïque, de la plus grande à la plus petite : (yaw, pitch, pixels)"""
+        masque = masqueRouge(cv2.cvtColor(self.mosaique, cv2.COLOR_RGB2BGR))
+        masque[~self.couverte()] = 0
+        n, _, statistiques, centres = cv2.connectedComponentsWithStats(masque)
+        zones = [(*self.angles(*centres[i]), int(statistiques[i, cv2.CC_STAT_AREA])) for i in range(1, n)
+                 if statistiques[i, cv2.CC_STAT_AREA] >= seuil_pixels]
+        return sorted(zones, key=lambda zone: -zone[2])
+
+    def personnes(self, detecteur : Any = None) -> List[Tuple[float, float, float]]:
+        """Personnes vues sur la mosaïque (DetecteurHOG par défaut) : (yaw, pitch, score) du centre de chaque boîte"""
+        if detecteur is None:
+            from ..ia_module.detection_personne import DetecteurHOG
+            detecteur = DetecteurHOG(largeur_max=self.largeur)
+        resultats = []
+        for (x, y, w, h), score in detecteur.detecter(cv2.cvtColor(self.mosaique, cv2.COLOR_RGB2BGR)):
+            resultats.append((*self.angles(x + w / 2, y + h / 2), score))
+        return sorted(resultats, key=lambda resultat: -resultat[2])
+
+
+def balayagePanorama(session : Any, positions : Sequence[Tuple[float, float]] = POSITIONS_PANORAMA,
+                     vitesse : float = 0.1, tolerance : float = 0.05, attente_max : float = 6.0,
+                     camera_index : int = 0, resolution : int = 1, echelle : float = 200.0,
+                     annulee : Optional[threading.Event] = None) -> Panorama:
+    """
+Balaye la tête en plaçant chaque image dans un panorama
+
+Args:
+    session: la session en cours avec le robot
+    positions: liste de (HeadYaw, HeadPitch) à atteindre successivement
+    vitesse: fraction de la vitesse maximale des moteurs de la tête (plus lent = moins de flou)
+    tolerance: écart (rad) en dessous duquel une position est considérée atteinte
+    attente_max: durée maximale (s) passée à rejoindre une position
+    camera_index: 0 = caméra du haut, 1 = caméra du bas
+    resolution: résolution ALVideoDevice
+    echelle: pixels par radian du panorama
+    annulee: événement d'annulation (ordonnanceur) : le balayage s'arrête à l'image suivante
+
+Returns:
+    le panorama construit (partiel si le balayage a été annulé)
+    """
+    motion = session.service("ALMotion")
+    video_service = session.service("ALVideoDevice")
+    panorama = Panorama(echelle, camera_index)
+    historique = HistoriqueTete()
+
+    motion.setStiffnesses("Head", 1.0)
+    name_id = video_service.subscribeCamera("Panorama", camera_index, resolution, 11, 30)
+    source = SourceImages(video_service, name_id, "panorama", age_max=0.5)
+    debut_balayage = time.time()
+    try:
+        for yaw_cible, pitch_cible in positions:
+            motion.setAngles(ARTICULATIONS_TETE, [yaw_cible, pitch_cible], vitesse)  # non bloquant
+            debut = time.time()
+            while time.time() - debut < attente_max:
+                if annulee is not None and annulee.is_set():
+                    return panorama
+                image = source.lire()
+                yaw, pitch = motion.getAngles(ARTICULATIONS_TETE, True)
+                historique.ajouter(time.time(), yaw, pitch)
+                if image is not None:
+                    # Angles à l'instant de la capture, pas à celui de la lecture
+                    panorama.ajouter(image.donnees, *historique.a_l_instant(image.capture))
+                    image.marquer("mosaique")
+                if abs(yaw - yaw_cible) < tolerance and abs(pitch - pitch_cible) < tolerance:
+                    break
+    finally:
+        video_service.unsubscribe(name_id)
+
+    couverture = panorama.couverte().mean()
+    print(f"✓ Panorama {panorama.largeur}x{panorama.hauteur} : {panorama.images} images en "
+          f"{time.time() - debut_balayage:.1f} s, {couverture * 100:.0f}% couvert")
+    return panorama
+
+
+def benchmark(iterations : int = 50) -> None:
+    """Coût de l'ajout d'une image 320x240 au panorama"""
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, (240, 320, 3), dtype=np.uint8)
+    panorama = Panorama()
+    yaws = np.linspace(2.0, -2.0, iterations)
+    t0 = time.perf_counter()
+    for yaw in yaws:
+        panorama.ajouter(image, float(yaw), -0.3)
+    duree = (time.perf_counter() - t0) / iterations
+    print(f"Panorama {panorama.largeur}x{panorama.hauteur} : {duree * 1000:.2f} ms par image, "
+          f"{panorama.couverte().mean() * 100:.0f}% couvert")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,173 @@
+"""
+Scans de la tête avec détection en continu.
+
+Contrairement à scan_vertical_4_crans et scan_tete_complet (nao_menu_simple), qui attendent
+plusieurs secondes à chaque position sans regarder les images, ces scans envoient chaque image
+de la caméra au détecteur pendant que la tête bouge, associent à chaque résultat les angles
+de la tête au moment de la capture (interpolés dans l'historique des angles mesurés, à
+l'horodatage de l'image) et s'arrêtent dès que la cible est trouvée.
+"""
+
+import threading
+import time
+from typing import Any, Callable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from ..utils.horodatage_images import HorlogeRobot
+from ..utils.lazy_import import lazy_import
+from .asservissement_visuel import HistoriqueTete
+
+cv2 = lazy_import("cv2")
+
+# Positions (HeadYaw, HeadPitch) en radians, dans l'ordre des scans du menu
+POSITIONS_SCAN_VERTICAL = [(0.0, 0.25), (0.0, -0.05), (0.0, -0.25), (0.0, -0.45)]
+POSITIONS_SCAN_COMPLET = [(2.0, 0.0), (-2.0, 0.0), (0.0, 0.0), (0.0, 0.51), (0.0, -0.67), (0.0, 0.0)]
+
+ARTICULATIONS_TETE = ["HeadYaw", "HeadPitch"]
+
+# Un détecteur reçoit une image BGR et retourne None si la cible n'est pas vue
+Detecteur = Callable[[np.ndarray], Any]
+
+
+class DetectionScan(NamedTuple):
+    """Résultat d'un détecteur associé à la position de la tête au moment de la capture"""
+    resultat: Any
+    yaw: float
+    pitch: float
+    instant: float
+
+
+def detecteurRouge(seuil_pixels : int = 500) -> Detecteur:
+    """
+Détecteur de rouge basé sur traitement_image.detectionRouge
+
+Args:
+    seuil_pixels: nombre minimal de pixels rouges pour considérer la cible trouvée
+
+Returns:
+    fonction retournant le nombre de pixels rouges, ou None sous le seuil
+    """
+    from ..ia_module.traitement_image import detectionRouge
+
+    def detecter(frame : np.ndarray) -> Optional[int]:
+        masque = cv2.cvtColor(detectionRouge(frame), cv2.COLOR_BGR2GRAY)
+        nombre = cv2.countNonZero(masque)
+        return nombre if nombre > seuil_pixels else None
+
+    return detecter
+
+
+def detecteurPersonne(intervalle : int = 5) -> Detecteur:
+    """
+Détecteur de personnes basé sur detection_personne.PipelinePersonne
+
+Returns:
+    fonction retournant la liste des boîtes détectées, ou None si personne
+    """
+    from ..ia_module.detection_personne import PipelinePersonne
+    pipeline = PipelinePersonne(intervalle=intervalle)
+
+    def detecter(frame : np.ndarray) -> Optional[List[Tuple[Any, float, str, Optional[str]]]]:
+        personnes = pipeline.traiter(frame)
+        return personnes or None
+
+    return detecter
+
+
+def scanDetection(session : Any, detecteur : Detecteur,
+                  positions : List[Tuple[float, float]] = POSITIONS_SCAN_VERTICAL,
+                  vitesse : float = 0.15, tolerance : float = 0.03, attente_max : float = 4.0,
+                  camera_index : int = 0, resolution : int = 1,
+                  sur_image : Optional[Callable[[DetectionScan], None]] = None,
+                  annulee : Optional[threading.Event] = None) -> Optional[DetectionScan]:
+    """
+Parcourt les positions de tête en analysant chaque image pendant le mouvement
+
+Args:
+    session: la session en cours avec le robot
+    detecteur: fonction image BGR -> résultat (None si la cible n'est pas vue)
+    positions: liste de (HeadYaw, HeadPitch) à atteindre successivement
+    vitesse: fraction de la vitesse maximale des moteurs de la tête
+    tolerance: écart (rad) en dessous duquel une position est considérée atteinte
+    attente_max: durée maximale (s) passée à rejoindre une position
+    camera_index: 0 = caméra du haut, 1 = caméra du bas
+    resolution: résolution ALVideoDevice
+    sur_image: fonction appelée pour chaque image analysée (même sans détection)
+    annulee: événement d'annulation (ordonnanceur) : le scan s'arrête à l'image suivante
+
+Returns:
+    la première détection (avec les angles de tête à la capture), ou None si rien n'a été trouvé
+    """
+    motion = session.service("ALMotion")
+    video_service = session.service("ALVideoDevice")
+
+    motion.setStiffnesses("Head", 1.0)
+    name_id = video_service.subscribeCamera("ScanDetection", camera_index, resolution, 11, 30)
+    historique = HistoriqueTete()
+    horloge = HorlogeRobot()  # les horloges du robot et du PC ne sont pas synchronisées
+    historique.ajouter(time.time(), *motion.getAngles(ARTICULATIONS_TETE, True))
+    trouve = None
+
+    try:
+        for yaw_cible, pitch_cible in positions:
+            motion.setAngles(ARTICULATIONS_TETE, [yaw_cible, pitch_cible], vitesse)  # non bloquant
+            debut = time.time()
+
+            while time.time() - debut < attente_max:
+                if annulee is not None and annulee.is_set():
+                    return None
+                image = video_service.getImageRemote(name_id)
+                yaw, pitch = motion.getAngles(ARTICULATIONS_TETE, True)
+                historique.ajouter(time.time(), yaw, pitch)
+                if image is None:
+                    continue
+
+                # Angles à l'instant de la capture, pas à celui de la réception
+                horodatage = image[4] + image[5] * 1e-6
+                horloge.observer(horodatage, time.time())
+                capture = horloge.locale(horodatage)
+                yaw_capture, pitch_capture = historique.a_l_instant(capture)
+
+                width, height = image[0], image[1]
+                img = np.frombuffer(image[6], dtype=np.uint8).reshape((height, width, 3))
+                frame = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
+
+                detection = DetectionScan(detecteur(frame), yaw_capture, pitch_capture, capture)
+                if sur_image is not None:
+                    sur_image(detection)
+
+                if detection.resultat is not None:
+                    trouve = detection
+                    break
+
+                if abs(yaw - yaw_cible) < tolerance and abs(pitch - pitch_cible) < tolerance:
+                    break
+
+            if trouve is not None:
+                # Arrêt immédiat : la tête reste pointée vers la cible
+                motion.setAngles(ARTICULATIONS_TETE, [trouve.yaw, trouve.pitch], vitesse)
+                print(f"✓ Cible trouvée (yaw: {trouve.yaw:.2f}, pitch: {trouve.pitch:.2f})")
+                break
+    finally:
+        video_service.unsubscribe(name_id)
+
+    if trouve is None:
+        motion.setAngles(ARTICULATIONS_TETE, [0.0, 0.0], vitesse)
+        print("✗ Cible non trouvée")
+    return trouve
+
+
+def scan_vertical_detection(session : Any, detecteur : Optional[Detecteur] = None,
+                            annulee : Optional[threading.Event] = None) -> Optional[DetectionScan]:
+    """Scan vertical 4 crans (Bas → Haut) qui s'arrête dès qu'une personne est vue"""
+    print("\n=== Scan Vertical avec Détection ===")
+    return scanDetection(session, detecteur or detecteurPersonne(), POSITIONS_SCAN_VERTICAL, annulee=annulee)
+
+
+def scan_tete_complet_detection(session : Any, detecteur : Optional[Detecteur] = None,
+                                annulee : Optional[threading.Event] = None) -> Optional[DetectionScan]:
+    """Scan tête complet (gauche/droite + bas/haut) qui s'arrête dès qu'une personne est vue"""
+    print("\n=== Scan Tête Complet avec Détection ===")
+    return scanDetection(session, detecteur or detecteurPersonne(), POSITIONS_SCAN_COMPLET, annulee=annulee)
+
+if __name__ == '__main__' : pass
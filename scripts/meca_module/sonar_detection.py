@@ -1,6 +1,9 @@
 import time 
 from typing import Any
 from ..utils.subricber import Subriber
+from ..utils import metriques, telemetrie
+
+SONAR = metriques.jauge("sonar_distance_metres", "Dernière distance lue par les sonars", ("cote",))
 
 def SonarDetection(session : Any) -> None:
     """
@@ -25,6 +28,9 @@ Args:
     try :
         leftSensor = memory_service.getData("Device/SubDeviceList/US/Left/Sensor/Value") # TODO : tester Value1 jusqu'à 9 pour voir si ces capteurs marchent
         rightSensor = memory_service.getData("Device/SubDeviceList/US/Right/Sensor/Value")
+        telemetrie.canal("sonar", ("gauche", "droite")).ajouter(leftSensor, rightSensor)
+        SONAR.avec(cote="gauche").fixer(leftSensor)
+        SONAR.avec(cote="droite").fixer(rightSensor)
         meterAlertValue = 0.4
         isDepassed = meterTrak(meterAlertValue,rightSensor,leftSensor)
         
@@ -0,0 +1,153 @@
+"""
+Surveillance de l'équilibre du robot en tâche de fond.
+
+Un thread lit AngleX/AngleY de la centrale inertielle à fréquence fixe. Si l'inclinaison
+dépasse la limite, ou si elle évolue assez vite pour la dépasser dans l'horizon de
+prédiction, tous les mouvements en cours sont stoppés et la séquence de retour
+sécurisé est lancée immédiatement.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Optional, Tuple
+
+from ..utils import metriques, telemetrie
+
+CLE_ANGLE_X = "Device/SubDeviceList/InertialSensor/AngleX/Sensor/Value"
+CLE_ANGLE_Y = "Device/SubDeviceList/InertialSensor/AngleY/Sensor/Value"
+
+GIGUE = metriques.histogramme("boucle_gigue_secondes", "Écart entre l'instant prévu et réel d'une itération",
+                              ("boucle",), bornes=(0.0001, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05))
+INCLINAISON = metriques.jauge("inertiel_angle_radians", "Dernière inclinaison lue", ("axe",))
+
+
+class SurveillanceEquilibre(threading.Thread):
+    """
+Thread de surveillance de l'inclinaison du robot
+
+Args:
+    memory: service ALMemory
+    motion: service ALMotion (utilisé pour stopper les mouvements)
+    sur_alerte: fonction appelée une seule fois après l'arrêt des mouvements (retour sécurisé)
+    angle_max: inclinaison maximale autorisée en radians (~20°)
+    frequence: fréquence d'échantillonnage en Hz
+    horizon: durée (s) sur laquelle l'inclinaison est extrapolée avec sa vitesse
+    lissage: facteur du filtre passe-bas appliqué à la vitesse d'inclinaison (0-1)
+    """
+
+    def __init__(self, memory : Any, motion : Any, sur_alerte : Optional[Callable[[], Any]] = None,
+                 angle_max : float = 0.35, frequence : float = 50.0, horizon : float = 0.15,
+                 lissage : float = 0.3):
+        super().__init__(name="SurveillanceEquilibre", daemon=True)
+        self.memory = memory
+        self.motion = motion
+        self.sur_alerte = sur_alerte
+        self.angle_max = angle_max
+        self.periode = 1.0 / frequence
+        self.horizon = horizon
+        self.lissage = lissage
+
+        self.alerte = threading.Event()
+        self.raison = None
+        self.angles : Tuple[float, float] = (0.0, 0.0)
+        self.vitesses : Tuple[float, float] = (0.0, 0.0)
+        self.echantillons = 0
+        self.retard_max = 0.0  # plus grand retard observé sur l'échéancier (s)
+        self._fin = threading.Event()
+
+    def lire(self) -> Tuple[float, float]:
+        """Lit AngleX et AngleY en un seul appel à ALMemory"""
+        angle_x, angle_y = self.memory.getListData([CLE_ANGLE_X, CLE_ANGLE_Y])
+        return float(angle_x), float(angle_y)
+
+    def _verifier(self, angles : Tuple[float, float], vitesses : Tuple[float, float]) -> Optional[str]:
+        for axe, angle, vitesse in zip("XY", angles, vitesses):
+            if abs(angle) > self.angle_max:
+                return f"inclinaison {axe} de {angle * 57.2958:.1f}° au-delà de la limite"
+            prevu = angle + vitesse * self.horizon
+            if abs(prevu) > self.angle_max and abs(prevu) > abs(angle):
+                return f"inclinaison {axe} de {angle * 57.2958:.1f}° qui évolue à {vitesse * 57.2958:.0f}°/s"
+        return None
+
+    def _declencher(self, raison : str) -> None:
+        self.raison = raison
+        self.alerte.set()
+        print(f"\n    ⚠️  ARRÊT D'URGENCE: {raison}")
+        try:
+            self.motion.killAll()  # interrompt aussi les appels bloquants du thread principal
+        except Exception as e:
+            print(f"    ✗ Impossible de stopper les mouvements: {e}")
+        if self.sur_alerte is not None:
+            self.sur_alerte()
+
+    def run(self) -> None:
+        precedent = None
+        enregistrement = telemetrie.canal("inertiel", ("angle_x", "angle_y", "vitesse_x", "vitesse_y"))
+        gigue = GIGUE.avec(boucle="equilibre")
+        angle_x, angle_y = INCLINAISON.avec(axe="x"), INCLINAISON.avec(axe="y")
+        prochain = time.perf_counter()
+        while not self._fin.is_set():
+            gigue.observer(abs(time.perf_counter() - prochain))
+            try:
+                angles = self.lire()
+            except Exception as e:
+                print(f"    ⚠️  Erreur capteurs: {e}")
+                angles = None
+
+            maintenant = time.perf_counter()
+            if angles is not None:
+                if precedent is not None:
+                    dt = maintenant - precedent[0]
+                    if dt > 0:
+                        self.vitesses = tuple(
+                            (1.0 - self.lissage) * v + self.lissage * (a - p) / dt
+                            for v, a, p in zip(self.vitesses, angles, precedent[1]))
+                precedent = (maintenant, angles)
+                self.angles = angles
+                self.echantillons += 1
+                enregistrement.ajouter(*angles, *self.vitesses)
+                angle_x.fixer(angles[0])
+                angle_y.fixer(angles[1])
+
+                raison = self._verifier(angles, self.vitesses)
+                if raison is not None:
+                    self._declencher(raison)
+                    return
+
+            # Échéancier à période fixe (pas de dérive si une lecture est lente)
+            prochain += self.periode
+            attente = prochain - time.perf_counter()
+            if attente < 0:
+                self.retard_max = max(self.retard_max, -attente)
+                prochain = time.perf_counter()
+                attente = 0
+            self._fin.wait(attente)
+
+    def attendre(self, duree : float, annulee : Optional[threading.Event] = None) -> bool:
+        """
+Remplace time.sleep dans les séquences surveillées
+
+Args:
+    duree: durée de l'attente (s)
+    annulee: événement d'annulation de l'action (ordonnanceur), surveillé en plus de l'alerte
+
+Returns:
+    vrai si une alerte s'est déclenchée ou si l'action a été annulée pendant l'attente
+    """
+        if annulee is None:
+            return self.alerte.wait(duree)
+        fin = time.monotonic() + duree
+        while not (self.alerte.is_set() or annulee.is_set()):
+            reste = fin - time.monotonic()
+            if reste <= 0:
+                return False
+            self.alerte.wait(min(reste, 0.02))
+        return True
+
+    def arreter(self) -> None:
+        """Arrête la surveillance (attend la fin du retour sécurisé si une alerte est en cours)"""
+        self._fin.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout=None if self.alerte.is_set() else 1.0)
+
+if __name__ == '__main__' : pass
@@ -8,6 +8,12 @@ Description: Conversation interactive en français avec NAO
 
 import time
 import qi
+from .cache_parole import CacheParole
+from .intentions import MoteurIntentions
+from ..utils import metriques, telemetrie
+
+MOTS = metriques.compteur("asr_mots_total", "Mots reconnus avec une confiance suffisante")
+CONFIANCE = metriques.jauge("asr_confiance", "Confiance du dernier mot reconnu")
 
 
 def voice_recognition_sprint1(session):
@@ -46,35 +52,23 @@ def voice_recognition_sprint1(session):
     asr.setLanguage("French")
     print(" Langue configurée: Français")
     
-    # Définition du vocabulaire (mots-clés courts pour meilleure fiabilité)
-    vocabulary = [
-        "bonjour",
-        "ça va",
-        "projet", 
-        "merci",
-        "moi",
-        "qui est junior ?",
-        "au revoir"
-    ]
+    # Vocabulaire et réponses chargés depuis intentions.csv (index construit une seule fois)
+    intentions = MoteurIntentions.depuis_csv()
+    vocabulary = intentions.vocabulaire()
     
-    asr.setVocabulary(vocabulary, False)
-    print(f" Vocabulaire chargé: {', '.join(vocabulary)}")
+    intentions.pousser_vocabulaire(asr)
+    print(f" Vocabulaire chargé: {len(vocabulary)} phrases, {len(intentions.reponses)} intentions")
     
     # Démarrer la reconnaissance vocale
     asr.subscribe("VoiceRecog_Sprint1")
     print(" Reconnaissance vocale activée")
     print("\n NAO est à l'écoute... Parlez maintenant!\n")
     
-    # Dictionnaire des réponses
-    responses = {
-        "bonjour": "Bonjour, j'espère que tu vas bien ?",
-        "ça va": "Malgré quelques difficultés de la vie, ça va, je tiens le coup",
-        "projet": "L'équipe composée de 10 membres doit me programmer afin que je puisse identifier un individu en fonction des caractéristiques qui me seront fournies. J'espère que j'ai été assez clair Junior ?",
-        "merci": "Tu as encore besoin d'une information ?",
-        "moi": "Lamaro Salif Junior, jeune homme portant des lunettes et qui se trouve actuellement trop proche de mon oreille. Peux-tu te décaler s'il te plait ?",
-        "qui est junior ?": "Lamaro Salif Junior, jeune homme portant des lunettes et qui se trouve actuellement trop proche de mon oreille. Peux-tu te décaler s'il te plait ?",
-        "au revoir": "Bonne journée Junior"
-    }
+    # Réponses pré-rendues : lecture asynchrone, l'écoute continue pendant que NAO parle
+    parole = CacheParole.pour(session)
+    parole.precharger(set(intentions.reponses.values()))
+    lecture = None
+    enregistrement = telemetrie.canal("asr", ("confiance", "score_intention"))
     
     # Boucle d'écoute (60 secondes = 120 itérations x 0.5s)
     conversation_active = True
@@ -99,14 +93,18 @@ def voice_recognition_sprint1(session):
             if confidence > 0.4 and word != last_word:
                 print(f"\n Mot reconnu: '{word}' (confiance: {confidence*100:.0f}%)")
                 
-                # Trouver et dire la réponse appropriée
-                if word in responses:
-                    response = responses[word]
+                # Trouver l'intention (correspondance approximative) et dire la réponse
+                resultat = intentions.resoudre(word)
+                enregistrement.ajouter(confidence, resultat[1] if resultat else 0.0)
+                MOTS.inc()
+                CONFIANCE.fixer(confidence)
+                response = intentions.reponse(resultat[0]) if resultat else None
+                if response:
                     print(f" NAO dit: \"{response}\"")
-                    tts.say(response)
+                    lecture = parole.dire(response)
                     
                     # Si c'est "au revoir", terminer la conversation
-                    if word == "au revoir":
+                    if resultat[0] == "au_revoir":
                         print("\n Conversation terminée")
                         conversation_active = False
                     
@@ -114,6 +112,10 @@ def voice_recognition_sprint1(session):
                 else:
                     print(f" Mot reconnu mais pas de réponse programmée pour: '{word}'")
     
+    # Laisser finir la dernière réponse
+    if lecture is not None:
+        lecture.wait()
+    
     # Arrêter la reconnaissance vocale
     asr.unsubscribe("VoiceRecog_Sprint1")
     print("\n Reconnaissance vocale désactivée")
@@ -2,4 +2,4 @@
 Modules donnant de multiples fonctions utilitaires au projets
 """
 
-__all__ = ["getInfo","subcriber"]
\ No newline at end of file
+__all__ = ["getInfo","subcriber","lazy_import","import_budget","telemetrie","metriques","camera_adaptative","flotte","index_api","horodatage_images","apercu","espace_couleur","asynchrone"]
@@ -0,0 +1,318 @@
+"""
+Module d'affichage découplé du traitement d'image (mode sans affichage + visionneuse séparée).
+
+Les boucles de traitement appellent apercu.afficher(titre, image) à la place de
+cv2.imshow + cv2.waitKey. Selon le mode (variable d'environnement NAO_AFFICHAGE) :
+
+    fenetre : comportement historique, cv2.imshow dans le processus de traitement
+    apercu  : aucune fenêtre ; l'image est copiée (au plus fps_max fois par seconde) dans une
+              mémoire partagée bornée, qu'un processus visionneuse séparé affiche
+    aucun   : rien n'est affiché ni copié
+
+Par défaut le mode est « fenetre » si un affichage est disponible, « apercu » sinon
+(Docker, serveur, robot). Le traitement ne touche jamais à l'interface graphique en mode
+apercu et ne ralentit pas si la visionneuse est lente : elle ne lit que la dernière image
+publiée et saute les autres.
+
+Visionneuse (fenêtre locale, ou flux MJPEG pour un navigateur sur un autre poste):
+    python -m scripts.utils.apercu "Detection du rouge"
+    python -m scripts.utils.apercu "Detection du rouge" --http 8081 --fps 10
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import shared_memory
+from typing import Dict, Optional
+
+import numpy as np
+from .lazy_import import lazy_import
+
+cv2 = lazy_import("cv2")
+
+LARGEUR_MAX = 640
+HAUTEUR_MAX = 480
+EMPLACEMENTS = 3
+
+# En-tête commun (int64) : compteur d'images, emplacement le plus récent, demande d'arrêt
+_COMPTEUR, _COURANT, _ARRET, _TAILLE_ENTETE = 0, 1, 2, 8
+# En-tête de chaque emplacement (int64) : séquence (impaire pendant l'écriture), hauteur, largeur, canaux
+_SEQUENCE, _HAUTEUR, _LARGEUR, _CANAUX, _TAILLE_EMPLACEMENT = 0, 1, 2, 3, 4
+
+
+def nom_memoire(titre : str) -> str:
+    return "nao_apercu_" + re.sub(r"[^A-Za-z0-9]+", "_", titre).strip("_").lower()
+
+
+def mode_par_defaut() -> str:
+    mode = os.environ.get("NAO_AFFICHAGE")
+    if mode:
+        return mode
+    if sys.platform.startswith("win") or sys.platform == "darwin" or os.environ.get("DISPLAY"):
+        return "fenetre"
+    return "apercu"
+
+
+class CanalApercu:
+    """
+Mémoire partagée contenant les dernières images d'aperçu
+
+Args:
+    titre: nom du flux (sert à nommer la mémoire partagée)
+    creer: vrai côté traitement, faux côté visionneuse
+    emplacements: nombre d'images gardées (la visionneuse lit la plus récente)
+    """
+
+    def __init__(self, titre : str, creer : bool = True, emplacements : int = EMPLACEMENTS):
+        self.titre = titre
+        self.taille_image = HAUTEUR_MAX * LARGEUR_MAX * 3
+        taille = 8 * (_TAILLE_ENTETE + emplacements * _TAILLE_EMPLACEMENT) + emplacements * self.taille_image
+        nom = nom_memoire(titre)
+        if creer:
+            try:
+                self.memoire = shared_memory.SharedMemory(nom, create=True, size=taille)
+            except FileExistsError:
+                # Reste d'une exécution interrompue : on la réutilise
+                self.memoire = shared_memory.SharedMemory(nom)
+        else:
+            self.memoire = shared_memory.SharedMemory(nom)
+            try:
+                # La visionneuse ne doit pas détruire la mémoire en quittant (Python < 3.13)
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(self.memoire._name, "shared_memory")
+            except Exception:
+                pass
+        self.createur = creer
+        self.emplacements = emplacements
+        self.entete = np.ndarray((_TAILLE_ENTETE,), dtype=np.int64, buffer=self.memoire.buf)
+        self.entetes = np.ndarray((emplacements, _TAILLE_EMPLACEMENT), dtype=np.int64,
+                                  buffer=self.memoire.buf, offset=8 * _TAILLE_ENTETE)
+        debut = 8 * (_TAILLE_ENTETE + emplacements * _TAILLE_EMPLACEMENT)
+        self.images = np.ndarray((emplacements, self.taille_image), dtype=np.uint8,
+                                 buffer=self.memoire.buf, offset=debut)
+        if creer:
+            self.entete[:] = 0
+            self.entetes[:] = 0
+
+    def publier(self, image : np.ndarray) -> None:
+        """Copie l'image (réduite si besoin) dans l'emplacement suivant"""
+        hauteur, largeur = image.shape[:2]
+        if hauteur > HAUTEUR_MAX or largeur > LARGEUR_MAX:
+            echelle = min(HAUTEUR_MAX / hauteur, LARGEUR_MAX / largeur)
+            image = cv2.resize(image, (int(largeur * echelle), int(hauteur * echelle)), interpolation=cv2.INTER_AREA)
+        if image.ndim == 2:
+            image = image[:, :, None]
+        hauteur, largeur, canaux = image.shape
+        i = (int(self.entete[_COURANT]) + 1) % self.emplacements
+        entete = self.entetes[i]
+        entete[_SEQUENCE] += 1  # impaire : écriture en cours
+        entete[_HAUTEUR], entete[_LARGEUR], entete[_CANAUX] = hauteur, largeur, canaux
+        self.images[i, :image.size] = image.reshape(-1)
+        entete[_SEQUENCE] += 1
+        self.entete[_COURANT] = i
+        self.entete[_COMPTEUR] += 1
+
+    def lire(self) -> Optional[np.ndarray]:
+        """Copie de l'image la plus récente, ou None si elle était en cours d'écriture"""
+        i = int(self.entete[_COURANT])
+        entete = self.entetes[i]
+        sequence = int(entete[_SEQUENCE])
+        if sequence == 0 or sequence % 2:
+            return None
+        hauteur, largeur, canaux = (int(v) for v in entete[_HAUTEUR:_CANAUX + 1])
+        image = self.images[i, :hauteur * largeur * canaux].copy().reshape((hauteur, largeur, canaux))
+        if int(entete[_SEQUENCE]) != sequence:
+            return None  # réécrite pendant la copie
+        return image
+
+    @property
+    def compteur(self) -> int:
+        return int(self.entete[_COMPTEUR])
+
+    @property
+    def arret_demande(self) -> bool:
+        return bool(self.entete[_ARRET])
+
+    def demander_arret(self) -> None:
+        self.entete[_ARRET] = 1
+
+    def fermer(self) -> None:
+        # Les vues numpy doivent être libérées avant de fermer la mémoire
+        del self.entete, self.entetes, self.images
+        self.memoire.close()
+        if self.createur:
+            try:
+                self.memoire.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class Apercu:
+    """
+Affichage des boucles de traitement selon le mode choisi
+
+Args:
+    mode: "fenetre", "apercu" ou "aucun" (mode_par_defaut() si None)
+    fps_max: fréquence maximale de publication des images en mode apercu
+    """
+
+    def __init__(self, mode : Optional[str] = None, fps_max : float = 15.0):
+        self.mode = mode or mode_par_defaut()
+        self.periode = 1.0 / fps_max
+        self._canaux : Dict[str, CanalApercu] = {}
+        self._derniere : Dict[str, float] = {}
+
+    def afficher(self, titre : str, image : np.ndarray, attente : int = 1) -> int:
+        """
+Affiche (ou publie) une image
+
+Args:
+    titre: titre de la fenêtre / nom du flux d'aperçu
+    image: image BGR ou masque
+    attente: délai cv2.waitKey (ms) en mode fenetre
+
+Returns:
+    code de la touche pressée (ord('q') si la visionneuse a demandé l'arrêt), -1 sinon
+    """
+        if self.mode == "fenetre":
+            cv2.imshow(titre, image)
+            return cv2.waitKey(attente)
+        if self.mode != "apercu":
+            return -1
+
+        canal = self._canaux.get(titre)
+        if canal is None:
+            canal = CanalApercu(titre)
+            self._canaux[titre] = canal
+            print(f"Aperçu « {titre} » : python -m scripts.utils.apercu \"{titre}\" [--http 8081]")
+        if canal.arret_demande:
+            return ord('q')
+        maintenant = time.perf_counter()
+        if maintenant - self._derniere.get(titre, 0.0) >= self.periode:
+            self._derniere[titre] = maintenant
+            canal.publier(image)
+        return -1
+
+    def fermer(self) -> None:
+        if self.mode == "fenetre":
+            cv2.destroyAllWindows()
+        for canal in self._canaux.values():
+            canal.fermer()
+        self._canaux.clear()
+
+
+# Affichage partagé par les boucles du projet
+_actif : Optional[Apercu] = None
+
+
+def configurer(mode : Optional[str] = None, fps_max : float = 15.0) -> Apercu:
+    """Choisit le mode d'affichage (à appeler avant la première image pour changer le défaut)"""
+    global _actif
+    if _actif is not None:
+        _actif.fermer()
+    _actif = Apercu(mode, fps_max)
+    return _actif
+
+
+def afficher(titre : str, image : np.ndarray, attente : int = 1) -> int:
+    """Remplace cv2.imshow + cv2.waitKey dans les boucles de traitement"""
+    if _actif is None:
+        configurer()
+    return _actif.afficher(titre, image, attente)
+
+
+def fermer() -> None:
+    """Remplace cv2.destroyAllWindows"""
+    global _actif
+    if _actif is not None:
+        _actif.fermer()
+        _actif = None
+
+
+def _attacher(titre : str, delai : float = 30.0) -> CanalApercu:
+    fin = time.time() + delai
+    while True:
+        try:
+            return CanalApercu(titre, creer=False)
+        except FileNotFoundError:
+            if time.time() > fin:
+                raise
+            time.sleep(0.5)
+
+
+def visionneuse(titre : str, fps_max : float = 15.0) -> None:
+    """Affiche le flux d'aperçu dans une fenêtre ; 'q' demande l'arrêt au traitement"""
+    canal = _attacher(titre)
+    vu = -1
+    try:
+        while True:
+            debut = time.perf_counter()
+            if canal.compteur != vu:
+                image = canal.lire()
+                if image is not None:
+                    vu = canal.compteur
+                    cv2.imshow(titre, image)
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                canal.demander_arret()
+                break
+            time.sleep(max(0.0, 1.0 / fps_max - (time.perf_counter() - debut)))
+    finally:
+        cv2.destroyAllWindows()
+        canal.fermer()
+
+
+def serveur_mjpeg(titre : str, port : int, fps_max : float = 10.0, adresse : str = "0.0.0.0") -> None:
+    """Sert le flux d'aperçu en MJPEG sur http://<adresse>:<port>/ (visible depuis un autre poste)"""
+    canal = _attacher(titre)
+
+    class Gestionnaire(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "multipart/x-mixed-replace; boundary=image")
+            self.end_headers()
+            vu = -1
+            try:
+                while True:
+                    debut = time.perf_counter()
+                    if canal.compteur != vu:
+                        image = canal.lire()
+                        if image is not None:
+                            vu = canal.compteur
+                            ok, jpeg = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 70])
+                            if ok:
+                                self.wfile.write(b"--image\r\nContent-Type: image/jpeg\r\n"
+                                                 + f"Content-Length: {len(jpeg)}\r\n\r\n".encode()
+                                                 + jpeg.tobytes() + b"\r\n")
+                    time.sleep(max(0.0, 1.0 / fps_max - (time.perf_counter() - debut)))
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def log_message(self, format, *args):
+            pass
+
+    serveur = ThreadingHTTPServer((adresse, port), Gestionnaire)
+    print(f"Aperçu « {titre} » sur http://{adresse}:{port}/")
+    try:
+        serveur.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        serveur.server_close()
+        canal.fermer()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Visionneuse des aperçus publiés par les boucles de traitement.")
+    parser.add_argument("titre", help="Titre du flux (ex: \"Detection du rouge\")")
+    parser.add_argument("--fps", type=float, default=15.0, help="Fréquence d'affichage maximale")
+    parser.add_argument("--http", type=int, default=None,
+                        help="Sert le flux en MJPEG sur ce port au lieu d'ouvrir une fenêtre")
+    args = parser.parse_args()
+    if args.http:
+        serveur_mjpeg(args.titre, args.http, args.fps)
+    else:
+        visionneuse(args.titre, args.fps)
@@ -0,0 +1,224 @@
+"""
+Module reliant les futures et signaux de qi à asyncio.
+
+Les appels NAOqi faits avec _async=True retournent un qi.Future, terminé dans un thread de qi ;
+attendre() le transforme en objet attendable par la boucle asyncio (et annule le qi.Future si
+la tâche qui l'attend est annulée). Les événements ALMemory arrivent par evenement(), un
+itérateur asynchrone à file bornée bâti sur GestionnaireAbonnements. Le code bloquant
+(OpenCV, numpy) passe par executer(), qui le lance dans le pool de threads de la boucle.
+
+Superviseur regroupe les tâches d'un processus : chacune a un nom, une erreur dans l'une est
+comptée et affichée sans arrêter les autres, et arreter() annule tout puis attend que chaque
+tâche ait fini son nettoyage (blocs finally).
+
+    async def sonar(session, arret):
+        memoire = session.service("ALMemory")
+        while not arret.is_set():
+            gauche, droite = await appeler(memoire, "getListData", [CLE_GAUCHE, CLE_DROITE])
+            ...
+"""
+
+import asyncio
+import collections
+import contextlib
+import functools
+import signal
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Optional
+
+from . import metriques
+from .subricber import GestionnaireAbonnements
+
+ECHECS = metriques.compteur("runtime_taches_echouees_total", "Tâches terminées sur une erreur", ("tache",))
+PERDUS = metriques.compteur("runtime_evenements_perdus_total",
+                            "Événements abandonnés car la tâche asynchrone ne suivait pas", ("evenement",))
+
+
+def _transferer(future_qi : Any, future : asyncio.Future) -> None:
+    # Exécuté dans la boucle asyncio
+    if future.done():
+        return
+    if future_qi.isCanceled():
+        future.cancel()
+    elif future_qi.hasError():
+        future.set_exception(RuntimeError(future_qi.error()))
+    else:
+        future.set_result(future_qi.value())
+
+
+async def attendre(future_qi : Any) -> Any:
+    """
+Attend un qi.Future sans bloquer la boucle
+
+Returns:
+    la valeur du qi.Future ; RuntimeError s'il s'est terminé en erreur
+    """
+    boucle = asyncio.get_running_loop()
+    future = boucle.create_future()
+    future_qi.addCallback(lambda f: boucle.call_soon_threadsafe(_transferer, f, future))
+    try:
+        return await future
+    except asyncio.CancelledError:
+        try:
+            future_qi.cancel()
+        except Exception:
+            pass
+        raise
+
+
+async def appeler(service : Any, methode : str, *args : Any) -> Any:
+    """Appel asynchrone d'une méthode NAOqi : await appeler(motion, "getAngles", "Head", True)"""
+    return await attendre(getattr(service, methode)(*args, _async=True))
+
+
+async def executer(fonction : Callable[..., Any], *args : Any, **kwargs : Any) -> Any:
+    """Exécute une fonction bloquante dans le pool de threads de la boucle"""
+    return await asyncio.get_running_loop().run_in_executor(None, functools.partial(fonction, *args, **kwargs))
+
+
+class Flux:
+    """
+File asynchrone alimentée depuis n'importe quel thread ; la valeur la plus ancienne est
+abandonnée quand la file est pleine (comme GestionnaireAbonnements)
+
+Args:
+    nom: nom du flux (étiquette des métriques)
+    file_max: nombre maximal de valeurs en attente
+    """
+
+    def __init__(self, nom : str, file_max : int = 16):
+        self.nom = nom
+        self.file_max = file_max
+        self.perdus = 0
+        self._boucle = asyncio.get_running_loop()
+        self._file : Deque[Any] = collections.deque()
+        self._disponible = asyncio.Event()
+        self._ferme = False
+
+    def pousser(self, valeur : Any) -> None:
+        """Dépose une valeur (appelable depuis n'importe quel thread)"""
+        self._boucle.call_soon_threadsafe(self._ajouter, valeur)
+
+    def _ajouter(self, valeur : Any) -> None:
+        if self._ferme:
+            return
+        if len(self._file) >= self.file_max:
+            self._file.popleft()
+            self.perdus += 1
+            PERDUS.avec(evenement=self.nom).inc()
+        self._file.append(valeur)
+        self._disponible.set()
+
+    def fermer(self) -> None:
+        self._ferme = True
+        self._disponible.set()
+
+    def __aiter__(self) -> "Flux":
+        return self
+
+    async def __anext__(self) -> Any:
+        while not self._file:
+            if self._ferme:
+                raise StopAsyncIteration
+            self._disponible.clear()
+            await self._disponible.wait()
+        return self._file.popleft()
+
+
+@contextlib.asynccontextmanager
+async def evenement(session : Any, nom : str, file_max : int = 16) -> AsyncIterator[Flux]:
+    """
+Flux des valeurs d'un événement ALMemory, désabonné à la sortie du bloc
+
+    async with evenement(session, "WordRecognized") as mots:
+        async for valeur in mots:
+            ...
+    """
+    flux = Flux(nom, file_max)
+    # Même capacité côté gestionnaire : une rafale tenue par le flux ne doit pas être perdue avant lui
+    abonnement = GestionnaireAbonnements.pour(session).abonner(nom, flux.pousser, file_max=file_max)
+    try:
+        yield flux
+    finally:
+        abonnement.desabonner()
+        flux.fermer()
+
+
+async def periodique(periode : float, arret : asyncio.Event) -> AsyncIterator[float]:
+    """Cadence fixe (sans dérive) jusqu'à ce que arret soit positionné ; donne l'heure de chaque tick"""
+    prochain = time.monotonic()
+    while not arret.is_set():
+        yield prochain
+        prochain += periode
+        attente = prochain - time.monotonic()
+        if attente < 0:
+            prochain = time.monotonic()  # en retard : on ne rattrape pas les ticks manqués
+            attente = 0
+        try:
+            await asyncio.wait_for(arret.wait(), attente)
+        except asyncio.TimeoutError:
+            pass
+
+
+class Superviseur:
+    """
+Tâches asyncio d'un processus, avec arrêt propre
+
+Args:
+    delai_arret: durée (s) laissée aux tâches pour se nettoyer après leur annulation
+    """
+
+    def __init__(self, delai_arret : float = 5.0):
+        self.delai_arret = delai_arret
+        self.arret = asyncio.Event()
+        self.taches : Dict[str, asyncio.Task] = {}
+        self.erreurs : Dict[str, BaseException] = {}
+
+    def lancer(self, nom : str, coroutine : Awaitable[Any]) -> asyncio.Task:
+        tache = asyncio.ensure_future(self._surveiller(nom, coroutine))
+        tache.set_name(nom)
+        self.taches[nom] = tache
+        return tache
+
+    async def _surveiller(self, nom : str, coroutine : Awaitable[Any]) -> Any:
+        try:
+            return await coroutine
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.erreurs[nom] = e
+            ECHECS.avec(tache=nom).inc()
+            print(f"✗ Tâche {nom} arrêtée sur une erreur : {e!r}")
+
+    def installer_signaux(self) -> None:
+        """SIGINT et SIGTERM demandent l'arrêt (si la plateforme le permet, sinon KeyboardInterrupt)"""
+        boucle = asyncio.get_running_loop()
+        for numero in (signal.SIGINT, signal.SIGTERM):
+            try:
+                boucle.add_signal_handler(numero, self.arret.set)
+            except (NotImplementedError, RuntimeError):
+                pass
+
+    async def attendre(self, duree : Optional[float] = None) -> None:
+        """Attend une demande d'arrêt, la fin de toutes les tâches, ou duree secondes"""
+        fin_taches = asyncio.ensure_future(asyncio.wait(list(self.taches.values())))
+        demande = asyncio.ensure_future(self.arret.wait())
+        await asyncio.wait([fin_taches, demande], timeout=duree, return_when=asyncio.FIRST_COMPLETED)
+        fin_taches.cancel()
+        demande.cancel()
+
+    async def arreter(self) -> None:
+        """Prévient les tâches, les annule si elles ne s'arrêtent pas d'elles-mêmes puis attend leur nettoyage"""
+        self.arret.set()
+        en_cours = [t for t in self.taches.values() if not t.done()]
+        if not en_cours:
+            return
+        _, restantes = await asyncio.wait(en_cours, timeout=1.0)
+        for tache in restantes:
+            tache.cancel()
+        if restantes:
+            _, bloquees = await asyncio.wait(restantes, timeout=self.delai_arret)
+            for tache in bloquees:
+                print(f"✗ Tâche {tache.get_name()} toujours en cours après l'arrêt")
+
+if __name__ == '__main__' : pass
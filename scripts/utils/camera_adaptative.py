@@ -0,0 +1,199 @@
+"""
+Module ajustant la résolution et la fréquence de la caméra à ce que le traitement peut suivre.
+
+Le contrôleur mesure le temps de traitement de chaque image et la latence de bout en bout
+(horodatage ALVideoDevice -> fin du traitement). Il se réabonne à ALVideoDevice au niveau
+(résolution, fps) le plus élevé que le traitement tient, avec une hystérésis (seuils de
+montée et de descente distincts + durée minimale entre deux changements) pour ne pas osciller,
+et redescend quand la charge CPU des autres processus augmente.
+
+La montée exige aussi une latence basse : quand le goulot est le réseau, le temps de
+traitement seul ferait remonter aussitôt. Un niveau quitté sur un échec n'est retenté
+qu'après une attente qui double à chaque nouvel échec (oubliée une fois le niveau tenu).
+"""
+
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# Niveaux (résolution ALVideoDevice, fps) du moins au plus coûteux
+# résolution : 0 = 160x120, 1 = 320x240, 2 = 640x480, 3 = 1280x960
+NIVEAUX = [(0, 15), (1, 15), (1, 30), (2, 15), (2, 30), (3, 15)]
+PIXELS = {0: 160 * 120, 1: 320 * 240, 2: 640 * 480, 3: 1280 * 960}
+
+
+class ControleurCamera:
+    """
+Abonnement caméra à qualité adaptative
+
+Args:
+    video_service: service ALVideoDevice
+    camera_index: 0 = caméra du haut, 1 = caméra du bas
+    color_space: espace couleur ALVideoDevice (11 = RGB)
+    niveaux: liste de (résolution, fps) triée par coût croissant
+    niveau: indice du niveau de départ
+    charge_montee: part du budget d'une image (1/fps) sous laquelle on peut monter d'un niveau
+                   (estimée pour le niveau supérieur)
+    charge_descente: part du budget au-dessus de laquelle on descend d'un niveau
+    latence_max: latence de bout en bout (s, au-delà du minimum observé) déclenchant une descente
+    charge_cpu_max: charge système (load average / nombre de cœurs) déclenchant une descente
+    delai_min: durée minimale (s) entre deux changements de niveau
+    attente_max: attente maximale (s) avant de retenter un niveau qui a échoué
+    """
+
+    def __init__(self, video_service : Any, camera_index : int = 0, color_space : int = 11,
+                 niveaux : List[Tuple[int, int]] = NIVEAUX, niveau : int = 1,
+                 charge_montee : float = 0.5, charge_descente : float = 0.9, latence_max : float = 0.15,
+                 charge_cpu_max : float = 0.85, delai_min : float = 3.0, attente_max : float = 120.0,
+                 nom : str = "CameraAdaptative"):
+        self.video_service = video_service
+        self.camera_index = camera_index
+        self.color_space = color_space
+        self.niveaux = niveaux
+        self.niveau = niveau
+        self.charge_montee = charge_montee
+        self.charge_descente = charge_descente
+        self.latence_max = latence_max
+        self.charge_cpu_max = charge_cpu_max
+        self.delai_min = delai_min
+        self.attente_max = attente_max
+        self.nom = nom
+        self.name_id = None
+        self.changements = 0
+        # Conservé d'un abonnement à l'autre : un retard présent dès le réabonnement reste visible
+        self._decalage_min = None
+        self._echecs : Dict[int, int] = {}  # niveau -> nombre d'échecs consécutifs
+        self._retente : Dict[int, float] = {}  # niveau -> instant à partir duquel le retenter
+        self._reinitialiser_mesures()
+
+    def _reinitialiser_mesures(self) -> None:
+        self.temps_traitement = None  # moyenne glissante (s)
+        self.latence = None  # moyenne glissante, au-delà du décalage d'horloge minimal (s)
+        self._images = 0
+        self._perimees = 0  # images abandonnées car trop vieilles (seule leur latence est connue)
+        self._dernier_changement = time.time()
+
+    @property
+    def resolution(self) -> int:
+        return self.niveaux[self.niveau][0]
+
+    @property
+    def fps(self) -> int:
+        return self.niveaux[self.niveau][1]
+
+    def abonner(self) -> str:
+        """(Ré)abonne la caméra au niveau courant et retourne l'identifiant d'abonnement"""
+        if self.name_id is not None:
+            self.video_service.unsubscribe(self.name_id)
+        self.name_id = self.video_service.subscribeCamera(self.nom, self.camera_index, self.resolution,
+                                                          self.color_space, self.fps)
+        self._reinitialiser_mesures()
+        return self.name_id
+
+    def desabonner(self) -> None:
+        if self.name_id is not None:
+            self.video_service.unsubscribe(self.name_id)
+            self.name_id = None
+
+    def image(self) -> Optional[list]:
+        """getImageRemote sur l'abonnement courant"""
+        return self.video_service.getImageRemote(self.name_id)
+
+    def mesurer(self, duree_traitement : float, image : Optional[list] = None, lissage : float = 0.1,
+                latence : Optional[float] = None) -> None:
+        """
+Enregistre les mesures d'une image traitée
+
+Args:
+    duree_traitement: temps passé à traiter l'image (s)
+    image: résultat de getImageRemote (ses champs 4 et 5 donnent l'horodatage de capture)
+    lissage: facteur des moyennes glissantes
+    latence: latence capture -> résultat déjà mesurée (ImageDatee.terminer), à la place de image
+    """
+        self._images += 1
+        if self.temps_traitement is None:
+            self.temps_traitement = duree_traitement
+        else:
+            self.temps_traitement += lissage * (duree_traitement - self.temps_traitement)
+
+        if latence is not None:
+            self._lisser_latence(latence, lissage)
+        elif image is not None and len(image) > 5:
+            # Les horloges du robot et du PC ne sont pas synchronisées : on mesure la latence
+            # au-delà du plus petit écart observé, ce qui suffit à voir une file qui se remplit
+            decalage = time.time() - (image[4] + image[5] * 1e-6)
+            if self._decalage_min is None or decalage < self._decalage_min:
+                self._decalage_min = decalage
+            retard = decalage - self._decalage_min
+            self._lisser_latence(retard, lissage)
+
+    def noter_latence(self, latence : float, lissage : float = 0.1) -> None:
+        """Latence d'une image abandonnée car trop vieille (s) : comptée comme une mesure"""
+        self._perimees += 1
+        self._lisser_latence(latence, lissage)
+
+    def _lisser_latence(self, latence : float, lissage : float) -> None:
+        self.latence = latence if self.latence is None else self.latence + lissage * (latence - self.latence)
+
+    @staticmethod
+    def charge_cpu() -> float:
+        """Charge système moyenne sur une minute, rapportée au nombre de cœurs"""
+        try:
+            return os.getloadavg()[0] / (os.cpu_count() or 1)
+        except (AttributeError, OSError):
+            return 0.0
+
+    def ajuster(self) -> bool:
+        """
+Change de niveau si nécessaire (à appeler après chaque mesurer)
+
+Returns:
+    vrai si la caméra a été réabonnée à un autre niveau
+    """
+        # Les images trop vieilles comptent : sans elles, un niveau où aucune image n'arrive
+        # à temps ne serait jamais quitté
+        if self._images + self._perimees < 10:
+            return False
+        maintenant = time.time()
+        if maintenant - self._dernier_changement < self.delai_min:
+            return False
+        if maintenant - self._dernier_changement > 10 * self.delai_min:
+            self._echecs.pop(self.niveau, None)  # niveau tenu durablement
+
+        charge = (self.temps_traitement or 0.0) * self.fps  # part du budget d'une image utilisée
+        trop_lent = charge > self.charge_descente
+        en_retard = self.latence is not None and self.latence > self.latence_max
+        cpu_occupe = self.charge_cpu() > self.charge_cpu_max
+
+        latence_basse = self.latence is None or self.latence < self.latence_max / 2
+
+        nouveau = self.niveau
+        if (trop_lent or en_retard or cpu_occupe) and self.niveau > 0:
+            nouveau = self.niveau - 1
+            if not cpu_occupe:
+                # Échec propre au niveau : attente doublée avant de le retenter
+                echecs = self._echecs.get(self.niveau, 0) + 1
+                self._echecs[self.niveau] = echecs
+                self._retente[self.niveau] = maintenant + min(self.delai_min * 2 ** echecs, self.attente_max)
+        elif (not cpu_occupe and latence_basse and self.temps_traitement is not None
+              and self.niveau + 1 < len(self.niveaux)
+              and maintenant >= self._retente.get(self.niveau + 1, 0.0)):
+            # Temps de traitement supposé proportionnel au nombre de pixels
+            suivant = self.niveau + 1
+            r_act, _ = self.niveaux[self.niveau]
+            r_suiv, fps_suiv = self.niveaux[suivant]
+            temps_estime = self.temps_traitement * PIXELS.get(r_suiv, 1) / PIXELS.get(r_act, 1)
+            if temps_estime * fps_suiv < self.charge_montee:
+                nouveau = suivant
+
+        if nouveau == self.niveau:
+            return False
+        raison = "monte" if nouveau > self.niveau else "descend"
+        self.niveau = nouveau
+        self.changements += 1
+        self.abonner()
+        print(f"Caméra : qualité {raison} -> résolution {self.resolution}, {self.fps} fps "
+              f"(traitement {charge * 100:.0f}% du budget)")
+        return True
+
+if __name__ == '__main__' : pass
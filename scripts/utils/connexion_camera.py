@@ -1,12 +1,32 @@
-import cv2
+import time
 import numpy as np
 from scripts.ia_module.traitement_image import detectionRouge
+from scripts.utils import apercu, metriques
+from scripts.utils.camera_adaptative import ControleurCamera
+from scripts.utils.espace_couleur import RGB, YUV422
+from scripts.utils.horodatage_images import SourceImages
+from scripts.utils.lazy_import import lazy_import
 
-def connexionCamera(session):
+cv2 = lazy_import("cv2")
+
+# Métriques de la boucle vision (exposées par metriques.demarrer_serveur)
+IMAGES = metriques.compteur("vision_images_total", "Images traitées par la boucle vision")
+IMAGES_PERDUES = metriques.compteur("vision_images_perdues_total", "Images non reçues (getImageRemote vide)")
+FPS = metriques.jauge("vision_fps", "Fréquence d'image de la boucle vision (moyenne glissante)")
+
+def connexionCamera(session, adaptatif=True, age_max=0.25, exportateur=None, label="", yuv422=False):
+    """
+    Affiche la détection du rouge sur le flux de la caméra du robot.
+    Si adaptatif est vrai, la résolution et la fréquence suivent ce que le traitement peut tenir.
+    Les images plus vieilles que age_max secondes (depuis leur capture) sont abandonnées.
+    Si un exportateur est donné (ia_module.jeu_donnees), les images 224x224 y sont enregistrées avec label.
+    Si yuv422 est vrai, les images arrivent dans le format natif du capteur (2 octets par pixel au lieu de 3)
+    et sont décodées côté PC (voir utils/espace_couleur).
+    """
     video_service = session.service("ALVideoDevice")
     # Camera settings
     resolution = 1  # VGA (640x480)
-    color_space = 11  # RGB
+    color_space = YUV422 if yuv422 else RGB
     fps = 30
     camera_index = 1  # Use 0 or 1 depending on which one works
 
@@ -24,30 +44,70 @@ def connexionCamera(session):
             print("Erreur lors du desabonnement de", name, ":", e)
 
     # Subscribe
-    name_id = ""
-    name_id = video_service.subscribeCamera(name_id, camera_index, resolution, color_space, fps)
+    if adaptatif:
+        controleur = ControleurCamera(video_service, camera_index, color_space, niveau=2)
+        name_id = controleur.abonner()
+    else:
+        controleur = None
+        name_id = ""
+        name_id = video_service.subscribeCamera(name_id, camera_index, resolution, color_space, fps)
     print("Subscribed to camera:", name_id)
 
+    # Chaque image garde son instant de capture ; chaque étape marque sa sortie
+    source = SourceImages(video_service, name_id, "connexion_camera", age_max,
+                          etapes=("conversion", "seuillage", "affichage"), espace=color_space)
+    fps_moyen = 0.0
+    precedent = time.perf_counter()
+
     while True:
-        image = video_service.getImageRemote(name_id)
+        vides = source.vides
+        image = source.lire()
         if image is None:
-            print("No image.")
+            if source.vides != vides:
+                IMAGES_PERDUES.inc()
+                print("No image.")
+            elif controleur is not None:
+                # Image trop vieille : le contrôleur doit quand même voir le retard
+                controleur.noter_latence(source.age_derniere)
+                if controleur.ajuster():
+                    name_id = source.name_id = controleur.name_id
             continue
 
-        width, height = image[0], image[1]
-        array = image[6]
-        img = np.frombuffer(array, dtype=np.uint8).reshape((height, width, 3))
+        debut_traitement = time.perf_counter()
+        couleur = image.couleur()
+        img2 = couleur.bgr
+        image.marquer("conversion")
+        if image.perimee():
+            if controleur is not None:
+                controleur.noter_latence(image.age())
+            continue
 
-        img2 = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
         result = detectionRouge(img2)
+        image.marquer("seuillage")
         
-        cv2.imshow("Detection du rouge", result)
+        # Fenêtre, ou aperçu en mémoire partagée en mode sans affichage (voir utils/apercu)
+        touche = apercu.afficher("Detection du rouge", result) & 0xFF
+        image.marquer("affichage")
+        latence = image.terminer()
         
-        img = cv2.resize(img, (224, 224), interpolation=cv2.INTER_AREA)
+        if exportateur is not None:
+            img = cv2.resize(couleur.rgb, (224, 224), interpolation=cv2.INTER_AREA)
+            exportateur.ajouter(img, label, image.capture)
+
+        if controleur is not None:
+            controleur.mesurer(time.perf_counter() - debut_traitement, latence=latence)
+            if controleur.ajuster():
+                name_id = source.name_id = controleur.name_id
+
+        maintenant = time.perf_counter()
+        fps_moyen = 0.9 * fps_moyen + 0.1 / max(maintenant - precedent, 1e-6)
+        precedent = maintenant
+        FPS.fixer(fps_moyen)
+        IMAGES.inc()
 
-        if cv2.waitKey(1) & 0xFF == ord('q'):
+        if touche == ord('q'):
             break
 
     print("Unsubscribing...")
     video_service.unsubscribe(name_id)
-    cv2.destroyAllWindows()
\ No newline at end of file
+    apercu.fermer()
\ No newline at end of file
@@ -0,0 +1,130 @@
+"""
+Module de conversion des images caméra selon l'espace couleur de l'abonnement ALVideoDevice.
+
+En RGB (espace 11), le robot convertit chaque image avant l'envoi (3 octets par pixel) puis le
+PC refait RGB -> BGR avant les détecteurs. En YUV422 (espace 9, format natif du capteur :
+Y0 U Y1 V, 2 octets par pixel), le robot n'a rien à convertir et le réseau transporte un tiers
+d'octets en moins ; le PC décode en BGR (ou en RGB) par cvtColor à la place de l'échange de
+canaux RGB -> BGR.
+
+    couleur = ImageCouleur(image.donnees, YUV422)
+    resultat = detectionRouge(couleur.bgr)
+
+Le gain est uniquement réseau (et CPU du robot) : côté PC, le décodage YUV422 coûte un peu
+plus que l'échange de canaux (640x480, détection du rouge comprise : ~1,7 ms en RGB contre
+~1,8 ms en YUV422). Il ne s'agit pas d'une conversion fusionnée : OpenCV n'a pas de
+conversion YUV -> HSV directe, les détecteurs refont donc BGR -> HSV après le décodage.
+Le mode YUV422 n'est utile que si le lien réseau (ou le robot) est le goulot.
+
+Benchmark (octets par image et temps de traitement côté PC des deux chemins) :
+    python -m scripts.utils.espace_couleur
+"""
+
+import time
+from typing import Dict, Optional
+
+import numpy as np
+from .lazy_import import lazy_import
+
+cv2 = lazy_import("cv2")
+
+# Espaces couleur ALVideoDevice
+YUV422 = 9
+RGB = 11
+BGR = 13
+
+OCTETS_PAR_PIXEL = {YUV422: 2, RGB: 3, BGR: 3}
+NOMS = {YUV422: "YUV422", RGB: "RGB", BGR: "BGR"}
+
+
+def octets_par_image(largeur : int, hauteur : int, espace : int) -> int:
+    return largeur * hauteur * OCTETS_PAR_PIXEL[espace]
+
+
+class ImageCouleur:
+    """
+Représentations d'une image caméra, chacune calculée au premier accès puis gardée
+
+Args:
+    donnees: pixels reçus (hauteur, largeur, 2) en YUV422, (hauteur, largeur, 3) sinon
+    espace: espace couleur de l'abonnement (YUV422, RGB ou BGR)
+    """
+
+    __slots__ = ("donnees", "espace", "_bgr", "_rgb")
+
+    def __init__(self, donnees : np.ndarray, espace : int = RGB):
+        if espace not in OCTETS_PAR_PIXEL:
+            raise ValueError(f"Espace couleur non pris en charge : {espace}")
+        self.donnees = donnees
+        self.espace = espace
+        self._bgr : Optional[np.ndarray] = None
+        self._rgb : Optional[np.ndarray] = None
+
+    @property
+    def bgr(self) -> np.ndarray:
+        """Image BGR (affichage, OpenCV)"""
+        if self._bgr is None:
+            if self.espace == YUV422:
+                self._bgr = cv2.cvtColor(self.donnees, cv2.COLOR_YUV2BGR_YUYV)
+            elif self.espace == RGB:
+                self._bgr = cv2.cvtColor(self.donnees, cv2.COLOR_RGB2BGR)
+            else:
+                self._bgr = self.donnees
+        return self._bgr
+
+    @property
+    def rgb(self) -> np.ndarray:
+        """Image RGB (jeu de données, caméra virtuelle)"""
+        if self._rgb is None:
+            if self.espace == RGB:
+                self._rgb = self.donnees
+            elif self.espace == YUV422 and self._bgr is None:
+                self._rgb = cv2.cvtColor(self.donnees, cv2.COLOR_YUV2RGB_YUYV)
+            else:
+                self._rgb = cv2.cvtColor(self.bgr, cv2.COLOR_BGR2RGB)
+        return self._rgb
+
+
+def benchmark(iterations : int = 200, largeur : int = 640, hauteur : int = 480) -> Dict[str, float]:
+    """
+Compare, pour la boucle de connexionCamera (conversion en BGR puis détection du rouge), les
+abonnements RGB et YUV422 : octets reçus et temps de traitement côté PC par image
+
+Returns:
+    {chemin: temps de traitement par image (s), meilleur tour}
+    """
+    from ..ia_module.traitement_image import detectionRouge
+
+    rng = np.random.default_rng(0)
+    bgr = rng.integers(0, 256, (hauteur, largeur, 3), dtype=np.uint8)
+    rgb = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+    yuyv = cv2.cvtColor(bgr, cv2.COLOR_BGR2YUV_YUYV) if hasattr(cv2, "COLOR_BGR2YUV_YUYV") \
+        else rng.integers(0, 256, (hauteur, largeur, 2), dtype=np.uint8)
+
+    def rgb_bgr():
+        detectionRouge(ImageCouleur(rgb, RGB).bgr)
+
+    def yuv422():
+        detectionRouge(ImageCouleur(yuyv, YUV422).bgr)
+
+    chemins = {"RGB": (rgb_bgr, RGB), "YUV422": (yuv422, YUV422)}
+    # Tours alternés, meilleur tour retenu : les chemins subissent les mêmes perturbations
+    mesures : Dict[str, list] = {nom: [] for nom in chemins}
+    for traiter, _ in chemins.values():
+        traiter()
+    for _ in range(max(iterations // 10, 1)):
+        for nom, (traiter, _) in chemins.items():
+            t0 = time.perf_counter()
+            for _ in range(10):
+                traiter()
+            mesures[nom].append((time.perf_counter() - t0) / 10)
+    temps = {}
+    for nom, (_, espace) in chemins.items():
+        temps[nom] = min(mesures[nom])
+        print(f"{nom:<7} {octets_par_image(largeur, hauteur, espace) / 1024:7.0f} Kio/image, "
+              f"{temps[nom] * 1000:6.2f} ms/image")
+    return temps
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,214 @@
+"""
+Module de contrôle simultané de plusieurs robots NAO.
+
+La flotte garde une qi.Session par robot et envoie chaque commande (posture, scan, parole, ...)
+à tous les robots en parallèle : une commande à toute la flotte dure autant que le robot le plus
+lent, et non la somme de tous. Les détections et relevés de capteurs sont regroupés dans une
+chronologie unique, et la latence de chaque robot est mesurée.
+
+Utilisation:
+    python -m scripts.utils.flotte --robots 172.16.1.163 172.16.1.164 --posture StandInit
+    python -m scripts.utils.flotte --robots 172.16.1.163:9559 172.16.1.164 --dire "Bonjour"
+"""
+
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+CAPTEURS_DEFAUT = [
+    "Device/SubDeviceList/US/Left/Sensor/Value",
+    "Device/SubDeviceList/US/Right/Sensor/Value",
+    "Device/SubDeviceList/InertialSensor/AngleX/Sensor/Value",
+    "Device/SubDeviceList/InertialSensor/AngleY/Sensor/Value",
+]
+
+
+class Resultat(NamedTuple):
+    """Résultat d'une commande sur un robot"""
+    valeur: Any
+    erreur: Optional[BaseException]
+    latence: float
+
+
+class Evenement(NamedTuple):
+    """Entrée de la chronologie commune"""
+    instant: float
+    robot: str
+    type: str
+    donnees: Any
+
+
+class Flotte:
+    """
+Ensemble de robots contrôlés en parallèle
+
+Args:
+    robots: adresses "ip" ou "ip:port" des robots
+    port: port NAOqi utilisé quand l'adresse n'en précise pas
+    """
+
+    def __init__(self, robots : Sequence[str], port : int = 9559):
+        self.adresses : Dict[str, str] = {}
+        for robot in robots:
+            ip, _, p = robot.partition(":")
+            self.adresses[robot] = f"tcp://{ip}:{p or port}"
+        self.sessions : Dict[str, Any] = {}
+        self.chronologie : List[Evenement] = []
+        self._latences : Dict[str, List[float]] = {robot: [] for robot in self.adresses}
+        self._verrou = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max(len(self.adresses), 1), thread_name_prefix="Robot")
+
+    def _sur_chaque_robot(self, fonction : Callable[[str], Any], robots : Optional[Sequence[str]] = None
+                          ) -> Dict[str, Resultat]:
+        robots = list(robots or self.adresses)
+
+        def chronometrer(robot):
+            t0 = time.perf_counter()
+            try:
+                valeur, erreur = fonction(robot), None
+            except Exception as e:
+                valeur, erreur = None, e
+            latence = time.perf_counter() - t0
+            with self._verrou:
+                self._latences[robot].append(latence)
+            return Resultat(valeur, erreur, latence)
+
+        futures = {robot: self._pool.submit(chronometrer, robot) for robot in robots}
+        return {robot: future.result() for robot, future in futures.items()}
+
+    def connecter(self) -> Dict[str, Resultat]:
+        """Ouvre toutes les sessions en parallèle ; les robots injoignables sont signalés"""
+        import qi
+
+        def connecter_robot(robot):
+            session = qi.Session()
+            session.connect(self.adresses[robot])
+            self.sessions[robot] = session
+            return session
+
+        resultats = self._sur_chaque_robot(connecter_robot)
+        for robot, resultat in resultats.items():
+            if resultat.erreur is not None:
+                print(f"✗ Impossible de se connecter à {robot}: {resultat.erreur}")
+        return resultats
+
+    def executer(self, fonction : Callable[..., Any], *args : Any, robots : Optional[Sequence[str]] = None,
+                 **kwargs : Any) -> Dict[str, Resultat]:
+        """
+Exécute fonction(session, *args, **kwargs) sur tous les robots connectés en parallèle
+
+Args:
+    fonction: une fonction du projet prenant la session en premier argument (ex: stand_up)
+    robots: sous-ensemble de robots (tous par défaut)
+
+Returns:
+    {robot: Resultat(valeur, erreur, latence)}
+    """
+        robots = [r for r in (robots or self.sessions) if r in self.sessions]
+        return self._sur_chaque_robot(lambda robot: fonction(self.sessions[robot], *args, **kwargs), robots)
+
+    def service(self, nom : str, methode : str, *args : Any, **kwargs : Any) -> Dict[str, Resultat]:
+        """Appelle session.service(nom).methode(*args) sur tous les robots"""
+        return self.executer(lambda session: getattr(session.service(nom), methode)(*args, **kwargs))
+
+    def posture(self, nom : str = "StandInit", vitesse : float = 0.5) -> Dict[str, Resultat]:
+        return self.service("ALRobotPosture", "goToPosture", nom, vitesse)
+
+    def dire(self, texte : str) -> Dict[str, Resultat]:
+        return self.service("ALTextToSpeech", "say", texte)
+
+    def scan(self, fabrique : Optional[Callable[[], Callable]] = None) -> Dict[str, Resultat]:
+        """
+Scan tête complet avec détection sur chaque robot ; les détections vont dans la chronologie
+
+Args:
+    fabrique: fonction sans argument créant un détecteur (ex: detecteurRouge), appelée une fois
+              par robot : un détecteur avec état (HOG, suivi) n'est jamais partagé entre threads
+              (détecteur de personnes par défaut)
+    """
+        from ..meca_module.scan_detection import scan_tete_complet_detection
+
+        def scanner(robot):
+            detecteur = fabrique() if fabrique is not None else None
+            trouve = scan_tete_complet_detection(self.sessions[robot], detecteur)
+            if trouve is not None:
+                self.enregistrer(robot, "detection", trouve, trouve.instant)
+            return trouve
+
+        robots = list(self.sessions)
+        return self._sur_chaque_robot(scanner, robots)
+
+    def instantane(self, cles : Sequence[str] = CAPTEURS_DEFAUT) -> Dict[str, Resultat]:
+        """Relève les capteurs de tous les robots (un getListData chacun) dans la chronologie"""
+        def relever(robot):
+            valeurs = self.sessions[robot].service("ALMemory").getListData(list(cles))
+            self.enregistrer(robot, "capteurs", dict(zip(cles, valeurs)))
+            return valeurs
+
+        return self._sur_chaque_robot(relever, list(self.sessions))
+
+    def enregistrer(self, robot : str, type : str, donnees : Any, instant : Optional[float] = None) -> None:
+        """Ajoute un événement à la chronologie commune"""
+        with self._verrou:
+            self.chronologie.append(Evenement(instant or time.time(), robot, type, donnees))
+
+    def evenements(self, depuis : float = 0.0) -> List[Evenement]:
+        """Chronologie triée par instant"""
+        with self._verrou:
+            return sorted((e for e in self.chronologie if e.instant >= depuis), key=lambda e: e.instant)
+
+    def latences(self) -> Dict[str, Tuple[float, float, int]]:
+        """(moyenne, maximum, nombre) des latences de commande de chaque robot, en secondes"""
+        with self._verrou:
+            return {robot: (sum(l) / len(l), max(l), len(l)) if l else (0.0, 0.0, 0)
+                    for robot, l in self._latences.items()}
+
+    def fermer(self) -> None:
+        for session in self.sessions.values():
+            try:
+                session.close()
+            except Exception:
+                pass
+        self.sessions.clear()
+        self._pool.shutdown(wait=False)
+
+
+def afficher(resultats : Dict[str, Resultat]) -> None:
+    for robot, resultat in resultats.items():
+        statut = "✓" if resultat.erreur is None else f"✗ {resultat.erreur}"
+        print(f"  {robot:22} {resultat.latence * 1000:8.1f} ms  {statut}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Contrôle d'une flotte de robots NAO.")
+    parser.add_argument("--robots", nargs="+", required=True,
+                        help="Adresses des robots (ip ou ip:port)")
+    parser.add_argument("--port", type=int, default=9559,
+                        help="Port NAOqi par défaut (par défaut: 9559)")
+    parser.add_argument("--posture", type=str, default=None,
+                        help="Posture à prendre (ex: StandInit, Sit)")
+    parser.add_argument("--dire", type=str, default=None,
+                        help="Texte à prononcer par tous les robots")
+    parser.add_argument("--capteurs", action="store_true",
+                        help="Relever les capteurs de tous les robots")
+    args = parser.parse_args()
+
+    flotte = Flotte(args.robots, args.port)
+    afficher(flotte.connecter())
+    try:
+        if args.posture:
+            print(f"Posture {args.posture} :")
+            afficher(flotte.posture(args.posture))
+        if args.dire:
+            print(f"Parole \"{args.dire}\" :")
+            afficher(flotte.dire(args.dire))
+        if args.capteurs:
+            flotte.instantane()
+            for evenement in flotte.evenements():
+                print(f"  {evenement.instant:.3f} {evenement.robot} {evenement.type} {evenement.donnees}")
+        for robot, (moyenne, maximum, n) in flotte.latences().items():
+            print(f"{robot}: {n} commandes, moyenne {moyenne * 1000:.1f} ms, max {maximum * 1000:.1f} ms")
+    finally:
+        flotte.fermer()
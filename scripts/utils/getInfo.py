@@ -1,9 +1,14 @@
 """
 Module permettant d'obtenir les événements du robot et les méthodes d'un service donnée
+
+Les informations viennent de l'index local de l'API (index_api) : le robot n'est interrogé
+qu'une fois par version de NAOqi, et pour les services lancés après la construction de l'index.
 """
 
 from typing import Any
 
+from .index_api import IndexAPI
+
 
 def GetEvenements(session : Any) -> None :
     """
@@ -12,9 +17,8 @@ Liste tous les événements existant dans le robot
 Args:
     session: La session en cours avec le robot
     """
-    memoire = session.service("ALMemory")
-    for i in memoire.getEventList() :
-        print(f"{i} \n")
+    index = IndexAPI.pour(session)
+    print("\n\n".join(index.evenements))
 
 def GetAllMethodes(session : Any, nomService : str) -> None :
     """
@@ -24,17 +28,16 @@ Args:
     session: La session en cours avec le robot
     nomService: le nom du service dont on veut les méthodes
     """
-    service = session.service(nomService)
-    meta = service.metaObject()
+    index = IndexAPI.pour(session)
+    methodes = index.methodes(nomService) or index.completer(session, nomService)
     
-    for methode in meta.methods() :
-        print(f"""
+    print("\n".join(f"""
         ---
         
-        Nom : {methode.name()}
-        Arguments : {[arg.name() for arg in methode.parameters()]}
-        Retour : {methode.returnSignature()}
+        Nom : {methode['nom']}
+        Arguments : {methode['parametres']}
+        Retour : {methode['retour']}
         
         ---
-              """)
-if __name__ == '__main__' : pass
\ No newline at end of file
+              """ for methode in methodes))
+if __name__ == '__main__' : pass
@@ -0,0 +1,173 @@
+"""
+Module de suivi de la latence des images caméra, de la capture au résultat.
+
+getImageRemote retourne l'horodatage de capture (champs 4 et 5 : secondes et microsecondes,
+horloge du robot). Chaque image lue par SourceImages garde cet horodatage, ramené à l'horloge
+locale, et chaque étape du traitement marque son heure de sortie :
+
+    source = SourceImages(video_service, name_id, "connexion_camera", age_max=0.2)
+    image = source.lire()          # None si rien reçu ou image trop vieille
+    ...conversion...
+    image.marquer("conversion")
+    ...détection...
+    image.marquer("seuillage")
+    image.terminer()
+
+Les durées de chaque étape et les latences capture -> sortie d'étape alimentent des
+histogrammes (par pipeline et par étape) ; on voit ainsi si la lenteur vient du réseau
+(étape « reception »), du décodage ou de la détection. Les images plus vieilles que age_max
+sont abandonnées et comptées, à la lecture et à chaque appel de perimee().
+
+Les horloges du robot et du PC n'étant pas synchronisées, le décalage est estimé par le plus
+petit écart (heure locale de réception - horodatage) observé : les âges mesurés sont donc
+ceux au-delà du transport le plus rapide vu jusqu'ici.
+"""
+
+import time
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import metriques, telemetrie
+from .espace_couleur import RGB, ImageCouleur
+
+ETAPES = metriques.histogramme("images_etape_secondes", "Durée de chaque étape du traitement d'une image",
+                               ("pipeline", "etape"))
+LATENCES = metriques.histogramme("images_latence_secondes", "Délai entre la capture et la sortie de chaque étape",
+                                 ("pipeline", "etape"))
+OCTETS = metriques.compteur("images_octets_total", "Octets d'image reçus de ALVideoDevice", ("pipeline",))
+PERIMEES = metriques.compteur("images_perimees_total", "Images abandonnées car trop vieilles", ("pipeline", "etape"))
+
+
+class HorlogeRobot:
+    """Conversion des horodatages du robot vers l'horloge locale (time.time())"""
+
+    def __init__(self):
+        self.decalage : Optional[float] = None
+
+    def observer(self, horodatage : float, reception : float) -> None:
+        ecart = reception - horodatage
+        if self.decalage is None or ecart < self.decalage:
+            self.decalage = ecart
+
+    def locale(self, horodatage : float) -> float:
+        return horodatage + (self.decalage or 0.0)
+
+
+class ImageDatee:
+    """
+Image caméra avec son instant de capture et les heures de sortie de chaque étape
+
+Attributes:
+    donnees: pixels (hauteur, largeur, canaux) en uint8
+    capture: instant de capture dans l'horloge locale
+    etapes: liste de (nom de l'étape, heure de sortie)
+    """
+
+    __slots__ = ("source", "numero", "largeur", "hauteur", "donnees", "horodatage", "capture", "etapes")
+
+    def __init__(self, source : "SourceImages", numero : int, brute : list, reception : float):
+        self.source = source
+        self.numero = numero
+        self.largeur, self.hauteur = brute[0], brute[1]
+        canaux = brute[2] if len(brute) > 2 and brute[2] else 3
+        self.donnees = np.frombuffer(brute[6], dtype=np.uint8).reshape((self.hauteur, self.largeur, canaux))
+        self.horodatage = brute[4] + brute[5] * 1e-6
+        source.horloge.observer(self.horodatage, reception)
+        self.capture = source.horloge.locale(self.horodatage)
+        self.etapes : List[Tuple[str, float]] = [("capture", self.capture)]
+        self.marquer("reception", reception)
+
+    def marquer(self, etape : str, instant : Optional[float] = None) -> float:
+        """
+Note la sortie d'une étape
+
+Returns:
+    la latence capture -> sortie de l'étape (s)
+    """
+        instant = time.time() if instant is None else instant
+        precedent = self.etapes[-1][1]
+        self.etapes.append((etape, instant))
+        pipeline = self.source.pipeline
+        ETAPES.avec(pipeline=pipeline, etape=etape).observer(instant - precedent)
+        latence = instant - self.capture
+        LATENCES.avec(pipeline=pipeline, etape=etape).observer(latence)
+        return latence
+
+    def age(self) -> float:
+        return time.time() - self.capture
+
+    def couleur(self) -> ImageCouleur:
+        """Conversions (BGR, RGB) des pixels selon l'espace couleur de la source"""
+        return ImageCouleur(self.donnees, self.source.espace)
+
+    def perimee(self, etape : str = "") -> bool:
+        """Vrai (et comptée) si l'image a dépassé l'âge maximal de sa source"""
+        age_max = self.source.age_max
+        if age_max is None or self.age() <= age_max:
+            return False
+        PERIMEES.avec(pipeline=self.source.pipeline, etape=etape or self.etapes[-1][0]).inc()
+        self.source.perimees += 1
+        return True
+
+    def latences(self) -> List[Tuple[str, float]]:
+        """(étape, latence depuis la capture) pour chaque étape franchie"""
+        return [(etape, instant - self.capture) for etape, instant in self.etapes[1:]]
+
+    def terminer(self) -> float:
+        """Fin du traitement : enregistre la latence de chaque étape en télémétrie et retourne la latence totale"""
+        total = self.etapes[-1][1] - self.capture
+        if self.source.colonnes:
+            instants = dict(self.etapes)
+            valeurs = [instants.get(etape, float("nan")) - self.capture for etape in self.source.colonnes]
+            self.source.canal.ajouter(self.numero, *valeurs, t=self.capture)
+        return total
+
+
+class SourceImages:
+    """
+Lecture d'images datées sur un abonnement ALVideoDevice
+
+Args:
+    video_service: service ALVideoDevice
+    name_id: identifiant d'abonnement (subscribeCamera)
+    pipeline: nom du traitement (étiquette des métriques, canal de télémétrie)
+    age_max: âge (s) au-delà duquel une image est abandonnée (None : jamais)
+    etapes: noms des étapes enregistrées en télémétrie (latence de chacune par image)
+    espace: espace couleur de l'abonnement (espace_couleur.RGB ou YUV422)
+    """
+
+    def __init__(self, video_service : Any, name_id : str, pipeline : str, age_max : Optional[float] = 0.25,
+                 etapes : Sequence[str] = (), espace : int = RGB):
+        self.video_service = video_service
+        self.espace = espace
+        self.name_id = name_id
+        self.pipeline = pipeline
+        self.age_max = age_max
+        self.horloge = HorlogeRobot()
+        self.lues = 0
+        self.vides = 0
+        self.perimees = 0
+        self.age_derniere = 0.0  # âge de la dernière image reçue, même abandonnée
+        self.colonnes = ("reception",) + tuple(etapes) if etapes else ()
+        self.canal = telemetrie.canal(f"images_{pipeline}", ("numero",) + self.colonnes) if etapes else None
+
+    def lire(self) -> Optional[ImageDatee]:
+        """getImageRemote + horodatage ; None si aucune image ou si elle est déjà trop vieille"""
+        brute = self.video_service.getImageRemote(self.name_id)
+        return self.recevoir(brute, time.time())
+
+    def recevoir(self, brute : Optional[list], reception : float) -> Optional[ImageDatee]:
+        """Comme lire, pour une image déjà obtenue par ailleurs (ex: getImageRemote asynchrone)"""
+        if brute is None:
+            self.vides += 1
+            return None
+        self.lues += 1
+        OCTETS.avec(pipeline=self.pipeline).inc(len(brute[6]))
+        image = ImageDatee(self, self.lues, brute, reception)
+        self.age_derniere = image.age()
+        if image.perimee("reception"):
+            return None
+        return image
+
+if __name__ == '__main__' : pass
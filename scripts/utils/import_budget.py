@@ -0,0 +1,120 @@
+"""
+Module mesurant le temps d'import des points d'entrée du projet avec `python -X importtime`
+et échouant si un budget de démarrage est dépassé.
+
+Utilisation:
+    python -m scripts.utils.import_budget
+    python -m scripts.utils.import_budget --budget 250 main scripts.meca_module.nao_menu_simple
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Budgets par défaut (en millisecondes) des points d'entrée
+BUDGETS_MS = {
+    "main": 500.0,
+    "scripts.meca_module.nao_menu_simple": 500.0,
+}
+
+# Modules lourds qui ne doivent jamais être chargés au démarrage d'un point d'entrée
+MODULES_LOURDS = ("cv2", "tensorflow", "keras", "jax", "pandas", "scipy")
+
+RACINE_PROJET = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_importtime(sortie : str) -> Dict[str, float]:
+    """
+Analyse la sortie de `-X importtime` et retourne le temps cumulé (ms) de chaque module
+
+Args:
+    sortie: le texte écrit sur stderr par l'interpréteur
+
+Returns:
+    dictionnaire {nom du module: temps cumulé en ms}
+    """
+    temps = {}
+    for ligne in sortie.splitlines():
+        if not ligne.startswith("import time:"):
+            continue
+        champs = ligne[len("import time:"):].split("|")
+        if len(champs) != 3:
+            continue
+        try:
+            cumule = int(champs[1].strip())
+        except ValueError:
+            continue  # ligne d'en-tête
+        temps[champs[2].strip()] = cumule / 1000.0
+    return temps
+
+
+def mesure_import(module : str, python : str = sys.executable) -> Tuple[float, Dict[str, float], int]:
+    """
+Importe module dans un interpréteur neuf et mesure le temps d'import
+
+Args:
+    module: nom du module à importer (ex: "main", "scripts.meca_module.nao_menu_simple")
+    python: interpréteur à utiliser
+
+Returns:
+    (temps total en ms, temps cumulé par module, code de retour de l'interpréteur)
+    """
+    resultat = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}"],
+        cwd=RACINE_PROJET,
+        capture_output=True,
+        text=True,
+    )
+    temps = parse_importtime(resultat.stderr)
+    return temps.get(module, sum(temps.values())), temps, resultat.returncode
+
+
+def verifie_budgets(budgets : Dict[str, float], python : str = sys.executable) -> List[str]:
+    """
+Vérifie que chaque point d'entrée respecte son budget et ne charge aucun module lourd
+
+Args:
+    budgets: dictionnaire {module: budget en ms}
+    python: interpréteur à utiliser
+
+Returns:
+    la liste des échecs (vide si tout est dans le budget)
+    """
+    echecs = []
+    for module, budget in budgets.items():
+        total, temps, code = mesure_import(module, python)
+        lourds = sorted(nom for nom in temps if nom in MODULES_LOURDS)
+        statut = "OK" if total <= budget and code == 0 and not lourds else "ÉCHEC"
+        print(f"{statut:5} {module:45} {total:8.1f} ms (budget {budget:.0f} ms)")
+        if code != 0:
+            echecs.append(f"{module}: l'import a échoué (code {code})")
+        if total > budget:
+            echecs.append(f"{module}: {total:.1f} ms > {budget:.0f} ms")
+        if lourds:
+            echecs.append(f"{module}: modules lourds chargés au démarrage : {', '.join(lourds)}")
+    return echecs
+
+
+def main(argv : List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Vérifie le temps de démarrage des points d'entrée.")
+    parser.add_argument("modules", nargs="*",
+                        help="Modules à mesurer (par défaut: main et nao_menu_simple)")
+    parser.add_argument("--budget", type=float, default=None,
+                        help="Budget en ms appliqué à tous les modules donnés")
+    args = parser.parse_args(argv)
+
+    if args.modules:
+        budgets = {m: args.budget if args.budget is not None else BUDGETS_MS.get(m, 500.0) for m in args.modules}
+    else:
+        budgets = {m: args.budget if args.budget is not None else b for m, b in BUDGETS_MS.items()}
+
+    echecs = verifie_budgets(budgets)
+    for echec in echecs:
+        print(f"✗ {echec}")
+    return 1 if echecs else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
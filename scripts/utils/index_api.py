@@ -0,0 +1,200 @@
+"""
+Module d'index de l'API NAOqi (services, méthodes, signatures, événements, clés ALMemory).
+
+L'index est construit une seule fois par version de NAOqi en interrogeant le robot, puis
+enregistré sur disque : les sessions suivantes le rechargent sans aucun appel réseau.
+Les recherches par préfixe (bisect sur une liste triée) ou par sous-chaîne se font localement.
+
+Utilisation:
+    python -m scripts.utils.index_api --ip 172.16.1.163 move
+    python -m scripts.utils.index_api --ip 172.16.1.163 --prefixe ALMotion.set
+"""
+
+import argparse
+import bisect
+import json
+import os
+import sys
+from typing import Any, Dict, List, Optional
+
+DOSSIER_LOCAL = os.path.join(os.path.expanduser("~"), ".cache", "nao-s501")
+
+
+def version_naoqi(session : Any) -> str:
+    """Version du système du robot (sert de clé au cache)"""
+    try:
+        return str(session.service("ALSystem").systemVersion())
+    except Exception:
+        return str(session.service("ALMemory").version())
+
+
+def _noms_services(session : Any) -> List[str]:
+    noms = []
+    for info in session.services():
+        noms.append(info["name"] if isinstance(info, dict) else info.name())
+    return sorted(noms)
+
+
+def _methodes(session : Any, nom_service : str) -> List[Dict[str, Any]]:
+    meta = session.service(nom_service).metaObject()
+    methodes = []
+    for methode in meta.methods():
+        methodes.append({
+            "nom": methode.name(),
+            "parametres": [arg.name() for arg in methode.parameters()],
+            "signature": methode.parametersSignature(),
+            "retour": methode.returnSignature(),
+        })
+    return sorted(methodes, key=lambda m: m["nom"])
+
+
+class IndexAPI:
+    """
+Index local de l'API du robot
+
+Args:
+    donnees: contenu de l'index ({"version", "services", "evenements", "cles"})
+    """
+
+    def __init__(self, donnees : Dict[str, Any]):
+        self.version = donnees["version"]
+        self.services : Dict[str, List[Dict[str, Any]]] = donnees["services"]
+        self.evenements : List[str] = sorted(donnees["evenements"])
+        self.cles : List[str] = sorted(donnees["cles"])
+        self._indexer()
+
+    def _indexer(self) -> None:
+        # Toutes les entrées sous forme "ALMotion.moveTo", "event:WordRecognized", "memory:Device/..."
+        entrees = [f"{s}.{m['nom']}" for s, methodes in self.services.items() for m in methodes]
+        entrees += [f"event:{e}" for e in self.evenements]
+        entrees += [f"memory:{c}" for c in self.cles]
+        self.entrees = sorted(set(entrees))
+        self._minuscules = [e.lower() for e in self.entrees]
+        self._bloc = "\n".join(self._minuscules)  # une seule chaîne pour les recherches par sous-chaîne
+        self._debuts = [0]
+        for e in self._minuscules[:-1]:
+            self._debuts.append(self._debuts[-1] + len(e) + 1)
+
+    @classmethod
+    def construire(cls, session : Any, version : Optional[str] = None) -> "IndexAPI":
+        """Interroge le robot (lent : un appel metaObject par service)"""
+        services = {}
+        for nom in _noms_services(session):
+            try:
+                services[nom] = _methodes(session, nom)
+            except Exception as e:
+                print(f"  Service {nom} ignoré: {e}")
+        memoire = session.service("ALMemory")
+        return cls({
+            "version": version or version_naoqi(session),
+            "services": services,
+            "evenements": list(memoire.getEventList()),
+            "cles": list(memoire.getDataListName()),
+        })
+
+    @classmethod
+    def pour(cls, session : Any, dossier : str = DOSSIER_LOCAL, reconstruire : bool = False) -> "IndexAPI":
+        """
+Charge l'index de la version NAOqi du robot depuis le disque, ou le construit une fois
+
+Args:
+    session: la session en cours avec le robot
+    dossier: dossier du cache local
+    reconstruire: ignore le cache existant
+    """
+        version = version_naoqi(session)
+        chemin = os.path.join(dossier, f"api_{version}.json")
+        if not reconstruire and os.path.exists(chemin):
+            with open(chemin, "r", encoding="utf-8") as f:
+                return cls(json.load(f))
+        index = cls.construire(session, version)
+        index.sauvegarder(chemin)
+        return index
+
+    def sauvegarder(self, chemin : str) -> None:
+        os.makedirs(os.path.dirname(chemin), exist_ok=True)
+        with open(chemin, "w", encoding="utf-8") as f:
+            json.dump({"version": self.version, "services": self.services,
+                       "evenements": self.evenements, "cles": self.cles}, f)
+
+    def prefixe(self, debut : str) -> List[str]:
+        """Entrées commençant par debut (insensible à la casse)"""
+        debut = debut.lower()
+        i = bisect.bisect_left(self._minuscules, debut)
+        j = bisect.bisect_left(self._minuscules, debut + "\uffff")
+        return self.entrees[i:j]
+
+    def rechercher(self, motif : str, limite : Optional[int] = None) -> List[str]:
+        """Entrées contenant motif (insensible à la casse)"""
+        if not motif:
+            return self.entrees[:limite]
+        motif = motif.lower()
+        resultats = []
+        position = self._bloc.find(motif)
+        while position != -1 and (limite is None or len(resultats) < limite):
+            i = bisect.bisect_right(self._debuts, position) - 1
+            resultats.append(self.entrees[i])
+            # passe à l'entrée suivante pour ne pas compter deux fois la même
+            suivante = self._debuts[i + 1] if i + 1 < len(self._debuts) else len(self._bloc)
+            position = self._bloc.find(motif, suivante)
+        return resultats
+
+    def methodes(self, service : str) -> List[Dict[str, Any]]:
+        return self.services.get(service, [])
+
+    def completer(self, session : Any, service : str) -> List[Dict[str, Any]]:
+        """
+Méthodes d'un service absent de l'index (lancé après sa construction), lues sur le robot
+et ajoutées à l'index en mémoire
+
+Returns:
+    les méthodes du service (RuntimeError de qi si le service n'existe pas)
+    """
+        if service not in self.services:
+            self.services[service] = _methodes(session, service)
+            self._indexer()
+        return self.services[service]
+
+    def methode(self, service : str, nom : str) -> Optional[Dict[str, Any]]:
+        for methode in self.methodes(service):
+            if methode["nom"] == nom:
+                return methode
+        return None
+
+    def decrire(self, entree : str) -> str:
+        """Description lisible d'une entrée (signature pour une méthode)"""
+        if entree.startswith(("event:", "memory:")):
+            return entree
+        service, _, nom = entree.partition(".")
+        methode = self.methode(service, nom)
+        if methode is None:
+            return entree
+        return f"{entree}({', '.join(methode['parametres'])}) -> {methode['retour']}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recherche dans l'API NAOqi du robot.")
+    parser.add_argument("motif", nargs="?", default="",
+                        help="Texte à chercher dans les noms de méthodes, événements et clés")
+    parser.add_argument("--ip", type=str, default="127.0.0.1",
+                        help="Adresse IP du robot NAO")
+    parser.add_argument("--port", type=int, default=9559,
+                        help="Port NAOqi (par défaut: 9559)")
+    parser.add_argument("--prefixe", action="store_true",
+                        help="Recherche par préfixe au lieu de sous-chaîne")
+    parser.add_argument("--reconstruire", action="store_true",
+                        help="Ignore le cache et réinterroge le robot")
+    args = parser.parse_args()
+
+    import qi
+    session = qi.Session()
+    try:
+        session.connect(f"tcp://{args.ip}:{args.port}")
+    except RuntimeError:
+        print(f"Impossible de se connecter à NAOqi à l'adresse {args.ip}:{args.port}.")
+        sys.exit(1)
+
+    index = IndexAPI.pour(session, reconstruire=args.reconstruire)
+    resultats = index.prefixe(args.motif) if args.prefixe else index.rechercher(args.motif)
+    print("\n".join(index.decrire(e) for e in resultats))
+    print(f"\n{len(resultats)} résultat(s) sur {len(index.entrees)} entrées (NAOqi {index.version})")
@@ -0,0 +1,70 @@
+"""
+Module permettant de différer l'import des dépendances lourdes (cv2, tensorflow, pandas)
+jusqu'à leur première utilisation
+"""
+
+import importlib
+import sys
+import types
+from typing import Any
+
+
+class _LazyModule(types.ModuleType):
+    """
+Module factice qui importe le vrai module au premier accès à un attribut
+
+Args:
+    name: nom complet du module à importer plus tard
+    """
+
+    def __init__(self, name : str) -> None:
+        super().__init__(name)
+        self.__dict__["_lazy_module"] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, attribut : str) -> Any:
+        return getattr(self._load(), attribut)
+
+    def __dir__(self) -> list:
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        etat = "chargé" if self.__dict__["_lazy_module"] is not None else "non chargé"
+        return f"<module '{self.__name__}' (lazy, {etat})>"
+
+
+def lazy_import(name : str) -> types.ModuleType:
+    """
+Retourne le module name s'il est déjà chargé, sinon un module factice qui ne fera
+l'import qu'au premier accès à un de ses attributs.
+
+Args:
+    name: nom du module (ex: "cv2", "pandas", "tensorflow")
+
+Returns:
+    le module réel ou son remplaçant différé
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return _LazyModule(name)
+
+
+def is_loaded(module : types.ModuleType) -> bool:
+    """
+Indique si un module obtenu par lazy_import a réellement été importé
+
+Args:
+    module: le module retourné par lazy_import
+    """
+    if isinstance(module, _LazyModule):
+        return module.__dict__["_lazy_module"] is not None
+    return True
+
+if __name__ == '__main__' : pass
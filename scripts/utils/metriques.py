@@ -0,0 +1,264 @@
+"""
+Module d'exposition de métriques d'exécution au format texte Prometheus.
+
+Chaque module déclare ses métriques (compteurs, jauges, histogrammes) auprès du registre
+partagé, puis un petit serveur HTTP local les expose sur /metrics :
+
+    from scripts.utils import metriques
+    images = metriques.compteur("vision_images_total", "Images traitées")
+    etapes = metriques.histogramme("vision_etape_secondes", "Durée par étape", ("etape",))
+    with etapes.avec(etape="capture").mesurer():
+        ...
+    metriques.demarrer_serveur(9100)   # curl http://localhost:9100/metrics
+"""
+
+import abc
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Bornes par défaut des histogrammes de durée (secondes)
+BORNES_DUREE = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _echapper(texte : str, guillemets : bool = True) -> str:
+    """Échappement du format texte : antislash, saut de ligne et, dans les valeurs d'étiquettes, guillemet"""
+    texte = str(texte).replace("\\", "\\\\").replace("\n", "\\n")
+    return texte.replace('"', '\\"') if guillemets else texte
+
+
+def _format_etiquettes(noms : Sequence[str], valeurs : Sequence[str], extra : str = "") -> str:
+    paires = [f'{n}="{_echapper(v)}"' for n, v in zip(noms, valeurs)]
+    if extra:
+        paires.append(extra)
+    return "{" + ",".join(paires) + "}" if paires else ""
+
+
+class _Metrique(abc.ABC):
+    """Base commune : nom, aide, étiquettes et valeurs filles par combinaison d'étiquettes"""
+
+    type = ""
+
+    def __init__(self, nom : str, aide : str, etiquettes : Sequence[str] = ()):
+        self.nom = nom
+        self.aide = aide
+        self.etiquettes = tuple(etiquettes)
+        self._verrou = threading.Lock()
+        self._filles : Dict[Tuple[str, ...], "_Metrique"] = {}
+
+    def avec(self, **etiquettes : str) -> "_Metrique":
+        """Retourne la série correspondant aux valeurs d'étiquettes données"""
+        cle = tuple(str(etiquettes[n]) for n in self.etiquettes)
+        with self._verrou:
+            fille = self._filles.get(cle)
+            if fille is None:
+                fille = self._nouvelle_fille()
+                self._filles[cle] = fille
+            return fille
+
+    @abc.abstractmethod
+    def _nouvelle_fille(self) -> "_Metrique":
+        """Série vide du même type, pour une nouvelle combinaison d'étiquettes"""
+
+    @abc.abstractmethod
+    def _lignes(self, nom : str, noms : Sequence[str], valeurs : Sequence[str]) -> List[str]:
+        """Lignes d'exposition de cette série"""
+
+    def _series(self) -> List[Tuple[Tuple[str, ...], "_Metrique"]]:
+        if not self.etiquettes:
+            return [((), self)]
+        with self._verrou:
+            return list(self._filles.items())
+
+    def exposer(self) -> List[str]:
+        lignes = [f"# HELP {self.nom} {_echapper(self.aide, guillemets=False)}", f"# TYPE {self.nom} {self.type}"]
+        for valeurs, serie in self._series():
+            lignes.extend(serie._lignes(self.nom, self.etiquettes, valeurs))
+        return lignes
+
+
+class Compteur(_Metrique):
+    """Valeur qui ne fait qu'augmenter (images traitées, images perdues, ...)"""
+
+    type = "counter"
+
+    def __init__(self, nom : str = "", aide : str = "", etiquettes : Sequence[str] = ()):
+        super().__init__(nom, aide, etiquettes)
+        self.valeur = 0.0
+
+    def _nouvelle_fille(self) -> "Compteur":
+        return Compteur()
+
+    def inc(self, n : float = 1.0) -> None:
+        with self._verrou:
+            self.valeur += n
+
+    def _lignes(self, nom, noms, valeurs):
+        return [f"{nom}{_format_etiquettes(noms, valeurs)} {self.valeur}"]
+
+
+class Jauge(_Metrique):
+    """Valeur instantanée, fixée ou lue à l'exposition par une fonction"""
+
+    type = "gauge"
+
+    def __init__(self, nom : str = "", aide : str = "", etiquettes : Sequence[str] = (),
+                 fonction : Optional[Callable[[], float]] = None):
+        super().__init__(nom, aide, etiquettes)
+        self.valeur = 0.0
+        self.fonction = fonction
+
+    def _nouvelle_fille(self) -> "Jauge":
+        return Jauge()
+
+    def fixer(self, valeur : float) -> None:
+        self.valeur = float(valeur)
+
+    def _lignes(self, nom, noms, valeurs):
+        valeur = self.valeur
+        if self.fonction is not None:
+            try:
+                valeur = float(self.fonction())
+            except Exception:
+                valeur = float("nan")
+        return [f"{nom}{_format_etiquettes(noms, valeurs)} {valeur}"]
+
+
+class Histogramme(_Metrique):
+    """Distribution de valeurs (latences, gigue) par classes cumulées"""
+
+    type = "histogram"
+
+    def __init__(self, nom : str = "", aide : str = "", etiquettes : Sequence[str] = (),
+                 bornes : Sequence[float] = BORNES_DUREE):
+        super().__init__(nom, aide, etiquettes)
+        self.bornes = tuple(sorted(bornes))
+        self._classes = [0] * (len(self.bornes) + 1)
+        self.somme = 0.0
+        self.nombre = 0
+
+    def _nouvelle_fille(self) -> "Histogramme":
+        return Histogramme(bornes=self.bornes)
+
+    def observer(self, valeur : float) -> None:
+        i = bisect.bisect_left(self.bornes, valeur)
+        with self._verrou:
+            self._classes[i] += 1
+            self.somme += valeur
+            self.nombre += 1
+
+    @contextmanager
+    def mesurer(self) -> Iterator[None]:
+        """Observe la durée (s) du bloc with"""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observer(time.perf_counter() - t0)
+
+    def _lignes(self, nom, noms, valeurs):
+        with self._verrou:
+            classes, somme, nombre = list(self._classes), self.somme, self.nombre
+        lignes, cumul = [], 0
+        for borne, n in zip(self.bornes + (float("inf"),), classes):
+            cumul += n
+            le = "+Inf" if borne == float("inf") else repr(borne)
+            borne_le = 'le="' + le + '"'
+            lignes.append(f"{nom}_bucket{_format_etiquettes(noms, valeurs, borne_le)} {cumul}")
+        lignes.append(f"{nom}_sum{_format_etiquettes(noms, valeurs)} {somme}")
+        lignes.append(f"{nom}_count{_format_etiquettes(noms, valeurs)} {nombre}")
+        return lignes
+
+
+class Registre:
+    """Ensemble des métriques exposées"""
+
+    def __init__(self):
+        self._verrou = threading.Lock()
+        self._metriques : Dict[str, _Metrique] = {}
+
+    def enregistrer(self, metrique : _Metrique) -> _Metrique:
+        """Ajoute une métrique ; si le nom existe déjà, retourne la métrique existante"""
+        with self._verrou:
+            return self._metriques.setdefault(metrique.nom, metrique)
+
+    def exposer(self) -> str:
+        with self._verrou:
+            metriques = list(self._metriques.values())
+        lignes = []
+        for metrique in metriques:
+            lignes.extend(metrique.exposer())
+        return "\n".join(lignes) + "\n"
+
+
+REGISTRE = Registre()
+
+
+def compteur(nom : str, aide : str, etiquettes : Sequence[str] = ()) -> Compteur:
+    return REGISTRE.enregistrer(Compteur(nom, aide, etiquettes))
+
+
+def jauge(nom : str, aide : str, etiquettes : Sequence[str] = (),
+          fonction : Optional[Callable[[], float]] = None) -> Jauge:
+    metrique = REGISTRE.enregistrer(Jauge(nom, aide, etiquettes, fonction))
+    if fonction is not None:
+        metrique.fonction = fonction  # la dernière source enregistrée fait foi
+    return metrique
+
+
+def histogramme(nom : str, aide : str, etiquettes : Sequence[str] = (),
+                bornes : Sequence[float] = BORNES_DUREE) -> Histogramme:
+    return REGISTRE.enregistrer(Histogramme(nom, aide, etiquettes, bornes))
+
+
+class _Gestionnaire(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        corps = REGISTRE.exposer().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(corps)))
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def log_message(self, format, *args):
+        pass  # pas de journal à chaque requête
+
+
+_serveur : Optional[ThreadingHTTPServer] = None
+
+
+def demarrer_serveur(port : int = 9100, adresse : str = "127.0.0.1") -> Optional[ThreadingHTTPServer]:
+    """
+Démarre (une seule fois) le serveur HTTP /metrics dans un thread
+
+Returns:
+    le serveur, ou None si le port n'est pas disponible
+    """
+    global _serveur
+    if _serveur is not None:
+        return _serveur
+    try:
+        _serveur = ThreadingHTTPServer((adresse, port), _Gestionnaire)
+    except OSError as e:
+        print(f"Métriques indisponibles sur le port {port}: {e}")
+        return None
+    threading.Thread(target=_serveur.serve_forever, name="Metriques", daemon=True).start()
+    print(f"Métriques exposées sur http://{adresse}:{port}/metrics")
+    return _serveur
+
+
+def arreter_serveur() -> None:
+    global _serveur
+    if _serveur is not None:
+        _serveur.shutdown()
+        _serveur.server_close()
+        _serveur = None
+
+if __name__ == '__main__' : pass
@@ -1,20 +1,197 @@
 """
 Module permettant de s'abonner à un événement dans le robot
+
+Un seul ALMemory.subscriber est créé par nom d'événement, quel que soit le nombre de
+fonctions abonnées. Le signal qi ne fait que déposer la valeur dans la file bornée de chaque
+fonction : les fonctions s'exécutent dans un pool de threads, donc une fonction lente ne
+bloque plus la distribution des événements. Quand la file d'une fonction est pleine, la
+valeur la plus ancienne est abandonnée et comptée.
 """
 
-from typing import Any, Callable
+import collections
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from . import metriques
+
+PERDUS = metriques.compteur("abonnements_evenements_perdus_total",
+                            "Événements abandonnés car la file de la fonction était pleine", ("evenement",))
+RECUS = metriques.compteur("abonnements_evenements_recus_total", "Événements reçus d'ALMemory", ("evenement",))
+
+
+class Abonnement:
+    """
+    Abonnement d'une fonction à un événement (retourné par GestionnaireAbonnements.abonner)
+
+    Args:
+        gestionnaire: le gestionnaire qui distribue l'événement
+        evenement: nom de l'événement ALMemory
+        onEvent: fonction appelée avec la valeur de l'événement
+        file_max: nombre maximal de valeurs en attente pour cette fonction
+    """
+
+    def __init__(self, gestionnaire : "GestionnaireAbonnements", evenement : str,
+                 onEvent : Callable[[Any], None], file_max : int):
+        self.gestionnaire = gestionnaire
+        self.evenement = evenement
+        self.onEvent = onEvent
+        self.file : Deque[Any] = collections.deque()
+        self.file_max = file_max
+        self.traites = 0
+        self.perdus = 0
+        self.erreurs = 0
+        self.actif = True
+        self._en_cours = False  # une tâche du pool vide déjà la file
+
+    def desabonner(self) -> None:
+        self.gestionnaire.desabonner(self)
+
+
+class _Evenement:
+    """Subscriber ALMemory partagé par toutes les fonctions abonnées à un même événement"""
+
+    def __init__(self, subscriber : Any, lien : Any):
+        self.subscriber = subscriber
+        self.lien = lien
+        self.abonnements : List[Abonnement] = []
+
+
+class GestionnaireAbonnements:
+    """
+    Gestionnaire des abonnements aux événements ALMemory d'une session
+
+    Args:
+        session: Session en cours avec le robot
+        max_workers: nombre de threads exécutant les fonctions abonnées
+        file_max: taille par défaut de la file de chaque fonction
+    """
+
+    _instances : Dict[int, "GestionnaireAbonnements"] = {}
+
+    def __init__(self, session : Any, max_workers : int = 4, file_max : int = 8):
+        self.memoire = session.service("ALMemory")
+        self.file_max = file_max
+        self._verrou = threading.Lock()
+        self._evenements : Dict[str, _Evenement] = {}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="Abonnement")
+
+    @classmethod
+    def pour(cls, session : Any) -> "GestionnaireAbonnements":
+        """Retourne le gestionnaire associé à la session (créé au premier appel)"""
+        gestionnaire = cls._instances.get(id(session))
+        if gestionnaire is None:
+            gestionnaire = cls(session)
+            cls._instances[id(session)] = gestionnaire
+        return gestionnaire
+
+    def abonner(self, evenement : str, onEvent : Callable[[Any], None],
+                file_max : Optional[int] = None) -> Abonnement:
+        """
+    Abonne onEvent à l'événement (le subscriber ALMemory est créé au premier abonné)
+
+    Args:
+        evenement: nom de l'événement ALMemory
+        onEvent: fonction appelée avec la valeur de l'événement
+        file_max: taille de la file de cette fonction (1 = seule la dernière valeur compte)
 
-def Subriber(session : Any, onEvent : Callable[[Any], None], eventName : str) -> None:
+    Returns:
+        l'abonnement, à passer à desabonner
+        """
+        abonnement = Abonnement(self, evenement, onEvent, file_max or self.file_max)
+        with self._verrou:
+            entree = self._evenements.get(evenement)
+            if entree is None:
+                subscriber = self.memoire.subscriber(evenement)
+                lien = subscriber.signal.connect(lambda valeur: self._distribuer(evenement, valeur))
+                entree = _Evenement(subscriber, lien)
+                self._evenements[evenement] = entree
+            entree.abonnements.append(abonnement)
+        return abonnement
+
+    def desabonner(self, abonnement : Abonnement) -> None:
+        """Retire la fonction ; le subscriber ALMemory est libéré avec le dernier abonné"""
+        with self._verrou:
+            abonnement.actif = False
+            abonnement.file.clear()
+            entree = self._evenements.get(abonnement.evenement)
+            if entree is None or abonnement not in entree.abonnements:
+                return
+            entree.abonnements.remove(abonnement)
+            if entree.abonnements:
+                return
+            del self._evenements[abonnement.evenement]
+        try:
+            entree.subscriber.signal.disconnect(entree.lien)
+        except Exception as e:
+            print(f"Impossible de se désabonner de {abonnement.evenement}: {e}")
+
+    def _distribuer(self, evenement : str, valeur : Any) -> None:
+        # Appelé dans le thread de qi : ne fait que remplir les files
+        RECUS.avec(evenement=evenement).inc()
+        with self._verrou:
+            entree = self._evenements.get(evenement)
+            if entree is None:
+                return
+            for abonnement in entree.abonnements:
+                if len(abonnement.file) >= abonnement.file_max:
+                    abonnement.file.popleft()
+                    abonnement.perdus += 1
+                    PERDUS.avec(evenement=evenement).inc()
+                abonnement.file.append(valeur)
+                if not abonnement._en_cours:
+                    abonnement._en_cours = True
+                    self._pool.submit(self._vider, abonnement)
+
+    def _vider(self, abonnement : Abonnement) -> None:
+        # Une seule tâche par abonnement à la fois : les valeurs arrivent dans l'ordre
+        while True:
+            with self._verrou:
+                if not abonnement.file or not abonnement.actif:
+                    abonnement._en_cours = False
+                    return
+                valeur = abonnement.file.popleft()
+            try:
+                abonnement.onEvent(valeur)
+            except Exception as e:
+                abonnement.erreurs += 1
+                print(f"Erreur dans le traitement de {abonnement.evenement}: {e}")
+            abonnement.traites += 1
+
+    def statistiques(self) -> Dict[str, Dict[str, int]]:
+        """Par événement : nombre d'abonnés, valeurs en attente, traitées et perdues"""
+        with self._verrou:
+            return {evenement: {
+                "abonnes": len(entree.abonnements),
+                "en_attente": sum(len(a.file) for a in entree.abonnements),
+                "traites": sum(a.traites for a in entree.abonnements),
+                "perdus": sum(a.perdus for a in entree.abonnements),
+            } for evenement, entree in self._evenements.items()}
+
+    def fermer(self) -> None:
+        """Retire tous les abonnements et arrête le pool"""
+        with self._verrou:
+            abonnements = [a for entree in self._evenements.values() for a in entree.abonnements]
+        for abonnement in abonnements:
+            self.desabonner(abonnement)
+        self._pool.shutdown(wait=False)
+        for cle, gestionnaire in list(self._instances.items()):
+            if gestionnaire is self:
+                del self._instances[cle]
+
+
+def Subriber(session : Any, onEvent : Callable[[Any], None], eventName : str) -> Abonnement:
     """
     S'abonne à l'événement eventName du robot
-    
+
     Args:
         session: Session en cours avec le robot
         onEvent: fonction appelé si l'evenement se produit
-        eventName: nom de l'evenment auquel la fonction s'abonne 
+        eventName: nom de l'evenment auquel la fonction s'abonne
+
+    Returns:
+        l'abonnement, dont desabonner() retire la fonction
     """
-    memoire = session.service("ALMemory")
-    subriber = memoire.subscriber(eventName)
-    subriber.signal.connect(onEvent) # connect ne reverra rien, il faudra se débrouiller autremen si vous voulez réutiliser la valariable ailleurs
+    return GestionnaireAbonnements.pour(session).abonner(eventName, onEvent)
 
-if __name__ == '__main__' : pass
\ No newline at end of file
+if __name__ == '__main__' : pass
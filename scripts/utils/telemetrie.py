@@ -0,0 +1,286 @@
+"""
+Module d'enregistrement de télémétrie (sonar, centrale inertielle, odométrie, ASR, détections).
+
+Chaque canal accumule ses échantillons dans des tampons numpy en colonnes. Les tampons pleins
+sont écrits par lots par un thread d'arrière-plan dans un format colonne brut :
+
+    <dossier>/<canal>/schema.json   noms des colonnes et type
+    <dossier>/<canal>/<colonne>.bin valeurs float64 ajoutées bout à bout
+
+ce qui se recharge directement avec numpy (voir charger). La mémoire est bornée : quand la file
+d'écriture est pleine, les nouveaux blocs sont abandonnés (ou le producteur attend) et comptés.
+Les lignes d'un canal sont écrites dans l'ordre : un bloc plein entre dans la file sous le
+verrou du canal, et l'écriture périodique des blocs partiels attend que la file ne contienne
+plus de bloc de ce canal. Une erreur d'écriture (disque plein, droits) arrête l'enregistrement
+et est relevée au prochain ajouter ou à la fermeture.
+
+Par défaut, les enregistrements vont dans ~/.cache/nao-s501/telemetrie/<date>_<heure>.
+
+Utilisation:
+    from scripts.utils import telemetrie
+    telemetrie.demarrer()
+    sonar = telemetrie.canal("sonar", ("gauche", "droite"))
+    sonar.ajouter(0.52, 0.61)
+    telemetrie.arreter()
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+DOSSIER = os.path.join(os.path.expanduser("~"), ".cache", "nao-s501", "telemetrie")
+
+
+class Canal:
+    """
+Canal de télémétrie : un tampon de taille fixe par lot, une colonne par grandeur
+
+Args:
+    telemetrie: l'enregistreur auquel envoyer les blocs pleins
+    nom: nom du canal (nom du dossier sur disque)
+    colonnes: noms des grandeurs enregistrées (la colonne "t" est ajoutée automatiquement)
+    taille_bloc: nombre d'échantillons par bloc écrit
+    """
+
+    def __init__(self, telemetrie : "Telemetrie", nom : str, colonnes : Sequence[str], taille_bloc : int):
+        self.telemetrie = telemetrie
+        self.nom = nom
+        self.colonnes = ("t",) + tuple(colonnes)
+        self.taille_bloc = taille_bloc
+        self.perdus = 0
+        self._verrou = threading.Lock()
+        self._tampon = np.empty((taille_bloc, len(self.colonnes)), dtype=np.float64)
+        self._n = 0
+        self._verrou_file = threading.Lock()
+        self._en_file = 0  # blocs pleins de ce canal en attente d'écriture
+
+    def ajouter(self, *valeurs : float, t : Optional[float] = None) -> None:
+        """
+Ajoute un échantillon (horodaté avec time.time() si t n'est pas donné)
+
+Args:
+    valeurs: une valeur par colonne, dans l'ordre de déclaration
+    t: horodatage en secondes
+    """
+        self.telemetrie._verifier()
+        with self._verrou:
+            ligne = self._tampon[self._n]
+            ligne[0] = time.time() if t is None else t
+            ligne[1:] = valeurs
+            self._n += 1
+            if self._n == self.taille_bloc:
+                plein = self._tampon
+                self._tampon = np.empty_like(plein)
+                self._n = 0
+                # Sous le verrou : aucune ligne plus récente ne peut être écrite avant ce bloc
+                self._compter_en_file(1)
+                if not self.telemetrie._envoyer(self, plein):
+                    self._compter_en_file(-1)
+
+    def _compter_en_file(self, n : int) -> None:
+        with self._verrou_file:
+            self._en_file += n
+
+    def _vider(self) -> Optional[np.ndarray]:
+        # Thread d'écriture : sans attendre un producteur bloqué sur la file (mode bloquer)
+        if not self._verrou.acquire(blocking=False):
+            return None
+        try:
+            if self._n == 0 or self._en_file > 0:
+                return None
+            partiel = self._tampon[:self._n].copy()
+            self._n = 0
+        finally:
+            self._verrou.release()
+        return partiel
+
+
+class _CanalInactif:
+    """Canal retourné quand la télémétrie n'est pas démarrée : ne fait rien"""
+
+    perdus = 0
+
+    def ajouter(self, *valeurs : float, t : Optional[float] = None) -> None:
+        pass
+
+
+class Telemetrie:
+    """
+Enregistreur de télémétrie avec écriture par lots en arrière-plan
+
+Args:
+    dossier: dossier de sortie (créé si besoin)
+    taille_bloc: nombre d'échantillons par bloc
+    blocs_max: nombre maximal de blocs en attente d'écriture (borne la mémoire)
+    bloquer: si vrai, un producteur attend qu'une place se libère au lieu d'abandonner le bloc
+    periode: intervalle (s) d'écriture des blocs partiellement remplis
+    """
+
+    def __init__(self, dossier : str, taille_bloc : int = 1024, blocs_max : int = 64,
+                 bloquer : bool = False, periode : float = 1.0):
+        self.dossier = dossier
+        self.taille_bloc = taille_bloc
+        self.bloquer = bloquer
+        self.periode = periode
+        self.ecrits = 0
+        self._erreur : Optional[BaseException] = None
+        self._canaux : Dict[str, Canal] = {}
+        self._verrou = threading.Lock()
+        self._file : "queue.Queue[Optional[Tuple[Canal, np.ndarray]]]" = queue.Queue(maxsize=blocs_max)
+        os.makedirs(dossier, exist_ok=True)
+        self._thread = threading.Thread(target=self._ecrire, name="Telemetrie", daemon=True)
+        self._thread.start()
+
+    def canal(self, nom : str, colonnes : Sequence[str] = ("valeur",)) -> Canal:
+        """Retourne le canal nom, créé au premier appel"""
+        with self._verrou:
+            canal = self._canaux.get(nom)
+            if canal is None:
+                canal = Canal(self, nom, colonnes, self.taille_bloc)
+                self._canaux[nom] = canal
+                os.makedirs(os.path.join(self.dossier, nom), exist_ok=True)
+                with open(os.path.join(self.dossier, nom, "schema.json"), "w") as f:
+                    json.dump({"colonnes": list(canal.colonnes), "dtype": "float64"}, f)
+            return canal
+
+    def _envoyer(self, canal : Canal, bloc : np.ndarray) -> bool:
+        try:
+            self._file.put((canal, bloc), block=self.bloquer)
+        except queue.Full:
+            canal.perdus += len(bloc)
+            return False
+        return True
+
+    def _ecrire_bloc(self, canal : Canal, bloc : np.ndarray) -> None:
+        for i, colonne in enumerate(canal.colonnes):
+            with open(os.path.join(self.dossier, canal.nom, f"{colonne}.bin"), "ab") as f:
+                np.ascontiguousarray(bloc[:, i]).tofile(f)
+        self.ecrits += len(bloc)
+
+    def _vider_partiels(self) -> None:
+        if self._erreur is not None:
+            return
+        with self._verrou:
+            canaux = list(self._canaux.values())
+        try:
+            for canal in canaux:
+                partiel = canal._vider()
+                if partiel is not None:
+                    self._ecrire_bloc(canal, partiel)
+        except Exception as e:
+            self._erreur = e
+
+    def _verifier(self) -> None:
+        if self._erreur is not None:
+            raise RuntimeError(f"Écriture de la télémétrie interrompue : {self._erreur!r}") from self._erreur
+
+    def _ecrire(self) -> None:
+        while True:
+            try:
+                element = self._file.get(timeout=self.periode)
+            except queue.Empty:
+                self._vider_partiels()
+                continue
+            if element is None:
+                break
+            canal, bloc = element
+            if self._erreur is None:  # sinon la file est vidée pour ne jamais bloquer les producteurs
+                try:
+                    self._ecrire_bloc(canal, bloc)
+                except Exception as e:
+                    self._erreur = e
+            canal._compter_en_file(-1)
+        self._vider_partiels()
+
+    def statistiques(self) -> Dict[str, int]:
+        """Échantillons écrits, blocs en attente et échantillons perdus par canal"""
+        stats = {"ecrits": self.ecrits, "en_attente": self._file.qsize()}
+        with self._verrou:
+            for nom, canal in self._canaux.items():
+                stats[f"perdus_{nom}"] = canal.perdus
+        return stats
+
+    def fermer(self) -> None:
+        """Écrit tout ce qui reste et arrête le thread d'écriture"""
+        self._file.put(None)
+        self._thread.join()
+        self._verifier()
+
+
+def charger(dossier : str, canaux : Optional[Iterable[str]] = None) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+Recharge un enregistrement
+
+Args:
+    dossier: dossier passé à Telemetrie
+    canaux: canaux à charger (tous par défaut)
+
+Returns:
+    {canal: {colonne: tableau numpy}}
+    """
+    resultat = {}
+    for nom in canaux or sorted(os.listdir(dossier)):
+        chemin = os.path.join(dossier, nom)
+        schema = os.path.join(chemin, "schema.json")
+        if not os.path.isfile(schema):
+            continue
+        with open(schema, "r") as f:
+            description = json.load(f)
+        colonnes = {}
+        for colonne in description["colonnes"]:
+            fichier = os.path.join(chemin, f"{colonne}.bin")
+            colonnes[colonne] = (np.fromfile(fichier, dtype=description["dtype"])
+                                 if os.path.exists(fichier) else np.empty(0))
+        resultat[nom] = colonnes
+    return resultat
+
+
+# Enregistreur partagé par les modules du projet
+_active : Optional[Telemetrie] = None
+
+
+def demarrer(dossier : Optional[str] = None, **kwargs) -> Telemetrie:
+    """
+Démarre l'enregistreur partagé
+
+Args:
+    dossier: dossier de sortie (par défaut DOSSIER/<date>_<heure>)
+    kwargs: options de Telemetrie
+    """
+    global _active
+    if _active is not None:
+        return _active
+    if dossier is None:
+        dossier = os.path.join(DOSSIER, time.strftime("%Y%m%d_%H%M%S"))
+    _active = Telemetrie(dossier, **kwargs)
+    return _active
+
+
+def arreter() -> None:
+    """Arrête l'enregistreur partagé en écrivant les données restantes"""
+    global _active
+    if _active is not None:
+        active, _active = _active, None
+        active.fermer()
+
+
+def statistiques() -> Dict[str, int]:
+    """Statistiques de l'enregistreur partagé (vide s'il n'est pas démarré)"""
+    return _active.statistiques() if _active is not None else {}
+
+
+def canal(nom : str, colonnes : Sequence[str] = ("valeur",)):
+    """
+Canal de l'enregistreur partagé, ou canal inactif si la télémétrie n'est pas démarrée
+(les modules peuvent donc toujours enregistrer sans vérifier)
+    """
+    if _active is None:
+        return _CanalInactif()
+    return _active.canal(nom, colonnes)
+
+if __name__ == '__main__' : pass
@@ -8,6 +8,8 @@ import time
 import cv2
 import numpy as np
 import pyvirtualcam
+from scripts.utils.espace_couleur import RGB, YUV422
+from scripts.utils.horodatage_images import SourceImages
 
 # Needed packages to instantiate the virtual cam
 # sudo apt install v4l2loopback-dkms v4l2loopback-utils 
@@ -17,11 +19,11 @@ import pyvirtualcam
 # sudo rmmod v4l2loopback
 # sudo modprobe v4l2loopback devices=1 video_nr=10 card_label="NAOcam" exclusive_caps=1
 
-def main(session):
+def main(session, age_max=0.25, yuv422=False):
     video_service = session.service("ALVideoDevice")
     # Camera settings
     resolution = 2  # VGA (640x480)
-    color_space = 11  # RGB
+    color_space = YUV422 if yuv422 else RGB  # YUV422: native sensor format, 2 bytes per pixel
     fps = 15
     camera_index = 1  # Use 0 or 1 depending on the working camera
 
@@ -30,20 +32,23 @@ def main(session):
     name_id = video_service.subscribeCamera(name_id, camera_index, resolution, color_space, fps)
     print("Subscribed to camera:", name_id)
 
+    # Frames keep their capture timestamp; frames older than age_max are dropped
+    source = SourceImages(video_service, name_id, "virtual_cam", age_max, etapes=("envoi",), espace=color_space)
+
     try:
         with pyvirtualcam.Camera(width=640, height=480, fps=20) as cam:
             print("Press Ctrl+C to exit cleanly.")
             while True:
-                image = video_service.getImageRemote(name_id)
+                vides = source.vides
+                image = source.lire()
                 if image is None:
-                    print("No image.")
+                    if source.vides != vides:
+                        print("No image.")
                     continue
 
-                width, height = image[0], image[1]
-                array = image[6]
-                img = np.frombuffer(array, dtype=np.uint8).reshape((height, width, 3))
-
-                cam.send(img)
+                cam.send(image.couleur().rgb)
+                image.marquer("envoi")
+                image.terminer()
                 cam.sleep_until_next_frame()
     except KeyboardInterrupt:
         print("\nExit requested by user.")
@@ -63,6 +68,10 @@ if __name__ == "__main__":
                         help="Robot IP address. On robot or Local Naoqi: use '127.0.0.1'.")
     parser.add_argument("--port", type=int, default=9559,
                         help="Naoqi port number")
+    parser.add_argument("--age-max", type=float, default=0.25,
+                        help="Drop frames older than this many seconds since capture")
+    parser.add_argument("--yuv422", action="store_true",
+                        help="Stream the camera's native YUV422 format (a third fewer bytes) and decode it here")
 
     args = parser.parse_args()
     session = qi.Session()
@@ -72,4 +81,4 @@ if __name__ == "__main__":
         print ("Can't connect to Naoqi at ip \"" + args.ip + "\" on port " + str(args.port) +".\n"
                "Please check your script arguments. Run with -h option for help.")
         sys.exit(1)
-    main(session)
+    main(session, args.age_max, args.yuv422)